@@ -3,6 +3,7 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_cors import CORS
 import os
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from dotenv import load_dotenv
 
 # 加载环境变量
@@ -12,6 +13,15 @@ load_dotenv()
 db = SQLAlchemy()
 migrate = Migrate()
 
+from app.utils.response_cache import ResponseCache
+from app.utils import sqlite_profile, search
+from app.utils.downloads import SENDFILE_MODES
+from app.utils.previews import PreviewGenerator
+from app.utils.change_feed import ChangeFeed
+response_cache = ResponseCache()
+preview_generator = PreviewGenerator()
+change_feed = ChangeFeed()
+
 def create_app():
     """应用工厂函数"""
     app = Flask(__name__)
@@ -23,25 +33,113 @@ def create_app():
         'sqlite:///project_management.db'
     )
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # SQLite连接配置档（PRAGMA与连接池），见 app/utils/sqlite_profile.py
+    app.config['SQLITE_PROFILE'] = os.environ.get('SQLITE_PROFILE', 'production')
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = sqlite_profile.engine_options(
+        app.config['SQLITE_PROFILE'], app.config['SQLALCHEMY_DATABASE_URI']
+    )
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB
+    # 批量导入接口单独的请求体大小上限
+    app.config['IMPORT_MAX_CONTENT_LENGTH'] = int(os.environ.get(
+        'IMPORT_MAX_CONTENT_LENGTH', 2 * 1024 * 1024 * 1024
+    ))  # 2GB
+    # 分块上传：单个分块请求体上限与文件总大小上限
+    app.config['UPLOAD_CHUNK_MAX_SIZE'] = int(os.environ.get(
+        'UPLOAD_CHUNK_MAX_SIZE', 64 * 1024 * 1024
+    ))  # 64MB
+    app.config['UPLOAD_MAX_FILE_SIZE'] = int(os.environ.get(
+        'UPLOAD_MAX_FILE_SIZE', 10 * 1024 * 1024 * 1024
+    ))  # 10GB
+    # 文档下载：由前端代理发送文件（none、x-sendfile、x-accel-redirect）
+    app.config['DOCUMENT_SENDFILE_MODE'] = os.environ.get('DOCUMENT_SENDFILE_MODE', 'none').lower()
+    if app.config['DOCUMENT_SENDFILE_MODE'] not in SENDFILE_MODES:
+        raise ValueError(f"DOCUMENT_SENDFILE_MODE必须是{'、'.join(SENDFILE_MODES)}之一")
+    app.config['DOCUMENT_ACCEL_PREFIX'] = os.environ.get('DOCUMENT_ACCEL_PREFIX', '/protected-uploads/')
+    # 按内容寻址的文档在浏览器中的缓存时间（秒）
+    app.config['DOCUMENT_CACHE_MAX_AGE'] = int(os.environ.get('DOCUMENT_CACHE_MAX_AGE', 365 * 24 * 3600))
+    # 文档预览图保存目录
+    app.config['PREVIEW_FOLDER'] = os.environ.get(
+        'PREVIEW_FOLDER', os.path.join(os.path.dirname(__file__), 'uploads', 'previews')
+    )
+    # 文档文本提取：每个文件的CPU时间（秒）、内存（MB）上限及保留的最大字符数
+    app.config['TEXT_EXTRACT_CPU_SECONDS'] = int(os.environ.get('TEXT_EXTRACT_CPU_SECONDS', 30))
+    app.config['TEXT_EXTRACT_MEMORY_MB'] = int(os.environ.get('TEXT_EXTRACT_MEMORY_MB', 512))
+    app.config['TEXT_EXTRACT_MAX_CHARS'] = int(os.environ.get('TEXT_EXTRACT_MAX_CHARS', 1000000))
+    # 耗时报表按该时区划分日期，修改后需执行`flask rebuild-time-rollups`
+    app.config['TIME_REPORT_TIMEZONE'] = os.environ.get('TIME_REPORT_TIMEZONE', 'UTC')
+    try:
+        ZoneInfo(app.config['TIME_REPORT_TIMEZONE'])
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"TIME_REPORT_TIMEZONE无效：{app.config['TIME_REPORT_TIMEZONE']}")
+    # 后台任务：embedded在应用进程内运行工作线程，external由`flask worker`单独运行
+    app.config['JOB_WORKER_MODE'] = os.environ.get('JOB_WORKER_MODE', 'embedded').lower()
+    if app.config['JOB_WORKER_MODE'] not in ('embedded', 'external'):
+        raise ValueError('JOB_WORKER_MODE必须是embedded或external')
+    app.config['JOB_WORKER_THREADS'] = int(os.environ.get('JOB_WORKER_THREADS', 2))
+    app.config['JOB_POLL_INTERVAL'] = float(os.environ.get('JOB_POLL_INTERVAL', 1.0))
+    # 变更推送：每个进程轮询事件表的间隔（秒）、连接保活间隔（秒）及事件表保留的条数
+    app.config['CHANGE_FEED_POLL_INTERVAL'] = float(os.environ.get('CHANGE_FEED_POLL_INTERVAL', 0.5))
+    app.config['CHANGE_FEED_HEARTBEAT'] = float(os.environ.get('CHANGE_FEED_HEARTBEAT', 15))
+    app.config['CHANGE_EVENT_RETENTION'] = int(os.environ.get('CHANGE_EVENT_RETENTION', 10000))
+    # 批量请求：一次最多的子请求数，及并行执行只读子请求的线程数
+    app.config['BATCH_MAX_REQUESTS'] = int(os.environ.get('BATCH_MAX_REQUESTS', 50))
+    app.config['BATCH_MAX_WORKERS'] = int(os.environ.get('BATCH_MAX_WORKERS', 4))
+    # 服务端响应缓存：memory（进程内LRU）、sqlite（多进程共享）或none
+    app.config['RESPONSE_CACHE_BACKEND'] = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')
+    app.config['RESPONSE_CACHE_TTL'] = int(os.environ.get('RESPONSE_CACHE_TTL', 300))
+    app.config['RESPONSE_CACHE_MAX_ENTRIES'] = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 1000))
+    app.config['RESPONSE_CACHE_MAX_BYTES'] = int(os.environ.get(
+        'RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024
+    ))  # 64MB
+    app.config['RESPONSE_CACHE_PATH'] = os.environ.get('RESPONSE_CACHE_PATH')
     
     # CORS配置
     CORS(app, origins=os.environ.get('CORS_ORIGINS', 'http://localhost:3000').split(','))
     
     # 初始化扩展
     db.init_app(app)
-    migrate.init_app(app, db)
+    with app.app_context():
+        sqlite_profile.install(db.engine, app.config['SQLITE_PROFILE'])
+        search.install(db.engine)
+    # SQLite不支持大部分ALTER TABLE操作，迁移使用批处理模式；全文索引表不参与自动生成
+    migrate.init_app(app, db, render_as_batch=True, include_name=search.include_name)
+    response_cache.init_app(app)
+    preview_generator.init_app(app)
+    change_feed.init_app(app)
     
     # 注册蓝图
     from app.routes.projects import projects_bp
     from app.routes.tasks import tasks_bp
     from app.routes.documents import documents_bp
     from app.routes.timer import timer_bp
+    from app.routes.imports import imports_bp
+    from app.routes.exports import exports_bp
+    from app.routes.jobs import jobs_bp
+    from app.routes.search import search_bp
+    from app.routes.reports import reports_bp
+    from app.routes.dashboard import dashboard_bp
+    from app.routes.events import events_bp
+    from app.routes.batch import batch_bp
     
     app.register_blueprint(projects_bp, url_prefix='/api')
     app.register_blueprint(tasks_bp, url_prefix='/api')
     app.register_blueprint(documents_bp, url_prefix='/api')
     app.register_blueprint(timer_bp, url_prefix='/api')
+    app.register_blueprint(imports_bp, url_prefix='/api')
+    app.register_blueprint(exports_bp, url_prefix='/api')
+    app.register_blueprint(jobs_bp, url_prefix='/api')
+    app.register_blueprint(search_bp, url_prefix='/api')
+    app.register_blueprint(reports_bp, url_prefix='/api')
+    app.register_blueprint(dashboard_bp, url_prefix='/api')
+    app.register_blueprint(events_bp, url_prefix='/api')
+    app.register_blueprint(batch_bp, url_prefix='/api')
+    
+    if app.config['JOB_WORKER_MODE'] == 'embedded':
+        # 收到第一个请求时启动，命令行命令不会启动工作线程
+        @app.before_request
+        def ensure_job_worker():
+            from app.utils.jobs import start_embedded_worker
+            start_embedded_worker(app)
     
     # 错误处理
     @app.errorhandler(404)
@@ -77,4 +175,20 @@ def create_app():
             'status': 'healthy'
         })
     
+    # 响应缓存统计
+    @app.route('/api/cache/stats')
+    def cache_stats():
+        return jsonify({
+            'success': True,
+            'data': response_cache.stats()
+        })
+
+    @app.route('/api/cache', methods=['DELETE'])
+    def clear_cache():
+        count = response_cache.clear()
+        return jsonify({
+            'success': True,
+            'message': f'已清空{count}条缓存'
+        })
+    
     return app
\ No newline at end of file
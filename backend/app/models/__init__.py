@@ -2,5 +2,12 @@ from .project import Project
 from .task import Task
 from .document import Document
 from .time_log import TimeLog
+from .time_rollup import TimeRollup
+from .time_daily_rollup import TimeDailyRollup
+from .change_counter import ChangeCounter
+from .change_event import ChangeEvent
+from .blob import Blob
+from .job import Job
+from .document_text import DocumentText
 
-__all__ = ['Project', 'Task', 'Document', 'TimeLog']
\ No newline at end of file
+__all__ = ['Project', 'Task', 'Document', 'TimeLog', 'TimeRollup', 'TimeDailyRollup', 'ChangeCounter', 'ChangeEvent', 'Blob', 'Job', 'DocumentText']
\ No newline at end of file
@@ -0,0 +1,137 @@
+from app import db
+from app.utils.upsert import upsert_increment
+from datetime import datetime
+import hashlib
+import os
+import uuid
+
+# 写入/校验文件时的读写缓冲区大小
+HASH_BUFFER_SIZE = 1024 * 1024
+
+class Blob(db.Model):
+    """
+    按内容寻址的文件
+
+    每个SHA-256只保存一份物理文件，路径为 <blob目录>/ab/cd/<sha256>，
+    ref_count记录引用该文件的文档数，降为0后由后台任务删除文件
+    """
+    __tablename__ = 'blobs'
+
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    path = db.Column(db.String(500), nullable=False)
+    ref_count = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Blob {self.sha256[:12]} refs={self.ref_count}>'
+
+    @staticmethod
+    def blob_path(blob_root, sha256):
+        return os.path.join(blob_root, sha256[:2], sha256[2:4], sha256)
+
+    @staticmethod
+    def hash_file(path):
+        """计算文件的SHA-256，返回 (十六进制摘要, 字节数)"""
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, 'rb') as f:
+            while True:
+                block = f.read(HASH_BUFFER_SIZE)
+                if not block:
+                    break
+                digest.update(block)
+                size += len(block)
+        return digest.hexdigest(), size
+
+    @classmethod
+    def write_stream(cls, stream, blob_root):
+        """
+        将流写入临时文件并同时计算SHA-256
+
+        Returns:
+            (临时文件路径, 十六进制摘要, 字节数)
+        """
+        tmp_dir = os.path.join(blob_root, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        tmp_path = os.path.join(tmp_dir, uuid.uuid4().hex)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(tmp_path, 'wb') as f:
+                while True:
+                    block = stream.read(HASH_BUFFER_SIZE)
+                    if not block:
+                        break
+                    digest.update(block)
+                    f.write(block)
+                    size += len(block)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        return tmp_path, digest.hexdigest(), size
+
+    @classmethod
+    def add_reference(cls, source_path, sha256, size, blob_root):
+        """
+        为内容增加一次引用，不提交事务
+
+        先递增引用计数（同时取得写锁），再放置文件：相同内容已存在时删除
+        source_path，否则将其重命名为blob文件
+
+        Args:
+            source_path: 已写入完整内容的文件，调用后不再存在
+            sha256: 内容摘要
+            size: 字节数
+            blob_root: blob根目录
+
+        Returns:
+            blob文件路径
+        """
+        path = cls.blob_path(blob_root, sha256)
+        upsert_increment(
+            cls,
+            keys={'sha256': sha256},
+            increments={'ref_count': 1},
+            values={'size': size, 'path': path}
+        )
+        if os.path.exists(path):
+            os.remove(source_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(source_path, path)
+        return path
+
+    @classmethod
+    def release_many(cls, counts):
+        """
+        释放引用，不提交事务
+
+        引用数降为0的blob只保留记录，由collect_blobs后台任务在本事务提交后
+        删除记录、物理文件和预览图
+
+        Args:
+            counts: {sha256: 释放次数}
+
+        Returns:
+            引用数降为0的摘要列表
+        """
+        from app.models.job import Job
+
+        if not counts:
+            return []
+        for sha256, count in counts.items():
+            db.session.execute(
+                db.update(cls).where(cls.sha256 == sha256).values(ref_count=cls.ref_count - count)
+            )
+        unreferenced = db.session.execute(
+            db.select(cls.sha256).where(cls.sha256.in_(list(counts)), cls.ref_count <= 0)
+        ).scalars().all()
+        if unreferenced:
+            Job.enqueue('collect_blobs', {'hashes': unreferenced})
+        return unreferenced
+
+    @classmethod
+    def release(cls, sha256):
+        """释放一次引用，不提交事务，见 release_many"""
+        return bool(cls.release_many({sha256: 1}))
@@ -0,0 +1,165 @@
+from app import db
+from app.utils.upsert import upsert_increment
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+import hashlib
+
+# 事务提交后接收变更范围的回调，见 ChangeCounter.on_commit
+_commit_callbacks = []
+
+class ChangeCounter(db.Model):
+    """
+    数据变更计数器
+
+    每个范围（表名或"project:<id>"）一行，项目、任务、时间日志、文档在
+    同一事务中写入时版本号加一。列表和详情接口据此计算ETag和Last-Modified，
+    无需加载和序列化数据即可判断内容是否变化。
+    """
+    __tablename__ = 'change_counters'
+
+    # 全局范围，所有校验值都包含它，需要让全部缓存失效时递增
+    GLOBAL = '*'
+
+    scope = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<ChangeCounter {self.scope}: {self.version}>'
+
+    @staticmethod
+    def project_scope(project_id):
+        return f'project:{project_id}'
+
+    @classmethod
+    def bump(cls, scopes, connection=None):
+        """
+        递增指定范围的版本号，不提交事务
+
+        Args:
+            scopes: 范围列表
+            connection: 在指定连接上执行，默认使用当前会话
+        """
+        if connection is None:
+            connection = db.session.connection()
+        scopes = set(scopes)
+        now = datetime.utcnow()
+        for scope in sorted(scopes):
+            upsert_increment(
+                cls,
+                keys={'scope': scope},
+                increments={'version': 1},
+                values={'updated_at': now},
+                connection=connection
+            )
+        # 记录在连接上，事务提交时通知on_commit回调
+        connection.info.setdefault('changed_scopes', set()).update(scopes)
+
+    @staticmethod
+    def on_commit(callback):
+        """
+        注册事务提交回调，callback(scopes)在包含变更的事务提交时调用
+
+        会话和直接使用连接的批量写入都会触发
+        """
+        if callback not in _commit_callbacks:
+            _commit_callbacks.append(callback)
+        return callback
+
+    @classmethod
+    def get_validators(cls, scopes, key=''):
+        """
+        计算一组范围的ETag和最后修改时间
+
+        Args:
+            scopes: 响应内容依赖的范围
+            key: 区分同一范围下不同响应的附加键（如请求路径和参数）
+
+        Returns:
+            (etag, last_modified)，从未变更过时last_modified为None
+        """
+        scopes = sorted(set(scopes) | {cls.GLOBAL})
+        rows = db.session.query(cls.scope, cls.version, cls.updated_at) \
+            .filter(cls.scope.in_(scopes)).all()
+        versions = {scope: (version, updated_at) for scope, version, updated_at in rows}
+
+        digest = hashlib.sha1(key.encode('utf-8'))
+        for scope in scopes:
+            digest.update(f'|{scope}={versions.get(scope, (0, None))[0]}'.encode('utf-8'))
+
+        timestamps = [updated_at for _, updated_at in versions.values() if updated_at]
+        return digest.hexdigest(), max(timestamps) if timestamps else None
+
+def _changed_scopes(session):
+    """收集本次flush中涉及的变更范围"""
+    from app.models import Project, Task, TimeLog, Document
+
+    scopes = set()
+    task_ids = set()
+    changed = list(session.new) + list(session.dirty) + list(session.deleted)
+
+    for obj in changed:
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        if isinstance(obj, Project):
+            scopes.update(('projects', ChangeCounter.project_scope(obj.id)))
+        elif isinstance(obj, Task):
+            scopes.update(('tasks', ChangeCounter.project_scope(obj.project_id)))
+        elif isinstance(obj, TimeLog):
+            scopes.add('time_logs')
+            task_ids.add(obj.task_id)
+        elif isinstance(obj, Document):
+            scopes.add('documents')
+            task_ids.add(obj.task_id)
+
+    if task_ids:
+        scopes.update(
+            ChangeCounter.project_scope(project_id)
+            for project_id in task_project_ids(session, task_ids).values()
+        )
+
+    return scopes
+
+def task_project_ids(session, task_ids):
+    """
+    查询任务所属项目，优先使用会话中已加载的任务
+
+    Returns:
+        {task_id: project_id}，不存在的任务不包含在内
+    """
+    from app.models import Task
+
+    project_ids = {}
+    missing = set()
+    for task_id in task_ids:
+        task = session.identity_map.get(db.inspect(Task).identity_key_from_primary_key((task_id,)))
+        if task is not None:
+            project_ids[task_id] = task.project_id
+        else:
+            missing.add(task_id)
+    if missing:
+        rows = session.connection().execute(
+            db.select(Task.__table__.c.id, Task.__table__.c.project_id)
+            .where(Task.__table__.c.id.in_(missing))
+        )
+        project_ids.update(dict(rows.all()))
+    return project_ids
+
+@event.listens_for(Session, 'after_flush')
+def _bump_change_counters(session, flush_context):
+    scopes = _changed_scopes(session)
+    if scopes:
+        ChangeCounter.bump(scopes, connection=session.connection())
+
+@event.listens_for(Engine, 'commit')
+def _notify_commit(conn):
+    scopes = conn.info.pop('changed_scopes', None)
+    if scopes:
+        for callback in _commit_callbacks:
+            callback(scopes)
+
+@event.listens_for(Engine, 'rollback')
+def _discard_changes(conn):
+    conn.info.pop('changed_scopes', None)
@@ -0,0 +1,172 @@
+from app import db
+from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+import json
+
+# 每写入这么多条事件检查一次保留上限
+TRIM_INTERVAL = 500
+DEFAULT_RETENTION = 10000
+
+class ChangeEvent(db.Model):
+    """
+    数据变更事件日志，供变更推送（见 app/utils/change_feed.py）使用
+
+    项目、任务、时间日志、文档在flush时与数据在同一事务中写入一条紧凑的事件，
+    计时器的开始和停止记为timer事件。事件ID单调递增，客户端断线重连时凭
+    Last-Event-ID补发；只保留最近CHANGE_EVENT_RETENTION条。
+    """
+    __tablename__ = 'change_events'
+
+    TYPE_PROJECT = 'project'
+    TYPE_TASK = 'task'
+    TYPE_TIME_LOG = 'time_log'
+    TYPE_DOCUMENT = 'document'
+    TYPE_TIMER = 'timer'
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(20), nullable=False)
+    action = db.Column(db.String(20), nullable=False)  # created, updated, deleted, started, stopped, imported
+    entity_id = db.Column(db.Integer)
+    project_id = db.Column(db.Integer)
+    data = db.Column(db.Text)  # 附加字段（JSON），如修改的字段、所属任务
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<ChangeEvent {self.id} {self.entity_type}:{self.entity_id} {self.action}>'
+
+    @staticmethod
+    def make(entity_type, action, entity_id=None, project_id=None, **data):
+        """构造一条待写入的事件"""
+        return {
+            'entity_type': entity_type,
+            'action': action,
+            'entity_id': entity_id,
+            'project_id': project_id,
+            'data': json.dumps(data, ensure_ascii=False, separators=(',', ':')) if data else None,
+            'created_at': datetime.utcnow()
+        }
+
+    @classmethod
+    def record(cls, events, connection=None):
+        """
+        写入事件，不提交事务；批量SQL写入不经过flush，需由调用方记录
+
+        Args:
+            events: ChangeEvent.make 构造的事件列表
+            connection: 在指定连接上执行，默认使用当前会话
+        """
+        if not events:
+            return
+        if connection is None:
+            connection = db.session.connection()
+        ids = connection.execute(cls.__table__.insert().returning(cls.__table__.c.id), events).scalars().all()
+
+        # 跨过TRIM_INTERVAL的整数倍时删除超出保留上限的旧事件
+        first, last = min(ids), max(ids)
+        if (first - 1) // TRIM_INTERVAL != last // TRIM_INTERVAL:
+            retention = current_app.config.get('CHANGE_EVENT_RETENTION', DEFAULT_RETENTION) \
+                if has_app_context() else DEFAULT_RETENTION
+            connection.execute(cls.__table__.delete().where(cls.__table__.c.id <= last - retention))
+
+    @classmethod
+    def latest_id(cls, connection):
+        return connection.execute(db.select(db.func.max(cls.id))).scalar() or 0
+
+    @classmethod
+    def fetch_since(cls, connection, after_id, project_ids=None, limit=1000):
+        """
+        读取某ID之后的事件
+
+        Args:
+            connection: 数据库连接，读取后由调用方立即释放
+            after_id: 只返回ID大于它的事件
+            project_ids: 只返回这些项目的事件，None表示全部
+            limit: 最多返回的条数
+
+        Returns:
+            事件字典列表，按ID排序
+        """
+        table = cls.__table__
+        query = db.select(table).where(table.c.id > after_id).order_by(table.c.id).limit(limit)
+        if project_ids is not None:
+            query = query.where(table.c.project_id.in_(project_ids))
+        return [cls.to_payload(row) for row in connection.execute(query)]
+
+    @classmethod
+    def oldest_id(cls, connection):
+        return connection.execute(db.select(db.func.min(cls.id))).scalar()
+
+    @staticmethod
+    def to_payload(row):
+        """转换为推送给客户端的紧凑格式"""
+        payload = {
+            'id': row.id,
+            'type': row.entity_type,
+            'action': row.action,
+            'entity_id': row.entity_id,
+            'project_id': row.project_id,
+            'at': row.created_at.isoformat()
+        }
+        if row.data:
+            payload.update(json.loads(row.data))
+        return payload
+
+def _changed_fields(obj):
+    return sorted(
+        attr.key for attr in db.inspect(obj).attrs
+        if attr.key not in ('updated_at',) and attr.history.has_changes()
+    )
+
+def _flush_events(session):
+    """根据本次flush中的变更生成事件"""
+    from app.models import Project, Task, TimeLog, Document
+    from app.models.change_counter import task_project_ids
+
+    changes = []
+    for action, objects in (('created', session.new), ('updated', session.dirty), ('deleted', session.deleted)):
+        for obj in objects:
+            if not isinstance(obj, (Project, Task, TimeLog, Document)):
+                continue
+            if action == 'updated' and not session.is_modified(obj, include_collections=False):
+                continue
+            changes.append((action, obj))
+
+    # 随任务级联删除的时间日志和文档不单独推送
+    deleted_tasks = {obj.id for action, obj in changes if action == 'deleted' and isinstance(obj, Task)}
+    changes = [
+        (action, obj) for action, obj in changes
+        if not (action == 'deleted' and isinstance(obj, (TimeLog, Document)) and obj.task_id in deleted_tasks)
+    ]
+    task_ids = {obj.task_id for _, obj in changes if isinstance(obj, (TimeLog, Document))}
+    project_ids = task_project_ids(session, task_ids) if task_ids else {}
+
+    events = []
+    for action, obj in changes:
+        if isinstance(obj, Project):
+            extra = {'fields': _changed_fields(obj)} if action == 'updated' else {}
+            events.append(ChangeEvent.make(ChangeEvent.TYPE_PROJECT, action, obj.id, obj.id, **extra))
+        elif isinstance(obj, Task):
+            extra = {'fields': _changed_fields(obj)} if action == 'updated' else {}
+            events.append(ChangeEvent.make(ChangeEvent.TYPE_TASK, action, obj.id, obj.project_id, **extra))
+        elif isinstance(obj, TimeLog):
+            entity_type = ChangeEvent.TYPE_TIME_LOG
+            if action == 'created' and obj.end_time is None:
+                entity_type, action = ChangeEvent.TYPE_TIMER, 'started'
+            elif action == 'updated' and db.inspect(obj).attrs.end_time.history.deleted == [None]:
+                entity_type, action = ChangeEvent.TYPE_TIMER, 'stopped'
+            events.append(ChangeEvent.make(
+                entity_type, action, obj.id, project_ids.get(obj.task_id), task_id=obj.task_id
+            ))
+        else:
+            events.append(ChangeEvent.make(
+                ChangeEvent.TYPE_DOCUMENT, action, obj.id, project_ids.get(obj.task_id), task_id=obj.task_id
+            ))
+    return events
+
+@event.listens_for(Session, 'after_flush')
+def _record_change_events(session, flush_context):
+    events = _flush_events(session)
+    if events:
+        ChangeEvent.record(events, connection=session.connection())
@@ -1,9 +1,15 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import func
 import os
 
 class Document(db.Model):
     __tablename__ = 'documents'
+    __table_args__ = (
+        # 按任务列出文档
+        db.Index('ix_documents_task_upload', 'task_id', 'upload_date', 'id'),
+        db.Index('ix_documents_blob', 'blob_sha256'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=False)
@@ -12,12 +18,15 @@ class Document(db.Model):
     file_type = db.Column(db.String(50), nullable=False)
     file_size = db.Column(db.Integer, nullable=False)  # 文件大小（字节）
     file_path = db.Column(db.String(500), nullable=False)
+    blob_sha256 = db.Column(db.String(64), db.ForeignKey('blobs.sha256'), nullable=True)  # 内容摘要
     upload_date = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
         return f'<Document {self.original_filename}>'
     
     def to_dict(self):
+        from app.utils.previews import is_previewable
+        
         return {
             'id': self.id,
             'task_id': self.task_id,
@@ -26,6 +35,8 @@ class Document(db.Model):
             'file_type': self.file_type,
             'file_size': self.file_size,
             'file_size_formatted': self.format_file_size(),
+            'sha256': self.blob_sha256,
+            'has_preview': is_previewable(self.file_type),
             'upload_date': self.upload_date.isoformat() if self.upload_date else None,
             'task_title': self.task.title if self.task else None
         }
@@ -47,62 +58,130 @@ class Document(db.Model):
     def get_document_by_id(cls, document_id):
         return cls.query.get(document_id)
     
+    @staticmethod
+    def blob_root(upload_folder):
+        """按内容寻址的文件保存目录"""
+        return os.path.join(upload_folder, 'blobs')
+    
+    @staticmethod
+    def _file_type(filename):
+        return filename.rsplit('.', 1)[1].lower() if '.' in filename else 'unknown'
+    
     @classmethod
-    def create_document(cls, task_id, file, upload_folder):
-        """
-        创建文档记录并保存文件
+    def _create_with_blob(cls, task_id, original_filename, source_path, sha256, size, upload_folder):
+        """登记blob引用并创建文档记录，source_path在成功后不再存在"""
+        from app import preview_generator
+        from app.models.blob import Blob
+        from app.models.document_text import DocumentText
         
-        Args:
-            task_id: 任务ID
-            file: Flask的文件对象
-            upload_folder: 上传文件夹路径
-        
-        Returns:
-            Document对象或None
-        """
         try:
-            # 确保上传目录存在
-            if not os.path.exists(upload_folder):
-                os.makedirs(upload_folder)
-            
-            # 生成唯一文件名
-            filename = f"{datetime.utcnow().timestamp()}_{file.filename}"
-            file_path = os.path.join(upload_folder, filename)
-            
-            # 保存文件
-            file.save(file_path)
-            
-            # 创建文档记录
+            file_path = Blob.add_reference(source_path, sha256, size, cls.blob_root(upload_folder))
             document = cls(
                 task_id=task_id,
-                filename=filename,
-                original_filename=file.filename,
-                file_type=file.filename.split('.')[-1].lower() if '.' in file.filename else 'unknown',
-                file_size=os.path.getsize(file_path),
-                file_path=file_path
+                filename=sha256,
+                original_filename=original_filename,
+                file_type=cls._file_type(original_filename),
+                file_size=size,
+                file_path=file_path,
+                blob_sha256=sha256
             )
-            
             db.session.add(document)
+            db.session.flush()
+            # 预览图和文本提取由后台任务完成，与文档记录一起提交
+            preview_generator.enqueue(sha256, file_path, document.file_type)
+            DocumentText.enqueue_extraction(sha256, file_path, document.file_type)
             db.session.commit()
-            
             return document
-            
         except Exception as e:
             db.session.rollback()
-            # 如果保存失败，删除已保存的文件
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            if os.path.exists(source_path):
+                os.remove(source_path)
             raise e
     
+    @classmethod
+    def create_document(cls, task_id, file, upload_folder):
+        """
+        创建文档记录并保存文件
+        
+        写入的同时计算SHA-256，内容相同的文件只保存一份
+        
+        Args:
+            task_id: 任务ID
+            file: Flask的文件对象
+            upload_folder: 上传文件夹路径
+        
+        Returns:
+            Document对象
+        """
+        from app.models.blob import Blob
+        
+        tmp_path, sha256, size = Blob.write_stream(file.stream, cls.blob_root(upload_folder))
+        return cls._create_with_blob(task_id, file.filename, tmp_path, sha256, size, upload_folder)
+    
+    @classmethod
+    def create_from_path(cls, task_id, original_filename, source_path, upload_folder):
+        """
+        用已写入磁盘的文件创建文档记录
+
+        用于分块上传完成时：分块可能跨多个请求和进程写入，无法保留哈希的中间状态，
+        因此在完成时顺序读取一遍计算SHA-256，随后通过重命名移入blob目录
+
+        Args:
+            task_id: 任务ID
+            original_filename: 原始文件名
+            source_path: 已接收完整内容的临时文件路径
+            upload_folder: 上传文件夹路径
+
+        Returns:
+            Document对象
+        """
+        from app.models.blob import Blob
+        
+        sha256, size = Blob.hash_file(source_path)
+        return cls._create_with_blob(task_id, original_filename, source_path, sha256, size, upload_folder)
+    
+    @classmethod
+    def release_files(cls, *criteria):
+        """
+        释放符合条件的文档占用的文件，不提交事务，也不删除文档记录
+
+        blob引用数一次性递减，旧文件和旧预览图交给delete_files后台任务删除，
+        删除大量文档时请求不必等待磁盘操作
+
+        Args:
+            criteria: 筛选文档的条件
+
+        Returns:
+            涉及的文档数
+        """
+        from app import preview_generator
+        from app.models.blob import Blob
+        from app.models.job import Job
+        
+        counts = dict(
+            db.session.query(cls.blob_sha256, func.count(cls.id))
+            .filter(*criteria, cls.blob_sha256.isnot(None))
+            .group_by(cls.blob_sha256).all()
+        )
+        Blob.release_many(counts)
+        
+        # 尚未迁移到blob存储的旧文件
+        legacy = db.session.query(cls.id, cls.file_path).filter(*criteria, cls.blob_sha256.is_(None)).all()
+        paths = []
+        for document_id, file_path in legacy:
+            paths.append(file_path)
+            paths.append(preview_generator.preview_dir(f'document-{document_id}'))
+        if paths:
+            Job.enqueue('delete_files', {'paths': paths})
+        return sum(counts.values()) + len(legacy)
+    
     @classmethod
     def delete_document(cls, document_id):
-        """删除文档记录和文件"""
+        """删除文档记录并释放文件引用，没有其他文档引用时由后台任务删除文件"""
         document = cls.get_document_by_id(document_id)
         if document:
             try:
-                # 删除物理文件
-                if os.path.exists(document.file_path):
-                    os.remove(document.file_path)
+                cls.release_files(cls.id == document_id)
                 
                 # 删除数据库记录
                 db.session.delete(document)
@@ -113,6 +192,85 @@ class Document(db.Model):
                 raise e
         return False
     
+    @classmethod
+    def migrate_to_blobs(cls, upload_folder, workers=4, batch_size=500):
+        """
+        将尚未使用blob存储的文档迁移为按内容寻址，重复内容只保留一份
+
+        文件哈希由线程池并行计算（hashlib和文件读取都会释放GIL）；登记引用时
+        先为原文件建立硬链接（不支持时复制），每批提交后再删除原文件，
+        中途失败不会丢失文件，可以重复执行
+
+        Args:
+            upload_folder: 上传文件夹路径
+            workers: 并行计算哈希的线程数
+            batch_size: 每批提交的文档数
+
+        Returns:
+            统计dict：migrated、missing、blobs（新增blob数）、bytes_saved（去重共节省的字节数）
+        """
+        import shutil
+        import uuid
+        from concurrent.futures import ThreadPoolExecutor
+        from app.models.blob import Blob
+        
+        blob_root = cls.blob_root(upload_folder)
+        tmp_dir = os.path.join(blob_root, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        
+        rows = db.session.execute(
+            db.select(cls.id, cls.file_path).where(cls.blob_sha256.is_(None)).order_by(cls.id)
+        ).all()
+        existing = [(doc_id, path) for doc_id, path in rows if os.path.isfile(path)]
+        stats = {'migrated': 0, 'missing': len(rows) - len(existing), 'blobs': 0, 'bytes_saved': 0}
+        blobs_before = db.session.query(func.count(Blob.sha256)).scalar()
+        
+        def hash_one(item):
+            return item + Blob.hash_file(item[1])
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            hashed = pool.map(hash_one, existing)
+            batch = []
+            for doc_id, path, sha256, size in hashed:
+                staged = os.path.join(tmp_dir, uuid.uuid4().hex)
+                try:
+                    os.link(path, staged)
+                except OSError:
+                    shutil.copy2(path, staged)
+                try:
+                    blob_path = Blob.add_reference(staged, sha256, size, blob_root)
+                    db.session.execute(
+                        db.update(cls).where(cls.id == doc_id)
+                        .values(blob_sha256=sha256, file_path=blob_path, file_size=size)
+                    )
+                except Exception as e:
+                    db.session.rollback()
+                    raise e
+                batch.append(path)
+                if len(batch) >= batch_size:
+                    stats['migrated'] += cls._commit_migrated(batch)
+                    batch = []
+            stats['migrated'] += cls._commit_migrated(batch)
+        
+        stats['blobs'] = db.session.query(func.count(Blob.sha256)).scalar() - blobs_before
+        stats['bytes_saved'] = db.session.query(
+            func.coalesce(func.sum(Blob.size * (Blob.ref_count - 1)), 0)
+        ).scalar()
+        return stats
+    
+    @staticmethod
+    def _commit_migrated(paths):
+        """提交一批迁移并删除已迁移的原文件"""
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        return len(paths)
+    
     @staticmethod
     def is_allowed_file(filename, allowed_extensions=None):
         """检查文件类型是否允许"""
@@ -0,0 +1,81 @@
+from app import db
+from datetime import datetime
+from sqlalchemy.dialects import sqlite
+
+class DocumentText(db.Model):
+    """
+    按内容摘要保存的文档文本
+
+    相同内容只提取一次，由 document_texts_fts 全文索引（见 app/utils/search.py），
+    搜索时通过 documents.blob_sha256 关联到具体文档和任务
+    """
+    __tablename__ = 'document_texts'
+    __table_args__ = (
+        db.UniqueConstraint('sha256', name='uq_document_texts_sha256'),
+    )
+
+    STATUS_DONE = 'done'
+    STATUS_UNSUPPORTED = 'unsupported'
+    STATUS_FAILED = 'failed'
+
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    content = db.Column(db.Text)
+    error = db.Column(db.Text)
+    extracted_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<DocumentText {self.sha256[:12]} {self.status}>'
+
+    @classmethod
+    def is_extracted(cls, sha256):
+        return db.session.query(cls.id).filter(cls.sha256 == sha256).first() is not None
+
+    @classmethod
+    def enqueue_extraction(cls, sha256, path, file_type):
+        """
+        添加提取任务，不提交事务；不支持的类型或已提取过的内容不添加
+
+        Returns:
+            Job对象或None
+        """
+        from app.models.job import Job
+        from app.utils.text_extract import is_extractable
+
+        if not is_extractable(file_type) or cls.is_extracted(sha256):
+            return None
+        return Job.enqueue('extract_text', {'sha256': sha256, 'path': path, 'file_type': file_type})
+
+    @classmethod
+    def save(cls, sha256, status, content=None, error=None):
+        """
+        保存提取结果并提交；并发提取同一内容时保留先完成的结果
+
+        Returns:
+            是否写入了新记录
+        """
+        from app.models.change_counter import ChangeCounter
+
+        try:
+            result = db.session.execute(
+                sqlite.insert(cls).values(
+                    sha256=sha256, status=status, content=content, error=error,
+                    extracted_at=datetime.utcnow()
+                ).on_conflict_do_nothing(index_elements=['sha256'])
+            )
+            if result.rowcount:
+                # 搜索结果随之变化
+                ChangeCounter.bump(['documents'])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        return result.rowcount > 0
+
+    @classmethod
+    def get_stats(cls):
+        """按状态统计已处理的内容数"""
+        return dict(
+            db.session.query(cls.status, db.func.count(cls.id)).group_by(cls.status).all()
+        )
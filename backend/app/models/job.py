@@ -0,0 +1,241 @@
+from app import db
+from datetime import datetime, timedelta
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+import json
+import random
+
+class Job(db.Model):
+    """
+    持久化的后台任务
+
+    与触发它的数据变更在同一事务中写入，提交后由工作线程（应用内或
+    `flask worker`进程）领取执行；失败按指数退避重试，超过次数后标记为failed
+    """
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        # 领取下一个可执行任务
+        db.Index('ix_jobs_status_run_at', 'status', 'run_at', 'id'),
+    )
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUSES = (STATUS_QUEUED, STATUS_RUNNING, STATUS_DONE, STATUS_FAILED)
+
+    # 重试退避：base * 2^(attempts-1) 秒，上限max，附加最多10%的随机抖动
+    BACKOFF_BASE = 5
+    BACKOFF_MAX = 3600
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')
+    status = db.Column(db.String(20), nullable=False, default=STATUS_QUEUED)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'payload': json.loads(self.payload),
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_at': self.run_at.isoformat() if self.run_at else None,
+            'locked_by': self.locked_by,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    @classmethod
+    def enqueue(cls, kind, payload=None, delay=0, max_attempts=5):
+        """
+        添加任务，不提交事务，随调用方的事务一起提交
+
+        Args:
+            kind: 任务类型，对应 app/utils/jobs.py 中注册的处理函数
+            payload: 可JSON序列化的参数
+            delay: 延迟执行的秒数
+            max_attempts: 最多执行次数
+
+        Returns:
+            Job对象
+        """
+        job = cls(
+            kind=kind,
+            payload=json.dumps(payload or {}, ensure_ascii=False),
+            status=cls.STATUS_QUEUED,
+            attempts=0,
+            max_attempts=max_attempts,
+            run_at=datetime.utcnow() + timedelta(seconds=delay)
+        )
+        db.session.add(job)
+        db.session.info['jobs_enqueued'] = True
+        return job
+
+    @classmethod
+    def claim(cls, worker_id):
+        """
+        领取一个到期的任务并标记为running
+
+        单条 UPDATE ... RETURNING 语句完成选择和加锁，多个工作线程/进程不会领取到同一任务
+
+        Returns:
+            (id, kind, payload dict, attempts, max_attempts) 或 None
+        """
+        now = datetime.utcnow()
+        next_job = db.select(cls.id).where(
+            cls.status == cls.STATUS_QUEUED, cls.run_at <= now
+        ).order_by(cls.run_at, cls.id).limit(1).scalar_subquery()
+        try:
+            row = db.session.execute(
+                db.update(cls)
+                .where(cls.id == next_job, cls.status == cls.STATUS_QUEUED)
+                .values(status=cls.STATUS_RUNNING, locked_by=worker_id, locked_at=now,
+                        attempts=cls.attempts + 1)
+                .returning(cls.id, cls.kind, cls.payload, cls.attempts, cls.max_attempts)
+                .execution_options(synchronize_session=False)
+            ).first()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        if row is None:
+            return None
+        return row.id, row.kind, json.loads(row.payload), row.attempts, row.max_attempts
+
+    @classmethod
+    def _finish(cls, job_id, values):
+        try:
+            db.session.execute(
+                db.update(cls).where(cls.id == job_id).values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+
+    @classmethod
+    def complete(cls, job_id):
+        cls._finish(job_id, {
+            'status': cls.STATUS_DONE, 'locked_by': None, 'locked_at': None,
+            'last_error': None, 'finished_at': datetime.utcnow()
+        })
+
+    @classmethod
+    def fail(cls, job_id, attempts, max_attempts, error):
+        """记录失败；未超过最多执行次数时按指数退避重新排队"""
+        now = datetime.utcnow()
+        if attempts >= max_attempts:
+            cls._finish(job_id, {
+                'status': cls.STATUS_FAILED, 'locked_by': None, 'locked_at': None,
+                'last_error': error, 'finished_at': now
+            })
+            return
+        delay = min(cls.BACKOFF_BASE * 2 ** (attempts - 1), cls.BACKOFF_MAX)
+        delay += random.uniform(0, delay * 0.1)
+        cls._finish(job_id, {
+            'status': cls.STATUS_QUEUED, 'locked_by': None, 'locked_at': None,
+            'last_error': error, 'run_at': now + timedelta(seconds=delay)
+        })
+
+    @classmethod
+    def requeue_stale(cls, timeout):
+        """
+        回收运行超过timeout秒仍未结束的任务（工作进程已退出）
+
+        还有剩余执行次数的重新排队；已用完的标记为failed，避免每次都导致
+        工作进程崩溃的任务无限循环
+
+        Returns:
+            (重新排队的数量, 标记为失败的数量)
+        """
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=timeout)
+        stale = (cls.status == cls.STATUS_RUNNING, cls.locked_at < cutoff)
+        try:
+            requeued = db.session.execute(
+                db.update(cls)
+                .where(*stale, cls.attempts < cls.max_attempts)
+                .values(status=cls.STATUS_QUEUED, locked_by=None, locked_at=None)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            failed = db.session.execute(
+                db.update(cls)
+                .where(*stale)
+                .values(status=cls.STATUS_FAILED, locked_by=None, locked_at=None,
+                        last_error='worker lost: 执行超时或工作进程已退出', finished_at=now)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        return requeued, failed
+
+    @classmethod
+    def get_job_by_id(cls, job_id):
+        return cls.query.get(job_id)
+
+    @classmethod
+    def get_jobs(cls, status=None, kind=None, limit=50):
+        """按创建时间倒序列出任务"""
+        query = cls.query
+        if status:
+            query = query.filter(cls.status == status)
+        if kind:
+            query = query.filter(cls.kind == kind)
+        return query.order_by(cls.id.desc()).limit(limit).all()
+
+    @classmethod
+    def get_stats(cls):
+        """按状态统计任务数量"""
+        counts = dict(
+            db.session.query(cls.status, func.count(cls.id)).group_by(cls.status).all()
+        )
+        return {status: counts.get(status, 0) for status in cls.STATUSES}
+
+    @classmethod
+    def purge_finished(cls, older_than_days=7):
+        """删除已完成超过指定天数的任务记录"""
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        try:
+            count = db.session.execute(
+                db.delete(cls).where(cls.status == cls.STATUS_DONE, cls.finished_at < cutoff)
+            ).rowcount
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        return count
+
+# 提交了新任务的事务结束后通知本进程的工作线程立即领取
+_enqueue_listeners = []
+
+def on_enqueue(callback):
+    if callback not in _enqueue_listeners:
+        _enqueue_listeners.append(callback)
+    return callback
+
+@event.listens_for(Session, 'after_commit')
+def _notify_enqueued(session):
+    if session.info.pop('jobs_enqueued', False):
+        for callback in _enqueue_listeners:
+            callback()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_enqueued(session):
+    session.info.pop('jobs_enqueued', None)
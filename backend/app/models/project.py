@@ -1,8 +1,15 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import func, case
+
+# 任务状态列表，用于分状态统计
+TASK_STATUSES = ('todo', 'in_progress', 'done')
 
 class Project(db.Model):
     __tablename__ = 'projects'
+    __table_args__ = (
+        db.Index('ix_projects_created', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -18,7 +25,21 @@ class Project(db.Model):
     def __repr__(self):
         return f'<Project {self.name}>'
     
-    def to_dict(self):
+    def to_dict(self, task_stats=None, total_time=None):
+        """
+        序列化项目
+        
+        Args:
+            task_stats: 预先统计好的任务数量，为None时单独查询本项目的统计
+            total_time: 预先读取的项目总耗时（分钟），为None时读取耗时汇总
+        """
+        from app.models.time_rollup import TimeRollup
+        
+        if task_stats is None:
+            task_stats = self.get_task_stats(self.id)
+        if total_time is None:
+            total_time = TimeRollup.get_project_total(self.id)
+        
         return {
             'id': self.id,
             'name': self.name,
@@ -27,7 +48,154 @@ class Project(db.Model):
             'end_date': self.end_date.isoformat() if self.end_date else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'task_count': len(self.tasks)
+            'task_count': task_stats['total'],
+            'task_stats': {status: task_stats[status] for status in TASK_STATUSES},
+            'total_time': total_time
+        }
+    
+    @staticmethod
+    def _task_stats_query():
+        """按项目分组统计任务总数及各状态数量"""
+        from app.models.task import Task
+        
+        columns = [
+            Task.project_id.label('project_id'),
+            func.count(Task.id).label('total')
+        ]
+        for status in TASK_STATUSES:
+            columns.append(
+                func.sum(case((Task.status == status, 1), else_=0)).label(status)
+            )
+        return db.session.query(*columns).group_by(Task.project_id)
+    
+    @staticmethod
+    def _stats_from_row(row):
+        return {
+            'total': row.total or 0,
+            **{status: getattr(row, status) or 0 for status in TASK_STATUSES}
+        }
+    
+    @classmethod
+    def get_task_stats(cls, project_id):
+        """获取单个项目的任务统计"""
+        from app.models.task import Task
+        
+        row = cls._task_stats_query().filter(Task.project_id == project_id).first()
+        if row is None:
+            return {'total': 0, **{status: 0 for status in TASK_STATUSES}}
+        return cls._stats_from_row(row)
+    
+    @classmethod
+    def get_task_stats_map(cls, project_ids):
+        """一次分组查询获取多个项目的任务统计，返回 {project_id: task_stats}"""
+        from app.models.task import Task
+        
+        empty = {'total': 0, **{status: 0 for status in TASK_STATUSES}}
+        stats_map = {project_id: dict(empty) for project_id in project_ids}
+        if project_ids:
+            rows = cls._task_stats_query().filter(Task.project_id.in_(project_ids)).all()
+            for row in rows:
+                stats_map[row.project_id] = cls._stats_from_row(row)
+        return stats_map
+    
+    @classmethod
+    def get_date_stats(cls, today, project_id=None):
+        """
+        按结束日期统计进行中（未到结束日期）和已结束的项目数量
+
+        Returns:
+            {'total', 'active', 'completed'}
+        """
+        query = db.session.query(
+            func.count(cls.id),
+            func.sum(case((cls.end_date < today, 1), else_=0))
+        )
+        if project_id is not None:
+            query = query.filter(cls.id == project_id)
+        total, completed = query.one()
+        completed = completed or 0
+        return {'total': total, 'active': total - completed, 'completed': completed}
+
+    @classmethod
+    def get_all_projects_with_stats(cls):
+        """
+        获取所有项目及其任务统计、总耗时
+        
+        通过一次分组子查询关联统计数据，查询次数与项目、任务数量无关
+        
+        Returns:
+            [(Project, task_stats, total_time), ...]
+        """
+        from app.models.time_rollup import TimeRollup
+        
+        stats = cls._task_stats_query().subquery()
+        rows = db.session.query(cls, stats, TimeRollup.total_minutes) \
+            .outerjoin(stats, stats.c.project_id == cls.id) \
+            .outerjoin(TimeRollup, db.and_(
+                TimeRollup.scope == TimeRollup.SCOPE_PROJECT,
+                TimeRollup.scope_id == cls.id
+            )) \
+            .order_by(cls.created_at.desc()) \
+            .all()
+        return [(row[0], cls._stats_from_row(row), row.total_minutes or 0) for row in rows]
+    
+    @classmethod
+    def get_gantt_data(cls, project):
+        """
+        生成甘特图所需的列式数据及关键路径
+
+        只读取所需列，不构造ORM对象；时间均为秒级UTC时间戳
+
+        Args:
+            project: 项目对象
+
+        Returns:
+            dict，tasks为列式数据（各列按任务ID排序一一对应），schedule为关键路径计算结果
+        """
+        from calendar import timegm
+        from app.models.task import Task
+        from app.utils.scheduling import compute_schedule
+
+        rows = db.session.execute(
+            db.select(
+                Task.id, Task.title, Task.status, Task.priority,
+                Task.start_time, Task.end_time, Task.depends_on
+            ).where(Task.project_id == project.id).order_by(Task.id)
+        ).all()
+
+        ids, titles, statuses, priorities, starts, ends, depends_on = (
+            [list(column) for column in zip(*rows)] if rows else [[] for _ in range(7)]
+        )
+        starts = [timegm(value.timetuple()) if value else None for value in starts]
+        ends = [timegm(value.timetuple()) if value else None for value in ends]
+        project_start = timegm(project.start_date.timetuple())
+
+        schedule = compute_schedule(ids, starts, ends, depends_on, default_start=project_start)
+        return {
+            'project_id': project.id,
+            'project_start': project_start,
+            'project_end': timegm(project.end_date.timetuple()),
+            'count': len(ids),
+            'tasks': {
+                'id': ids,
+                'title': titles,
+                'status': statuses,
+                'priority': priorities,
+                'start': starts,
+                'end': ends,
+                'depends_on': depends_on
+            },
+            'schedule': {
+                'earliest_start': schedule['earliest_start'],
+                'earliest_finish': schedule['earliest_finish'],
+                'latest_start': schedule['latest_start'],
+                'latest_finish': schedule['latest_finish'],
+                'slack': schedule['slack'],
+                'critical': schedule['critical']
+            },
+            'critical_path': schedule['critical_path'],
+            'finish': schedule['finish'],
+            'cycle': schedule['cycle']
         }
     
     @classmethod
@@ -57,9 +225,60 @@ class Project(db.Model):
     
     @classmethod
     def delete_project(cls, project_id):
+        """
+        删除项目及其任务、时间日志和文档
+
+        在一个事务中用批量SQL删除全部记录，不逐条加载到会话中；文档占用的
+        文件由后台任务清理，大项目的删除请求不必等待磁盘操作
+        """
+        from app.models.change_counter import ChangeCounter
+        from app.models.change_event import ChangeEvent
+        from app.models.document import Document
+        from app.models.task import Task
+        from app.models.time_log import TimeLog
+        from app.models.time_rollup import TimeRollup
+        from app.models.time_daily_rollup import TimeDailyRollup
+        
         project = cls.get_project_by_id(project_id)
         if project:
-            db.session.delete(project)
-            db.session.commit()
+            try:
+                task_ids = db.select(Task.id).where(Task.project_id == project_id).scalar_subquery()
+                Document.release_files(Document.task_id.in_(task_ids))
+                TimeRollup.remove_project(project_id)
+                TimeDailyRollup.remove_project(project_id)
+                
+                # 其他项目中依赖本项目任务的任务解除依赖
+                dependent_projects = db.session.execute(
+                    db.select(Task.project_id).distinct()
+                    .where(Task.depends_on.in_(task_ids), Task.project_id != project_id)
+                ).scalars().all()
+                db.session.execute(
+                    db.update(Task).where(Task.depends_on.in_(task_ids)).values(depends_on=None)
+                    .execution_options(synchronize_session=False)
+                )
+                for model in (Document, TimeLog):
+                    db.session.execute(
+                        db.delete(model).where(model.task_id.in_(task_ids))
+                        .execution_options(synchronize_session=False)
+                    )
+                db.session.execute(
+                    db.delete(Task).where(Task.project_id == project_id)
+                    .execution_options(synchronize_session=False)
+                )
+                db.session.execute(
+                    db.delete(cls).where(cls.id == project_id)
+                    .execution_options(synchronize_session=False)
+                )
+                # 批量删除不经过after_flush，手动递增版本号
+                ChangeCounter.bump(
+                    ['projects', 'tasks', 'time_logs', 'documents', ChangeCounter.project_scope(project_id)]
+                    + [ChangeCounter.project_scope(pid) for pid in dependent_projects]
+                )
+                # 任务、时间日志等随项目删除，只推送项目删除事件
+                ChangeEvent.record([ChangeEvent.make(ChangeEvent.TYPE_PROJECT, 'deleted', project_id, project_id)])
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                raise e
             return True
         return False
\ No newline at end of file
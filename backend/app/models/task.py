@@ -1,8 +1,31 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import func, update, tuple_, select, literal
+
+# 看板列内相邻任务的位置间隔，插入时取前后任务位置的中间值，无需重排整列
+POSITION_GAP = 1024.0
+
+# 依赖链遍历的最大深度，防止历史数据中的循环依赖导致无限递归
+MAX_DEPENDENCY_DEPTH = 10000
 
 class Task(db.Model):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        # 看板按项目+状态筛选、按创建时间分页
+        db.Index('ix_tasks_project_status_created', 'project_id', 'status', 'created_at', 'id'),
+        # 按项目筛选
+        db.Index('ix_tasks_project_created', 'project_id', 'created_at', 'id'),
+        # 跨项目按状态筛选
+        db.Index('ix_tasks_status_created', 'status', 'created_at', 'id'),
+        # 全部任务列表
+        db.Index('ix_tasks_created', 'created_at', 'id'),
+        # 看板列内排序
+        db.Index('ix_tasks_project_status_position', 'project_id', 'status', 'position'),
+        # 查找依赖某任务的下游任务
+        db.Index('ix_tasks_depends_on', 'depends_on'),
+        # 仪表盘统计，覆盖索引，只扫描索引即可分组计数
+        db.Index('ix_tasks_project_summary', 'project_id', 'status', 'priority', 'assignee', 'end_time'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
@@ -14,6 +37,7 @@ class Task(db.Model):
     end_time = db.Column(db.DateTime)
     depends_on = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=True)
     priority = db.Column(db.String(10), default='medium', nullable=False)  # low, medium, high
+    position = db.Column(db.Float, default=0, nullable=False)  # 看板列内排序位置
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -26,7 +50,21 @@ class Task(db.Model):
     def __repr__(self):
         return f'<Task {self.title}>'
     
-    def to_dict(self):
+    def to_dict(self, related=None):
+        """
+        序列化任务
+        
+        Args:
+            related: 预先查询好的关联数据（project_name、time_logs_count、
+                documents_count），为None时通过关系属性加载
+        """
+        if related is None:
+            related = {
+                'project_name': self.project.name if self.project else None,
+                'time_logs_count': len(self.time_logs),
+                'documents_count': len(self.documents)
+            }
+        
         return {
             'id': self.id,
             'project_id': self.project_id,
@@ -38,16 +76,80 @@ class Task(db.Model):
             'end_time': self.end_time.isoformat() if self.end_time else None,
             'depends_on': self.depends_on,
             'priority': self.priority,
+            'position': self.position,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'project_name': self.project.name if self.project else None,
-            'time_logs_count': len(self.time_logs),
-            'documents_count': len(self.documents)
+            'project_name': related['project_name'],
+            'time_logs_count': related['time_logs_count'],
+            'documents_count': related['documents_count']
         }
     
+    @classmethod
+    def query_tasks(cls, project_id=None, status=None):
+        """
+        构建任务列表查询
+
+        按项目筛选时是看板的列视图，按（状态、列内位置、ID）排序，由
+        ix_tasks_project_status_position完成；其余按创建时间倒序。
+        游标分页时统一改为按创建时间排序（见keyset_paginate）
+        """
+        query = cls.query
+        if status:
+            query = query.filter_by(status=status)
+        if project_id:
+            return query.filter_by(project_id=project_id).order_by(cls.status, cls.position, cls.id)
+        return query.order_by(cls.created_at.desc(), cls.id.desc())
+    
+    @classmethod
+    def with_related(cls, query):
+        """
+        为任务查询附加项目名称及时间日志、文档数量
+        
+        项目名称通过关联查询获取，数量通过按任务ID关联的计数子查询获取，
+        整个列表只需一次查询，避免逐条懒加载；分页时只统计当前页的任务
+        """
+        from app.models.project import Project
+        from app.models.time_log import TimeLog
+        from app.models.document import Document
+        
+        log_count = db.select(func.count(TimeLog.id)) \
+            .where(TimeLog.task_id == cls.id) \
+            .correlate(cls) \
+            .scalar_subquery()
+        
+        document_count = db.select(func.count(Document.id)) \
+            .where(Document.task_id == cls.id) \
+            .correlate(cls) \
+            .scalar_subquery()
+        
+        return query \
+            .outerjoin(Project, Project.id == cls.project_id) \
+            .add_columns(
+                Project.name.label('project_name'),
+                log_count.label('time_logs_count'),
+                document_count.label('documents_count')
+            )
+    
+    @staticmethod
+    def serialize_rows(rows):
+        """序列化with_related()查询返回的结果行"""
+        return [
+            row[0].to_dict(related={
+                'project_name': row.project_name,
+                'time_logs_count': row.time_logs_count,
+                'documents_count': row.documents_count
+            })
+            for row in rows
+        ]
+    
+    @classmethod
+    def serialize_query(cls, query):
+        """以固定查询次数序列化任务查询结果"""
+        return cls.serialize_rows(cls.with_related(query).all())
+    
     @classmethod
     def get_tasks_by_project(cls, project_id):
-        return cls.query.filter_by(project_id=project_id).order_by(cls.created_at.desc()).all()
+        return cls.query_tasks(project_id=project_id).all()
     
     @classmethod
     def get_task_by_id(cls, task_id):
@@ -55,34 +157,140 @@ class Task(db.Model):
     
     @classmethod
     def get_tasks_by_status(cls, status, project_id=None):
-        query = cls.query.filter_by(status=status)
-        if project_id:
-            query = query.filter_by(project_id=project_id)
-        return query.order_by(cls.created_at.desc()).all()
+        return cls.query_tasks(project_id=project_id, status=status).all()
+    
+    @classmethod
+    def would_create_cycle(cls, task_id, depends_on):
+        """
+        判断让task_id依赖depends_on是否会形成循环
+
+        只需检查task_id是否在depends_on的上游链上，一条递归查询完成
+        """
+        if task_id == depends_on:
+            return True
+        tasks = cls.__table__
+        chain = select(literal(depends_on).label('id')).cte('dependency_chain', recursive=True)
+        chain = chain.union(
+            select(tasks.c.depends_on).where(
+                tasks.c.id == chain.c.id,
+                tasks.c.depends_on.isnot(None)
+            )
+        )
+        return db.session.execute(
+            select(chain.c.id).where(chain.c.id == task_id).limit(1)
+        ).first() is not None
+    
+    @classmethod
+    def validate_dependency(cls, task_id, depends_on):
+        """
+        校验依赖关系，无效时抛出ValueError
+
+        Args:
+            task_id: 任务ID，新建任务时为None
+            depends_on: 所依赖的任务ID，None表示清除依赖
+        """
+        if depends_on is None:
+            return
+        if db.session.get(cls, depends_on) is None:
+            raise ValueError(f'依赖的任务ID {depends_on} 不存在')
+        if task_id is not None and cls.would_create_cycle(task_id, depends_on):
+            raise ValueError(f'任务{task_id}依赖任务{depends_on}会形成循环依赖')
+    
+    @classmethod
+    def get_dependency_chain(cls, task_id, direction='up', max_depth=None):
+        """
+        用一条WITH RECURSIVE查询获取全部上游或下游任务
+
+        Args:
+            task_id: 起始任务ID
+            direction: 'up' 所依赖的任务，'down' 依赖本任务的任务
+            max_depth: 最大遍历层数，None表示不限（受MAX_DEPENDENCY_DEPTH限制）
+
+        Returns:
+            任务行列表（含depth层数列），按层数和ID排序，不包含起始任务
+        """
+        tasks = cls.__table__
+        max_depth = min(max_depth or MAX_DEPENDENCY_DEPTH, MAX_DEPENDENCY_DEPTH)
+        
+        walk = select(
+            tasks.c.id, tasks.c.depends_on, literal(0).label('depth')
+        ).where(tasks.c.id == task_id).cte('dependency_walk', recursive=True)
+        if direction == 'up':
+            join_condition = tasks.c.id == walk.c.depends_on
+        else:
+            join_condition = tasks.c.depends_on == walk.c.id
+        walk = walk.union_all(
+            select(tasks.c.id, tasks.c.depends_on, walk.c.depth + 1)
+            .where(join_condition, walk.c.depth < max_depth)
+        )
+        
+        # 同一任务可能经由循环重复出现，取最小层数
+        reached = select(walk.c.id, func.min(walk.c.depth).label('depth')) \
+            .where(walk.c.depth > 0, walk.c.id != task_id).group_by(walk.c.id).subquery()
+        rows = db.session.execute(
+            select(
+                tasks.c.id, tasks.c.project_id, tasks.c.title, tasks.c.status,
+                tasks.c.priority, tasks.c.assignee, tasks.c.depends_on, reached.c.depth
+            ).join(reached, reached.c.id == tasks.c.id)
+            .order_by(reached.c.depth, tasks.c.id)
+        ).all()
+        return rows
     
     @classmethod
     def create_task(cls, data):
+        cls.validate_dependency(None, data.get('depends_on'))
         task = cls(**data)
+        if task.position is None:
+            task.position = cls.next_position(task.project_id, task.status or 'todo')
         db.session.add(task)
         db.session.commit()
         return task
     
     @classmethod
     def update_task(cls, task_id, data):
+        from app.models.time_daily_rollup import TimeDailyRollup
+        
         task = cls.get_task_by_id(task_id)
         if task:
+            if 'depends_on' in data and data['depends_on'] != task.depends_on:
+                cls.validate_dependency(task.id, data['depends_on'])
+            owner = (task.project_id, task.assignee)
+            column = (task.project_id, task.status)
             for key, value in data.items():
                 if hasattr(task, key):
                     setattr(task, key, value)
-            db.session.commit()
+            # 换到其他看板列时与update_task_status一样放到列末尾，除非指定了位置
+            if (task.project_id, task.status) != column and 'position' not in data:
+                with db.session.no_autoflush:
+                    task.position = cls.next_position(task.project_id, task.status)
+            try:
+                # 按日汇总记录任务当前的项目和负责人
+                if (task.project_id, task.assignee) != owner:
+                    TimeDailyRollup.reassign_task(task.id, task.project_id, task.assignee)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                raise e
         return task
     
     @classmethod
     def delete_task(cls, task_id):
+        from app.models.document import Document
+        from app.models.time_rollup import TimeRollup
+        from app.models.time_daily_rollup import TimeDailyRollup
+        
         task = cls.get_task_by_id(task_id)
         if task:
-            db.session.delete(task)
-            db.session.commit()
+            try:
+                # 文档记录随任务级联删除，先释放其占用的文件
+                Document.release_files(Document.task_id == task.id)
+                TimeRollup.remove_task(task.id, task.project_id)
+                TimeDailyRollup.remove_task(task.id)
+                db.session.delete(task)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                raise e
             return True
         return False
     
@@ -90,18 +298,149 @@ class Task(db.Model):
     def update_task_status(cls, task_id, new_status):
         task = cls.get_task_by_id(task_id)
         if task:
+            if task.status != new_status:
+                task.position = cls.next_position(task.project_id, new_status)
             task.status = new_status
             db.session.commit()
             return task
         return None
     
+    @classmethod
+    def summary_query(cls, project_id=None, now=None):
+        """按（项目、状态、优先级、负责人）分组计数及逾期数量的查询，由覆盖索引完成"""
+        now = now or datetime.utcnow()
+        overdue = db.case((db.and_(cls.status != 'done', cls.end_time < now), 1), else_=0)
+        # 同时按项目分组，与索引顺序一致，可以流式分组而不需要临时排序
+        query = db.select(
+            cls.status, cls.priority, cls.assignee, func.count(), func.sum(overdue)
+        ).group_by(cls.project_id, cls.status, cls.priority, cls.assignee)
+        if project_id is not None:
+            query = query.where(cls.project_id == project_id)
+        return query
+
+    @classmethod
+    def get_summary(cls, project_id=None, now=None):
+        """
+        统计任务数量：按状态、优先级、负责人及逾期（截止时间已过且未完成）
+
+        只执行一次分组查询（见summary_query），不加载任务；各项统计在Python中
+        由分组结果合并
+
+        Args:
+            project_id: 只统计该项目
+            now: 判断逾期的当前时间（UTC），默认为现在
+
+        Returns:
+            {'total', 'overdue', 'by_status', 'by_priority', 'by_assignee'}
+        """
+        from app.models.project import TASK_STATUSES
+
+        summary = {
+            'total': 0,
+            'overdue': 0,
+            'by_status': {status: 0 for status in TASK_STATUSES},
+            'by_priority': {priority: 0 for priority in ('low', 'medium', 'high')}
+        }
+        assignees = {}
+        rows = db.session.execute(cls.summary_query(project_id, now))
+        for status, priority, assignee, count, overdue_count in rows:
+            summary['total'] += count
+            summary['overdue'] += overdue_count
+            summary['by_status'][status] = summary['by_status'].get(status, 0) + count
+            summary['by_priority'][priority] = summary['by_priority'].get(priority, 0) + count
+            # 未分配负责人的任务以None表示
+            stats = assignees.setdefault(assignee or None, {'total': 0, 'done': 0, 'overdue': 0})
+            stats['total'] += count
+            stats['overdue'] += overdue_count
+            if status == 'done':
+                stats['done'] += count
+
+        summary['by_assignee'] = [
+            {'assignee': assignee, **stats}
+            for assignee, stats in sorted(assignees.items(), key=lambda item: (-item[1]['total'], item[0] or ''))
+        ]
+        return summary
+
+    @classmethod
+    def next_position(cls, project_id, status):
+        """看板列末尾的下一个位置"""
+        max_position = db.session.query(func.max(cls.position)) \
+            .filter(cls.project_id == project_id, cls.status == status) \
+            .scalar()
+        return (max_position or 0) + POSITION_GAP
+    
+    @classmethod
+    def move_tasks(cls, moves):
+        """
+        批量移动看板任务，在一个事务中用一条批量UPDATE完成
+        
+        Args:
+            moves: [{'task_id': 任务ID, 'status': 目标状态, 'position': 目标位置}, ...]，
+                position为None时放到目标列末尾（按moves中的顺序依次追加）
+        
+        Returns:
+            (更新的任务ID列表, 不存在的任务ID列表)，有不存在的任务时不做任何修改
+        """
+        from app.models.change_counter import ChangeCounter
+        from app.models.change_event import ChangeEvent
+        
+        task_ids = [move['task_id'] for move in moves]
+        project_ids = dict(
+            db.session.query(cls.id, cls.project_id).filter(cls.id.in_(task_ids)).all()
+        )
+        missing = [task_id for task_id in task_ids if task_id not in project_ids]
+        if missing:
+            return [], missing
+        
+        # 需要追加到列末尾的任务，一次分组查询取得各目标列当前的最大位置
+        columns = {
+            (project_ids[move['task_id']], move['status'])
+            for move in moves if move.get('position') is None
+        }
+        column_ends = {}
+        if columns:
+            rows = db.session.query(cls.project_id, cls.status, func.max(cls.position)) \
+                .filter(tuple_(cls.project_id, cls.status).in_(list(columns))) \
+                .group_by(cls.project_id, cls.status) \
+                .all()
+            column_ends = {(project_id, status): end for project_id, status, end in rows}
+        
+        now = datetime.utcnow()
+        updates = {}
+        for move in moves:
+            position = move.get('position')
+            if position is None:
+                column = (project_ids[move['task_id']], move['status'])
+                position = (column_ends.get(column) or 0) + POSITION_GAP
+                column_ends[column] = position
+            updates[move['task_id']] = {
+                'id': move['task_id'],
+                'status': move['status'],
+                'position': float(position),
+                'updated_at': now
+            }
+        
+        try:
+            db.session.execute(update(cls), list(updates.values()))
+            # 批量UPDATE不经过flush，需要手动递增变更计数
+            ChangeCounter.bump(
+                ['tasks'] + [ChangeCounter.project_scope(project_ids[task_id]) for task_id in updates]
+            )
+            ChangeEvent.record([
+                ChangeEvent.make(ChangeEvent.TYPE_TASK, 'updated', task_id, project_ids[task_id],
+                                 fields=['position', 'status'])
+                for task_id in updates
+            ])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        return list(updates), []
+    
     def get_total_time(self):
         """获取任务总耗时（分钟）"""
-        total_minutes = 0
-        for log in self.time_logs:
-            if log.duration:
-                total_minutes += log.duration
-        return total_minutes
+        from app.models.time_rollup import TimeRollup
+        return TimeRollup.get_task_total(self.id)
     
     def is_timer_running(self):
         """检查任务计时器是否正在运行"""
@@ -0,0 +1,255 @@
+from app import db
+from app.utils.upsert import upsert_increment
+from datetime import datetime, date, time, timedelta, timezone
+from flask import current_app
+from zoneinfo import ZoneInfo
+
+class TimeDailyRollup(db.Model):
+    """
+    按日汇总的耗时，用于耗时报表
+
+    每个任务每天一行，以（日期、项目、负责人、任务）为主键，项目和负责人取任务当前的值；随时间日志的停止、
+    修改、删除在同一事务中增量更新，跨越午夜的计时按时长比例拆分到各天。
+    日期按TIME_REPORT_TIMEZONE划分，修改该配置后需执行`flask rebuild-time-rollups`
+    """
+    __tablename__ = 'time_daily_rollups'
+    __table_args__ = (
+        # 报表按分组列+日期聚合的覆盖索引，包含耗时列，不必回表
+        db.Index('ix_time_daily_rollups_project_day', 'project_id', 'day', 'minutes'),
+        db.Index('ix_time_daily_rollups_assignee_day', 'assignee', 'day', 'minutes'),
+        db.Index('ix_time_daily_rollups_task_day', 'task_id', 'day', 'minutes'),
+        # 按主键聚簇存储，不另建rowid
+        {'sqlite_with_rowid': False},
+    )
+
+    GROUP_BY = ('project', 'assignee', 'priority', 'task')
+    INTERVALS = ('day', 'week', 'total')
+
+    # 主键列顺序即存储顺序：同一天内同一项目、负责人的行相邻
+    day = db.Column(db.Date, primary_key=True)
+    project_id = db.Column(db.Integer, primary_key=True)
+    assignee = db.Column(db.String(100), primary_key=True, default='')  # 未分配为空字符串
+    task_id = db.Column(db.Integer, primary_key=True)
+    minutes = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<TimeDailyRollup {self.day} task:{self.task_id} {self.minutes}>'
+
+    @staticmethod
+    def report_timezone():
+        return ZoneInfo(current_app.config['TIME_REPORT_TIMEZONE'])
+
+    @staticmethod
+    def split_by_day(start_time, end_time, minutes, tz):
+        """
+        将一段计时的耗时按日拆分
+
+        Args:
+            start_time: 开始时间（不带时区的UTC时间）
+            end_time: 结束时间，为None时全部计入开始当天
+            minutes: 计入的总分钟数
+            tz: 划分日期使用的时区
+
+        Returns:
+            {日期: 分钟}，各天之和等于minutes
+        """
+        if not minutes or not start_time:
+            return {}
+        start = start_time.replace(tzinfo=timezone.utc)
+        day = start.astimezone(tz).date()
+        if not end_time or end_time <= start_time:
+            return {day: minutes}
+
+        end = end_time.replace(tzinfo=timezone.utc)
+        total_seconds = (end - start).total_seconds()
+        result = {}
+        allocated = 0
+        while True:
+            midnight = datetime.combine(day + timedelta(days=1), time(), tzinfo=tz)
+            boundary = min(midnight, end)
+            # 按累计比例取整，舍入误差不会在各天之间累积
+            cumulative = round(minutes * (boundary - start).total_seconds() / total_seconds)
+            if cumulative != allocated:
+                result[day] = cumulative - allocated
+                allocated = cumulative
+            if boundary >= end:
+                return result
+            day += timedelta(days=1)
+
+    @classmethod
+    def apply_log(cls, task, start_time, end_time, minutes, sign=1):
+        """
+        按日累加一条时间日志的耗时，不提交事务
+
+        Args:
+            task: 日志所属任务
+            start_time: 日志开始时间
+            end_time: 日志结束时间
+            minutes: 日志计入的分钟数
+            sign: 1为计入，-1为扣除（日志修改前的值）
+        """
+        for day, day_minutes in cls.split_by_day(start_time, end_time, minutes, cls.report_timezone()).items():
+            upsert_increment(
+                cls,
+                keys={
+                    'day': day, 'task_id': task.id,
+                    'project_id': task.project_id, 'assignee': task.assignee or ''
+                },
+                increments={'minutes': sign * day_minutes}
+            )
+
+    @classmethod
+    def reassign_task(cls, task_id, project_id, assignee):
+        """任务更换项目或负责人后同步其全部汇总行，不提交事务"""
+        db.session.execute(
+            db.update(cls).where(cls.task_id == task_id)
+            .values(project_id=project_id, assignee=assignee or '')
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    def remove_task(cls, task_id):
+        """任务删除时移除其汇总，不提交事务"""
+        db.session.execute(
+            db.delete(cls).where(cls.task_id == task_id)
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    def remove_project(cls, project_id):
+        """项目删除时移除其全部任务的汇总，不提交事务"""
+        db.session.execute(
+            db.delete(cls).where(cls.project_id == project_id)
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    def rebuild(cls, batch_size=5000):
+        """
+        根据全部时间日志重新计算按日汇总
+
+        Returns:
+            重新生成的汇总行数
+        """
+        from app.models.task import Task
+        from app.models.time_log import TimeLog
+        from app.models.change_counter import ChangeCounter
+
+        tz = cls.report_timezone()
+        totals = {}
+        rows = db.session.execute(
+            db.select(
+                TimeLog.task_id, Task.project_id, Task.assignee, TimeLog.duration,
+                TimeLog.start_time, TimeLog.end_time
+            ).join(Task, Task.id == TimeLog.task_id)
+            .execution_options(yield_per=batch_size)
+        )
+        for task_id, project_id, assignee, duration, start_time, end_time in rows:
+            minutes = TimeLog.minutes_for(duration, start_time, end_time)
+            for day, day_minutes in cls.split_by_day(start_time, end_time, minutes, tz).items():
+                key = (day, task_id, project_id, assignee or '')
+                totals[key] = totals.get(key, 0) + day_minutes
+
+        records = [
+            {'day': day, 'task_id': task_id, 'project_id': project_id, 'assignee': assignee, 'minutes': minutes}
+            for (day, task_id, project_id, assignee), minutes in totals.items()
+            if minutes
+        ]
+
+        try:
+            db.session.execute(db.delete(cls))
+            for start in range(0, len(records), batch_size):
+                db.session.execute(cls.__table__.insert(), records[start:start + batch_size])
+            ChangeCounter.bump(['time_logs'])
+            db.session.commit()
+            # 更新统计信息，查询规划器据此对报表使用覆盖索引的跳跃扫描
+            db.session.execute(db.text(f'ANALYZE {cls.__tablename__}'))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        return len(records)
+
+    @classmethod
+    def total_minutes(cls, start_date, end_date, project_id=None):
+        """日期范围（含两端）内的耗时合计（分钟）"""
+        query = db.select(db.func.sum(cls.minutes)).where(cls.day >= start_date, cls.day <= end_date)
+        if project_id is not None:
+            query = query.where(cls.project_id == project_id)
+        return db.session.execute(query).scalar() or 0
+
+    @classmethod
+    def report(cls, start_date, end_date, group_by='project', interval='day',
+               project_id=None, assignee=None):
+        """
+        按日期范围汇总耗时
+
+        Args:
+            start_date: 起始日期（含）
+            end_date: 结束日期（含）
+            group_by: project、assignee、priority或task
+            interval: day、week（以周一的日期表示）或total（整个范围合计）
+            project_id: 只统计该项目
+            assignee: 只统计该负责人
+
+        Returns:
+            [{'period', 'key', 'label', 'minutes'}, ...]，按时段和分组排序
+        """
+        from app.models.project import Project
+        from app.models.task import Task
+
+        if group_by == 'priority':
+            group = Task.priority
+        else:
+            group = getattr(cls, {'project': 'project_id', 'assignee': 'assignee', 'task': 'task_id'}[group_by])
+
+        # 按（分组、日期）聚合，可以按覆盖索引的顺序流式完成，不需要临时排序；
+        # 按周汇总在Python中合并，避免对date()表达式分组
+        columns = [group] if interval == 'total' else [group, cls.day]
+        query = db.select(*columns, db.func.sum(cls.minutes)) \
+            .where(cls.day >= start_date, cls.day <= end_date)
+        if group_by == 'priority':
+            query = query.join(Task, Task.id == cls.task_id)
+        if project_id is not None:
+            query = query.where(cls.project_id == project_id)
+        if assignee is not None:
+            query = query.where(cls.assignee == assignee)
+
+        totals = {}
+        for row in db.session.execute(query.group_by(*columns)):
+            if interval == 'total':
+                period = None
+            elif interval == 'week':
+                period = row[1] - timedelta(days=row[1].weekday())
+            else:
+                period = row[1]
+            totals[(period, row[0])] = totals.get((period, row[0]), 0) + row[-1]
+        rows = sorted(
+            ((period, key, minutes) for (period, key), minutes in totals.items() if minutes),
+            key=lambda item: (item[0] or date.min, item[1])
+        )
+
+        # 一次查询补全项目名称和任务标题
+        labels = {}
+        keys = {key for _, key, _ in rows}
+        if group_by == 'project' and keys:
+            labels = dict(db.session.execute(
+                db.select(Project.id, Project.name).where(Project.id.in_(keys))
+            ).all())
+        elif group_by == 'task' and keys:
+            labels = dict(db.session.execute(
+                db.select(Task.id, Task.title).where(Task.id.in_(keys))
+            ).all())
+
+        if group_by == 'assignee':
+            # 未分配负责人的耗时以None表示
+            rows = [(period, key or None, minutes) for period, key, minutes in rows]
+        return [
+            {
+                'period': period.isoformat() if period else None,
+                'key': key,
+                'label': labels.get(key, key),
+                'minutes': minutes
+            }
+            for period, key, minutes in rows
+        ]
@@ -1,8 +1,20 @@
 from app import db
+from app.models.time_rollup import TimeRollup
+from app.models.time_daily_rollup import TimeDailyRollup
 from datetime import datetime, timedelta
 
 class TimeLog(db.Model):
     __tablename__ = 'time_logs'
+    __table_args__ = (
+        # 按任务列出时间日志
+        db.Index('ix_time_logs_task_start', 'task_id', 'start_time', 'id'),
+        # 正在运行的计时器（部分索引，只包含未结束的日志）
+        db.Index(
+            'ix_time_logs_running', 'task_id',
+            sqlite_where=db.text('end_time IS NULL'),
+            postgresql_where=db.text('end_time IS NULL')
+        ),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=False)
@@ -61,6 +73,19 @@ class TimeLog(db.Model):
         else:
             return "0分钟"
     
+    @staticmethod
+    def minutes_for(duration, start_time, end_time):
+        """一条时间日志计入总耗时的分钟数，正在运行的计时器不计入"""
+        if duration:
+            return duration
+        if start_time and end_time:
+            return int((end_time - start_time).total_seconds() / 60)
+        return 0
+    
+    def counted_minutes(self):
+        """本条日志当前计入总耗时的分钟数"""
+        return self.minutes_for(self.duration, self.start_time, self.end_time)
+    
     def calculate_duration(self):
         """计算持续时间（分钟）"""
         if self.start_time and self.end_time:
@@ -81,6 +106,67 @@ class TimeLog(db.Model):
         """获取任务正在运行的时间日志"""
         return cls.query.filter_by(task_id=task_id, end_time=None).first()
     
+    @classmethod
+    def query_running_timers(cls, project_id=None, task_ids=None):
+        """
+        构造查询正在运行的计时器的语句，同时取出任务和累计耗时
+
+        Args:
+            project_id: 只查询该项目的任务
+            task_ids: 任务ID列表；提供时每个任务返回一行，没有运行中计时器的任务日志为None
+
+        Returns:
+            select语句，每行为 (TimeLog或None, Task, 累计分钟数或None)；提供task_ids时按任务ID排序
+        """
+        from app.models.task import Task
+
+        running = cls.end_time.is_(None)
+        if task_ids is None:
+            # 只扫描部分索引ix_time_logs_running
+            query = db.select(cls, Task, TimeRollup.total_minutes) \
+                .join(Task, Task.id == cls.task_id).where(running)
+        else:
+            query = db.select(cls, Task, TimeRollup.total_minutes).select_from(Task) \
+                .outerjoin(cls, db.and_(cls.task_id == Task.id, running)) \
+                .where(Task.id.in_(task_ids)).order_by(Task.id)
+        query = query.outerjoin(TimeRollup, db.and_(
+            TimeRollup.scope == TimeRollup.SCOPE_TASK, TimeRollup.scope_id == Task.id
+        ))
+        if project_id is not None:
+            query = query.where(Task.project_id == project_id)
+        return query
+    
+    @classmethod
+    def get_running_timers(cls, project_id=None, task_ids=None):
+        """
+        一次查询获取正在运行的计时器及其任务、已运行时间和累计耗时
+
+        Args:
+            project_id: 只查询该项目的任务
+            task_ids: 任务ID列表，提供时返回每个任务的计时器状态（包括未在计时的任务）
+
+        Returns:
+            计时器状态字典列表
+        """
+        now = datetime.utcnow()
+        timers = []
+        for time_log, task, total_minutes in db.session.execute(cls.query_running_timers(project_id, task_ids)):
+            # 关联的任务已在同一查询中加载，to_dict不会再次查询
+            timers.append({
+                'task_id': task.id,
+                'task_title': task.title,
+                'project_id': task.project_id,
+                'assignee': task.assignee,
+                'is_running': time_log is not None,
+                'current_timer': time_log.to_dict() if time_log else None,
+                'elapsed_seconds': int((now - time_log.start_time).total_seconds()) if time_log else 0,
+                'total_time': total_minutes or 0
+            })
+        if task_ids is None:
+            # 最近开始的在前，结果集很小，在Python中排序
+            timers.sort(key=lambda timer: timer['current_timer']['start_time'], reverse=True)
+        return timers
+    
     @classmethod
     def start_timer(cls, task_id, description=None):
         """开始计时"""
@@ -115,23 +201,90 @@ class TimeLog(db.Model):
         if description:
             running_timer.description = description
         
-        db.session.commit()
+        try:
+            TimeRollup.apply_delta(
+                task_id, running_timer.task.project_id, running_timer.counted_minutes()
+            )
+            running_timer.apply_daily_rollup()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
         return running_timer
     
+    @classmethod
+    def update_time_log(cls, log_id, data):
+        """
+        更新时间日志，并在同一事务中调整耗时汇总
+        
+        Args:
+            log_id: 时间日志ID
+            data: 要更新的字段（description、start_time、end_time，时间为datetime）
+        
+        Returns:
+            更新后的TimeLog对象，不存在时返回None
+        """
+        time_log = db.session.get(cls, log_id)
+        if not time_log:
+            return None
+        
+        old_minutes = time_log.counted_minutes()
+        # 先按修改前的时间段扣除按日汇总，修改后再重新计入
+        time_log.apply_daily_rollup(sign=-1)
+        
+        if 'description' in data:
+            time_log.description = data['description']
+        if 'start_time' in data:
+            time_log.start_time = data['start_time']
+        if 'end_time' in data:
+            time_log.end_time = data['end_time']
+            time_log.duration = time_log.calculate_duration()
+        
+        try:
+            TimeRollup.apply_delta(
+                time_log.task_id, time_log.task.project_id,
+                time_log.counted_minutes() - old_minutes
+            )
+            time_log.apply_daily_rollup()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        return time_log
+    
+    @classmethod
+    def delete_time_log(cls, log_id):
+        """删除时间日志，并在同一事务中扣除耗时汇总"""
+        time_log = db.session.get(cls, log_id)
+        if not time_log:
+            return False
+        
+        try:
+            TimeRollup.apply_delta(
+                time_log.task_id, time_log.task.project_id, -time_log.counted_minutes()
+            )
+            time_log.apply_daily_rollup(sign=-1)
+            db.session.delete(time_log)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        return True
+    
     @classmethod
     def get_total_time_by_task(cls, task_id):
-        """获取任务总耗时（分钟）"""
-        time_logs = cls.query.filter_by(task_id=task_id).all()
-        total_minutes = 0
-        for log in time_logs:
-            if log.duration:
-                total_minutes += log.duration
-            elif log.start_time and log.end_time:
-                duration = log.calculate_duration()
-                total_minutes += duration
-        return total_minutes
+        """获取任务总耗时（分钟），从耗时汇总表读取"""
+        return TimeRollup.get_task_total(task_id)
+    
+    def apply_daily_rollup(self, sign=1):
+        """按日计入（sign为-1时扣除）本条日志当前的耗时，不提交事务"""
+        TimeDailyRollup.apply_log(self.task, self.start_time, self.end_time, self.counted_minutes(), sign)
     
     def update_duration(self):
         """更新持续时间"""
+        old_minutes = self.counted_minutes()
+        self.apply_daily_rollup(sign=-1)
         self.duration = self.calculate_duration()
+        TimeRollup.apply_delta(self.task_id, self.task.project_id, self.counted_minutes() - old_minutes)
+        self.apply_daily_rollup()
         db.session.commit()
\ No newline at end of file
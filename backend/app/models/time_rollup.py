@@ -0,0 +1,147 @@
+from app import db
+from app.utils.upsert import upsert_increment
+from datetime import datetime
+
+class TimeRollup(db.Model):
+    """
+    任务/项目累计耗时汇总
+
+    每个任务和每个项目各一行，随时间日志的停止、修改、删除在同一事务中
+    增量更新，读取总耗时只需一次主键查询
+    """
+    __tablename__ = 'time_rollups'
+
+    SCOPE_TASK = 'task'
+    SCOPE_PROJECT = 'project'
+
+    scope = db.Column(db.String(10), primary_key=True)  # task, project
+    scope_id = db.Column(db.Integer, primary_key=True)
+    total_minutes = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<TimeRollup {self.scope}:{self.scope_id} {self.total_minutes}>'
+
+    @classmethod
+    def apply_delta(cls, task_id, project_id, minutes):
+        """
+        累加任务及其所属项目的耗时，不提交事务
+
+        Args:
+            task_id: 任务ID
+            project_id: 任务所属项目ID
+            minutes: 耗时增量（分钟），可以为负数
+        """
+        if not minutes:
+            return
+        now = datetime.utcnow()
+        for scope, scope_id in ((cls.SCOPE_TASK, task_id), (cls.SCOPE_PROJECT, project_id)):
+            upsert_increment(
+                cls,
+                keys={'scope': scope, 'scope_id': scope_id},
+                increments={'total_minutes': minutes},
+                values={'updated_at': now}
+            )
+
+    @classmethod
+    def get_total(cls, scope, scope_id):
+        rollup = db.session.get(cls, (scope, scope_id))
+        return rollup.total_minutes if rollup else 0
+
+    @classmethod
+    def get_task_total(cls, task_id):
+        """获取任务总耗时（分钟）"""
+        return cls.get_total(cls.SCOPE_TASK, task_id)
+
+    @classmethod
+    def get_project_total(cls, project_id):
+        """获取项目总耗时（分钟）"""
+        return cls.get_total(cls.SCOPE_PROJECT, project_id)
+
+    @classmethod
+    def get_project_totals(cls, project_ids):
+        """批量获取项目总耗时，返回 {project_id: 分钟}"""
+        totals = {project_id: 0 for project_id in project_ids}
+        if project_ids:
+            rows = cls.query.filter(
+                cls.scope == cls.SCOPE_PROJECT,
+                cls.scope_id.in_(project_ids)
+            ).all()
+            for row in rows:
+                totals[row.scope_id] = row.total_minutes
+        return totals
+
+    @classmethod
+    def remove_task(cls, task_id, project_id):
+        """任务删除时移除其汇总并从项目汇总中扣除，不提交事务"""
+        minutes = cls.get_task_total(task_id)
+        cls.query.filter_by(scope=cls.SCOPE_TASK, scope_id=task_id).delete()
+        if minutes:
+            upsert_increment(
+                cls,
+                keys={'scope': cls.SCOPE_PROJECT, 'scope_id': project_id},
+                increments={'total_minutes': -minutes},
+                values={'updated_at': datetime.utcnow()}
+            )
+
+    @classmethod
+    def remove_project(cls, project_id):
+        """项目删除时移除项目及其任务的汇总，不提交事务"""
+        from app.models.task import Task
+
+        task_ids = db.session.query(Task.id).filter(Task.project_id == project_id)
+        cls.query.filter(
+            cls.scope == cls.SCOPE_TASK,
+            cls.scope_id.in_(task_ids.scalar_subquery())
+        ).delete(synchronize_session=False)
+        cls.query.filter_by(scope=cls.SCOPE_PROJECT, scope_id=project_id).delete()
+
+    @classmethod
+    def rebuild(cls, batch_size=5000):
+        """
+        根据全部时间日志重新计算汇总
+
+        逐批流式读取时间日志，内存占用只与任务数量相关
+
+        Returns:
+            重新生成的汇总行数
+        """
+        from app.models.task import Task
+        from app.models.time_log import TimeLog
+        from app.models.change_counter import ChangeCounter
+
+        task_totals = {}
+        project_totals = {}
+        rows = db.session.execute(
+            db.select(
+                TimeLog.task_id, Task.project_id, TimeLog.duration,
+                TimeLog.start_time, TimeLog.end_time
+            ).join(Task, Task.id == TimeLog.task_id)
+            .execution_options(yield_per=batch_size)
+        )
+        for task_id, project_id, duration, start_time, end_time in rows:
+            minutes = TimeLog.minutes_for(duration, start_time, end_time)
+            if minutes:
+                task_totals[task_id] = task_totals.get(task_id, 0) + minutes
+                project_totals[project_id] = project_totals.get(project_id, 0) + minutes
+
+        now = datetime.utcnow()
+        records = [
+            {'scope': cls.SCOPE_TASK, 'scope_id': task_id, 'total_minutes': minutes, 'updated_at': now}
+            for task_id, minutes in task_totals.items()
+        ] + [
+            {'scope': cls.SCOPE_PROJECT, 'scope_id': project_id, 'total_minutes': minutes, 'updated_at': now}
+            for project_id, minutes in project_totals.items()
+        ]
+
+        try:
+            cls.query.delete()
+            for start in range(0, len(records), batch_size):
+                db.session.execute(cls.__table__.insert(), records[start:start + batch_size])
+            # 汇总重建可能改变任意项目的耗时，使全部缓存校验值失效
+            ChangeCounter.bump([ChangeCounter.GLOBAL])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        return len(records)
@@ -0,0 +1,156 @@
+from flask import Blueprint, request, jsonify, current_app
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.exceptions import HTTPException
+from app import db
+import time
+
+batch_bp = Blueprint('batch', __name__)
+
+# 不能在批量请求中调用的接口：流式响应、文件上传下载和批量接口自身
+BLOCKED_ENDPOINTS = {
+    'batch.batch',
+    'events.stream_events',
+    'documents.upload_document',
+    'documents.init_upload',
+    'documents.upload_chunk',
+    'documents.download_document',
+    'documents.get_document_preview',
+    'imports.import_project_rows',
+    'imports.import_task_rows',
+    'imports.import_project_tasks',
+    'exports.export_data',
+    'static',
+}
+# 原样返回给客户端的子响应头
+FORWARDED_HEADERS = ('ETag', 'Last-Modified', 'X-Cache', 'Location')
+METHODS = ('GET', 'POST', 'PUT', 'DELETE')
+
+def _error(status, error, message):
+    return {'status': status, 'body': {'success': False, 'error': error, 'message': message}}
+
+def _validate(item):
+    """检查子请求格式，返回错误信息或None"""
+    if not isinstance(item, dict):
+        return '子请求必须是对象'
+    if str(item.get('method', 'GET')).upper() not in METHODS:
+        return f"method必须是{'、'.join(METHODS)}之一"
+    path = item.get('path')
+    if not isinstance(path, str) or not path.startswith('/api/'):
+        return 'path必须是以/api/开头的接口路径'
+    if 'headers' in item and not isinstance(item['headers'], dict):
+        return 'headers必须是对象'
+    return None
+
+def _dispatch(app, item):
+    """
+    在当前应用上下文中执行一个子请求
+
+    直接匹配路由并调用视图函数，不经过完整的WSGI处理；应用上下文已存在时
+    请求上下文沿用它，多个子请求共享同一个数据库会话
+    """
+    method = str(item.get('method', 'GET')).upper()
+    path = item['path']
+    kwargs = {'method': method, 'headers': item.get('headers') or {}}
+    if item.get('body') is not None:
+        kwargs['json'] = item['body']
+
+    with app.test_request_context(path, **kwargs):
+        try:
+            if request.routing_exception is not None:
+                raise request.routing_exception
+            rule, view_args = request.url_rule, request.view_args
+            if rule.endpoint in BLOCKED_ENDPOINTS:
+                return _error(400, '不支持的子请求', f'{method} {request.path} 不能在批量请求中调用')
+            response = app.make_response(app.view_functions[rule.endpoint](**view_args))
+        except HTTPException as e:
+            response = app.make_response(app.handle_user_exception(e))
+        except Exception as e:
+            db.session.rollback()
+            return _error(500, '子请求执行失败', str(e))
+
+    if response.status_code >= 500 or not db.session.is_active:
+        # 视图捕获异常后直接返回500时会话可能停留在失败的flush状态，回滚后再执行后续子请求
+        db.session.rollback()
+
+    result = {'status': response.status_code}
+    headers = {name: response.headers[name] for name in FORWARDED_HEADERS if name in response.headers}
+    if headers:
+        result['headers'] = headers
+    if response.is_json:
+        result['body'] = response.get_json()
+    elif response.status_code != 304:
+        result['body'] = response.get_data(as_text=True)
+    return result
+
+def _run(app, item, own_context=False):
+    """执行子请求并记录耗时；own_context为True时在独立的应用上下文（及会话）中执行"""
+    started = time.perf_counter()
+    error = _validate(item)
+    if error:
+        result = _error(400, '子请求无效', error)
+    elif own_context:
+        with app.app_context():
+            result = _dispatch(app, item)
+    else:
+        result = _dispatch(app, item)
+    if isinstance(item, dict) and 'id' in item:
+        result['id'] = item['id']
+    result['duration_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+@batch_bp.route('/batch', methods=['POST'])
+def batch():
+    """
+    在一次请求中执行多个接口调用
+
+    请求体:
+        requests: 子请求列表，每项包含method（默认GET）、path（含查询参数）、
+            可选的body（JSON）、headers（如If-None-Match）和客户端自定义的id
+        parallel: 为true且全部是GET时并行执行（各自使用独立的数据库会话），
+            否则按顺序在同一会话中执行，后面的请求能读到前面请求的写入
+
+    子请求各自提交，不构成一个事务；每项返回status、body、duration_ms，
+    以及ETag等缓存相关响应头
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get('requests'), list) or not data['requests']:
+            return jsonify({
+                'success': False,
+                'error': '请求数据无效',
+                'message': '请提供子请求列表requests'
+            }), 400
+        items = data['requests']
+        max_requests = current_app.config['BATCH_MAX_REQUESTS']
+        if len(items) > max_requests:
+            return jsonify({
+                'success': False,
+                'error': '子请求过多',
+                'message': f'一次最多{max_requests}个子请求'
+            }), 400
+
+        app = current_app._get_current_object()
+        started = time.perf_counter()
+        parallel = bool(data.get('parallel')) and all(
+            isinstance(item, dict) and str(item.get('method', 'GET')).upper() == 'GET' for item in items
+        )
+        if parallel and len(items) > 1:
+            workers = min(current_app.config['BATCH_MAX_WORKERS'], len(items))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                responses = list(executor.map(lambda item: _run(app, item, own_context=True), items))
+        else:
+            parallel = False
+            responses = [_run(app, item) for item in items]
+
+        return jsonify({
+            'success': True,
+            'data': responses,
+            'parallel': parallel,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 2)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': '批量请求失败',
+            'message': str(e)
+        }), 500
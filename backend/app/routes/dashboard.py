@@ -0,0 +1,61 @@
+from flask import Blueprint, request, jsonify
+from datetime import datetime, timedelta
+from app.models import ChangeCounter, Project, Task
+from app.models.time_daily_rollup import TimeDailyRollup
+from app.utils.http_cache import conditional_get
+
+dashboard_bp = Blueprint('dashboard', __name__)
+
+# 统计结果的缓存秒数；逾期数量和本周耗时随时间变化，数据未变时也需定期重新计算
+SUMMARY_CACHE_SECONDS = 60
+
+def _summary_scopes():
+    project_id = request.args.get('project_id', type=int)
+    if project_id is not None:
+        return [ChangeCounter.project_scope(project_id)]
+    return ['projects', 'tasks', 'time_logs']
+
+@dashboard_bp.route('/dashboard/summary', methods=['GET'])
+@conditional_get(_summary_scopes, ttl=SUMMARY_CACHE_SECONDS)
+def get_dashboard_summary():
+    """
+    仪表盘统计：项目数量、按状态/优先级/负责人的任务数量、逾期任务数和本周耗时
+
+    查询次数固定，均为分组或聚合查询，不加载项目和任务
+
+    查询参数:
+        project_id: 只统计该项目
+    """
+    try:
+        project_id = request.args.get('project_id', type=int)
+        if 'project_id' in request.args and project_id is None:
+            return jsonify({
+                'success': False,
+                'error': '参数无效',
+                'message': 'project_id必须是整数'
+            }), 400
+
+        now = datetime.utcnow()
+        # 本周从报表时区的周一开始，与耗时报表的按周汇总一致
+        today = datetime.now(TimeDailyRollup.report_timezone()).date()
+        week_start = today - timedelta(days=today.weekday())
+
+        summary = Task.get_summary(project_id=project_id, now=now)
+        return jsonify({
+            'success': True,
+            'data': {
+                'projects': Project.get_date_stats(today, project_id=project_id),
+                'tasks': summary,
+                'time_this_week': {
+                    'start': week_start.isoformat(),
+                    'minutes': TimeDailyRollup.total_minutes(week_start, today, project_id=project_id)
+                },
+                'generated_at': now.isoformat()
+            }
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': '获取仪表盘统计失败',
+            'message': str(e)
+        }), 500
@@ -1,7 +1,12 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, current_app
 from werkzeug.utils import secure_filename
+from werkzeug.wsgi import get_input_stream
 from app.models import Document, Task
 from app.utils.validators import allowed_file
+from app.utils.pagination import get_page_args, keyset_paginate
+from app.utils import uploads
+from app.utils.downloads import send_stored_file
+from app.utils.previews import PREVIEW_SIZES, PreviewError, is_previewable, preview_key
 import os
 
 documents_bp = Blueprint('documents', __name__)
@@ -13,7 +18,7 @@ if not os.path.exists(UPLOAD_FOLDER):
 
 @documents_bp.route('/tasks/<int:task_id>/documents', methods=['GET'])
 def get_task_documents(task_id):
-    """获取任务的所有文档"""
+    """获取任务的所有文档，提供limit或cursor参数时按游标分页"""
     try:
         # 检查任务是否存在
         task = Task.get_task_by_id(task_id)
@@ -24,12 +29,36 @@ def get_task_documents(task_id):
                 'message': f'ID为{task_id}的任务不存在'
             }), 404
         
-        documents = Document.get_documents_by_task(task_id)
+        try:
+            page_args = get_page_args()
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': '分页参数无效',
+                'message': str(e)
+            }), 400
+        
+        if page_args is None:
+            documents = Document.get_documents_by_task(task_id)
+            return jsonify({
+                'success': True,
+                'data': [doc.to_dict() for doc in documents],
+                'count': len(documents)
+            })
+        
+        cursor, limit = page_args
+        documents, next_cursor = keyset_paginate(
+            Document.query.filter_by(task_id=task_id), Document.upload_date, Document.id,
+            cursor, limit
+        )
         
         return jsonify({
             'success': True,
             'data': [doc.to_dict() for doc in documents],
-            'count': len(documents)
+            'count': len(documents),
+            'limit': limit,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
         })
     except Exception as e:
         return jsonify({
@@ -93,9 +122,150 @@ def upload_document(task_id):
             'message': str(e)
         }), 500
 
+def _upload_error(error):
+    """上传会话错误响应，附带当前偏移量以便客户端续传"""
+    body = {
+        'success': False,
+        'error': '上传失败',
+        'message': str(error)
+    }
+    if error.offset is not None:
+        body['offset'] = error.offset
+    response = jsonify(body)
+    if error.offset is not None:
+        response.headers['Upload-Offset'] = str(error.offset)
+    return response, error.status
+
+def _upload_response(status, code=200):
+    response = jsonify({
+        'success': True,
+        'data': status
+    })
+    response.headers['Upload-Offset'] = str(status['offset'])
+    return response, code
+
+@documents_bp.route('/tasks/<int:task_id>/uploads', methods=['POST'])
+def init_upload(task_id):
+    """创建分块上传会话，请求体为 {filename, size}"""
+    try:
+        task = Task.get_task_by_id(task_id)
+        if not task:
+            return jsonify({
+                'success': False,
+                'error': '任务未找到',
+                'message': f'ID为{task_id}的任务不存在'
+            }), 404
+        
+        data = request.get_json(silent=True) or {}
+        filename = (data.get('filename') or '').strip()
+        size = data.get('size')
+        
+        if not filename or not allowed_file(filename):
+            return jsonify({
+                'success': False,
+                'error': '文件类型不允许',
+                'message': '只允许上传PDF、图片(PNG/JPG/JPEG/GIF)和文档(DOC/DOCX)文件'
+            }), 400
+        
+        max_size = current_app.config['UPLOAD_MAX_FILE_SIZE']
+        if not isinstance(size, int) or isinstance(size, bool) or size <= 0 or size > max_size:
+            return jsonify({
+                'success': False,
+                'error': '文件大小无效',
+                'message': f'size必须是1到{max_size}之间的整数'
+            }), 400
+        
+        status = uploads.create_upload(UPLOAD_FOLDER, task_id, filename, size)
+        status['chunk_size'] = current_app.config['UPLOAD_CHUNK_MAX_SIZE']
+        return _upload_response(status, 201)
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': '创建上传失败',
+            'message': str(e)
+        }), 500
+
+@documents_bp.route('/uploads/<upload_id>', methods=['GET'])
+def get_upload_status(upload_id):
+    """查询上传进度，offset为续传时下一个分块的起始位置"""
+    try:
+        return _upload_response(uploads.get_upload(UPLOAD_FOLDER, upload_id))
+    except uploads.UploadError as e:
+        return _upload_error(e)
+
+@documents_bp.route('/uploads/<upload_id>', methods=['PUT'])
+def upload_chunk(upload_id):
+    """
+    上传一个分块
+
+    起始位置由查询参数offset或请求头Upload-Offset指定，请求体为原始字节，
+    直接从请求流写入磁盘
+    """
+    try:
+        offset = request.args.get('offset', request.headers.get('Upload-Offset'))
+        try:
+            offset = int(offset)
+        except (TypeError, ValueError):
+            return jsonify({
+                'success': False,
+                'error': '参数无效',
+                'message': '请通过offset参数或Upload-Offset请求头指定分块起始位置'
+            }), 400
+        
+        stream = get_input_stream(
+            request.environ,
+            max_content_length=current_app.config['UPLOAD_CHUNK_MAX_SIZE']
+        )
+        return _upload_response(uploads.write_chunk(UPLOAD_FOLDER, upload_id, offset, stream))
+    except uploads.UploadError as e:
+        return _upload_error(e)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': '上传分块失败',
+            'message': str(e)
+        }), 500
+
+@documents_bp.route('/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload(upload_id):
+    """完成上传并创建文档记录"""
+    def create_document(task_id, filename, path):
+        if not Task.get_task_by_id(task_id):
+            raise uploads.UploadError(f'ID为{task_id}的任务不存在', 404)
+        return Document.create_from_path(task_id, filename, path, UPLOAD_FOLDER)
+    
+    try:
+        document = uploads.finalize_upload(UPLOAD_FOLDER, upload_id, create_document)
+        return jsonify({
+            'success': True,
+            'data': document.to_dict(),
+            'message': '文件上传成功'
+        }), 201
+    except uploads.UploadError as e:
+        return _upload_error(e)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': '上传文件失败',
+            'message': str(e)
+        }), 500
+
+@documents_bp.route('/uploads/<upload_id>', methods=['DELETE'])
+def cancel_upload(upload_id):
+    """取消上传"""
+    try:
+        uploads.abort_upload(UPLOAD_FOLDER, upload_id)
+        return jsonify({
+            'success': True,
+            'message': '上传已取消'
+        })
+    except uploads.UploadError as e:
+        return _upload_error(e)
+
 @documents_bp.route('/documents/<int:document_id>', methods=['GET'])
 def download_document(document_id):
-    """下载文档"""
+    """下载文档，?inline=1时以内联方式返回"""
     try:
         document = Document.get_document_by_id(document_id)
         if not document:
@@ -113,12 +283,13 @@ def download_document(document_id):
                 'message': '文档文件在服务器上不存在'
             }), 404
         
-        # 发送文件
-        return send_file(
+        # 发送文件，支持Range断点续传；inline=1时供浏览器直接预览
+        return send_stored_file(
             document.file_path,
-            as_attachment=True,
-            download_name=document.original_filename,
-            mimetype=None
+            document.original_filename,
+            UPLOAD_FOLDER,
+            etag=document.blob_sha256,
+            inline=request.args.get('inline', '').lower() in ('1', 'true')
         )
         
     except Exception as e:
@@ -128,6 +299,67 @@ def download_document(document_id):
             'message': str(e)
         }), 500
 
+@documents_bp.route('/documents/<int:document_id>/preview', methods=['GET'])
+def get_document_preview(document_id):
+    """获取文档预览图，size为small、medium或large"""
+    from app import preview_generator
+    
+    try:
+        size = request.args.get('size', 'medium')
+        if size not in PREVIEW_SIZES:
+            return jsonify({
+                'success': False,
+                'error': '参数无效',
+                'message': f'size必须是{"、".join(PREVIEW_SIZES)}之一'
+            }), 400
+        
+        document = Document.get_document_by_id(document_id)
+        if not document:
+            return jsonify({
+                'success': False,
+                'error': '文档未找到',
+                'message': f'ID为{document_id}的文档不存在'
+            }), 404
+        
+        if not is_previewable(document.file_type):
+            return jsonify({
+                'success': False,
+                'error': '不支持预览',
+                'message': f'{document.file_type}文件不支持预览'
+            }), 415
+        
+        if not os.path.exists(document.file_path):
+            return jsonify({
+                'success': False,
+                'error': '文件不存在',
+                'message': '文档文件在服务器上不存在'
+            }), 404
+        
+        key = preview_key(document)
+        try:
+            path = preview_generator.get(key, size, document.file_path, document.file_type)
+        except PreviewError as e:
+            return jsonify({
+                'success': False,
+                'error': '生成预览失败',
+                'message': str(e)
+            }), 422
+        
+        return send_stored_file(
+            path,
+            f'{os.path.splitext(document.original_filename)[0]}-{size}.jpg',
+            UPLOAD_FOLDER,
+            etag=f'{document.blob_sha256}-{size}' if document.blob_sha256 else None,
+            inline=True
+        )
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': '获取预览失败',
+            'message': str(e)
+        }), 500
+
 @documents_bp.route('/documents/<int:document_id>', methods=['DELETE'])
 def delete_document(document_id):
     """删除文档"""
@@ -0,0 +1,96 @@
+from flask import Blueprint, Response, request, current_app
+from app import db
+from app.models.change_event import ChangeEvent
+import json
+
+events_bp = Blueprint('events', __name__)
+
+# 重连时最多补发的事件数，更多时通知客户端重新加载
+BACKFILL_LIMIT = 1000
+# 客户端断线后的重连间隔（毫秒）
+RETRY_MS = 3000
+
+def _format_event(event):
+    data = json.dumps(event, ensure_ascii=False, separators=(',', ':'))
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+def _format_reset(reason):
+    data = json.dumps({'reason': reason}, ensure_ascii=False)
+    return f'event: reset\ndata: {data}\n\n'
+
+def _backfill(last_event_id, project_ids):
+    """
+    读取断线期间的事件
+
+    Returns:
+        事件列表；所需事件已被清理或数量过多时返回None
+    """
+    with db.engine.connect() as conn:
+        oldest = ChangeEvent.oldest_id(conn)
+        if oldest is not None and last_event_id < oldest - 1:
+            return None
+        events = ChangeEvent.fetch_since(conn, last_event_id, project_ids, limit=BACKFILL_LIMIT + 1)
+    return events if len(events) <= BACKFILL_LIMIT else None
+
+@events_bp.route('/events/stream', methods=['GET'])
+def stream_events():
+    """
+    变更事件推送（Server-Sent Events）
+
+    事件名为project、task、time_log、document或timer，数据为紧凑的JSON：
+    {id, type, action, entity_id, project_id, at}，另有fields（修改的字段）、
+    task_id、count（批量导入的数量）等附加字段。客户端据此更新或重新加载对应数据；
+    收到reset事件时应重新加载全部数据。
+
+    查询参数:
+        project_id: 只接收这些项目的事件，可重复提供，不提供时接收全部
+        last_event_id: 同Last-Event-ID请求头，从该事件之后补发
+    """
+    app = current_app._get_current_object()
+    feed = app.extensions['change_feed']
+    heartbeat = app.config['CHANGE_FEED_HEARTBEAT']
+    project_ids = request.args.getlist('project_id', type=int) or None
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    def generate():
+        # 先订阅再补发，两者之间提交的事件按ID去重
+        with app.app_context():
+            subscription = feed.subscribe(project_ids)
+            try:
+                backfill = _backfill(last_event_id, project_ids) if last_event_id is not None else []
+            except Exception:
+                feed.unsubscribe(subscription)
+                raise
+        try:
+            yield f'retry: {RETRY_MS}\n\n'
+            last_sent = last_event_id or 0
+            if backfill is None:
+                yield _format_reset('events_expired')
+            else:
+                for event in backfill:
+                    yield _format_event(event)
+                    last_sent = event['id']
+
+            while True:
+                event = subscription.get(timeout=heartbeat)
+                if subscription.overflowed:
+                    # 客户端读取过慢，已丢失事件；断开后由客户端凭Last-Event-ID重连
+                    yield _format_reset('overflow')
+                    return
+                if event is None:
+                    yield ': keepalive\n\n'
+                elif event['id'] > last_sent:
+                    yield _format_event(event)
+                    last_sent = event['id']
+        finally:
+            feed.unsubscribe(subscription)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # 禁止nginx缓冲推送内容
+        'X-Accel-Buffering': 'no'
+    })
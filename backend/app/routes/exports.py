@@ -0,0 +1,43 @@
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from app.utils.exporter import EXPORT_TYPES, iter_ndjson
+from app.utils.validators import parse_utc_datetime
+
+exports_bp = Blueprint('exports', __name__)
+
+@exports_bp.route('/export/<kind>', methods=['GET'])
+def export_data(kind):
+    """
+    以NDJSON流导出数据
+
+    kind: projects、tasks、time-logs、documents 或 all
+    查询参数: project_id、since、until（ISO格式时间）
+    """
+    kind = kind.replace('-', '_')
+    if kind == 'all':
+        kinds = list(EXPORT_TYPES)
+    elif kind in EXPORT_TYPES:
+        kinds = [kind]
+    else:
+        return jsonify({
+            'success': False,
+            'error': '导出类型无效',
+            'message': '导出类型必须是projects、tasks、time-logs、documents或all'
+        }), 400
+
+    try:
+        since = parse_utc_datetime(request.args['since']) if request.args.get('since') else None
+        until = parse_utc_datetime(request.args['until']) if request.args.get('until') else None
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': '时间格式错误',
+            'message': 'since和until必须是ISO格式时间'
+        }), 400
+
+    project_id = request.args.get('project_id', type=int)
+    response = Response(
+        stream_with_context(iter_ndjson(kinds, project_id=project_id, since=since, until=until)),
+        mimetype='application/x-ndjson'
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename=export-{kind}.ndjson'
+    return response
@@ -0,0 +1,105 @@
+from flask import Blueprint, request, jsonify, Response, current_app, stream_with_context
+from werkzeug.wsgi import get_input_stream
+from app.models import Project
+from app.utils.importer import detect_format, import_tasks, import_projects, DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE
+import json
+
+imports_bp = Blueprint('imports', __name__)
+
+def _import_stream():
+    """
+    获取请求体输入流
+
+    导入文件远大于普通请求，不受MAX_CONTENT_LENGTH限制，
+    改用IMPORT_MAX_CONTENT_LENGTH，且直接读取原始流而不缓冲整个请求体
+    """
+    return get_input_stream(
+        request.environ,
+        max_content_length=current_app.config['IMPORT_MAX_CONTENT_LENGTH']
+    )
+
+def _ndjson_response(events):
+    """将导入进度事件以NDJSON流式返回"""
+    def generate():
+        for event in events:
+            yield json.dumps(event, ensure_ascii=False) + '\n'
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def _get_format():
+    return detect_format(request.args.get('format'), request.content_type)
+
+def _get_chunk_size():
+    """
+    读取每块行数，超过MAX_CHUNK_SIZE时按上限处理
+
+    Raises:
+        ValueError: 参数无效
+    """
+    chunk_size = request.args.get('chunk_size')
+    if chunk_size is None:
+        return DEFAULT_CHUNK_SIZE
+    try:
+        chunk_size = int(chunk_size)
+    except ValueError:
+        raise ValueError('chunk_size必须是整数')
+    if chunk_size < 1:
+        raise ValueError('chunk_size必须大于0')
+    return min(chunk_size, MAX_CHUNK_SIZE)
+
+@imports_bp.route('/import/projects', methods=['POST'])
+def import_project_rows():
+    """批量导入项目（JSON Lines或CSV），以NDJSON流返回进度"""
+    try:
+        fmt = _get_format()
+        chunk_size = _get_chunk_size()
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': '导入参数无效',
+            'message': str(e)
+        }), 400
+
+    return _ndjson_response(import_projects(_import_stream(), fmt, chunk_size=chunk_size))
+
+@imports_bp.route('/import/tasks', methods=['POST'])
+def import_task_rows():
+    """批量导入任务（JSON Lines或CSV），以NDJSON流返回进度"""
+    try:
+        fmt = _get_format()
+        chunk_size = _get_chunk_size()
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': '导入参数无效',
+            'message': str(e)
+        }), 400
+
+    project_id = request.args.get('project_id', type=int)
+    return _ndjson_response(
+        import_tasks(_import_stream(), fmt, project_id=project_id, chunk_size=chunk_size)
+    )
+
+@imports_bp.route('/projects/<int:project_id>/tasks/import', methods=['POST'])
+def import_project_tasks(project_id):
+    """向指定项目批量导入任务"""
+    project = Project.get_project_by_id(project_id)
+    if not project:
+        return jsonify({
+            'success': False,
+            'error': '项目未找到',
+            'message': f'ID为{project_id}的项目不存在'
+        }), 404
+
+    try:
+        fmt = _get_format()
+        chunk_size = _get_chunk_size()
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': '导入参数无效',
+            'message': str(e)
+        }), 400
+
+    return _ndjson_response(
+        import_tasks(_import_stream(), fmt, project_id=project_id, chunk_size=chunk_size)
+    )
@@ -0,0 +1,72 @@
+from flask import Blueprint, request, jsonify
+from app.models.job import Job
+
+jobs_bp = Blueprint('jobs', __name__)
+
+@jobs_bp.route('/jobs', methods=['GET'])
+def get_jobs():
+    """
+    列出最近的后台任务
+
+    查询参数: status（queued、running、done、failed）、kind、limit（默认50，最多500）
+    """
+    try:
+        status = request.args.get('status')
+        if status and status not in Job.STATUSES:
+            return jsonify({
+                'success': False,
+                'error': '任务状态无效',
+                'message': f"status必须是{'、'.join(Job.STATUSES)}之一"
+            }), 400
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        jobs = Job.get_jobs(status=status, kind=request.args.get('kind'), limit=limit)
+        return jsonify({
+            'success': True,
+            'data': [job.to_dict() for job in jobs],
+            'message': '获取任务列表成功'
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': '获取任务列表失败',
+            'message': str(e)
+        }), 500
+
+@jobs_bp.route('/jobs/stats', methods=['GET'])
+def get_job_stats():
+    """按状态统计后台任务数量"""
+    try:
+        return jsonify({
+            'success': True,
+            'data': Job.get_stats(),
+            'message': '获取任务统计成功'
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': '获取任务统计失败',
+            'message': str(e)
+        }), 500
+
+@jobs_bp.route('/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """获取单个后台任务的状态"""
+    try:
+        job = Job.get_job_by_id(job_id)
+        if not job:
+            return jsonify({
+                'success': False,
+                'error': '任务未找到',
+                'message': f'ID为{job_id}的任务不存在'
+            }), 404
+        return jsonify({
+            'success': True,
+            'data': job.to_dict(),
+            'message': '获取任务成功'
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': '获取任务失败',
+            'message': str(e)
+        }), 500
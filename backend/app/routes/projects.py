@@ -1,18 +1,54 @@
 from flask import Blueprint, request, jsonify
-from app.models import Project
+from app.models import Project, TimeRollup, ChangeCounter
 from app.utils.validators import validate_project_data
+from app.utils.pagination import get_page_args, keyset_paginate
+from app.utils.http_cache import conditional_get
 
 projects_bp = Blueprint('projects', __name__)
 
 @projects_bp.route('/projects', methods=['GET'])
+@conditional_get(['projects', 'tasks', 'time_logs'])
 def get_projects():
-    """获取所有项目列表"""
+    """获取所有项目列表，提供limit或cursor参数时按游标分页"""
     try:
-        projects = Project.get_all_projects()
+        try:
+            page_args = get_page_args()
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': '分页参数无效',
+                'message': str(e)
+            }), 400
+        
+        if page_args is None:
+            projects = Project.get_all_projects_with_stats()
+            return jsonify({
+                'success': True,
+                'data': [
+                    project.to_dict(task_stats=stats, total_time=total_time)
+                    for project, stats, total_time in projects
+                ],
+                'count': len(projects)
+            })
+        
+        cursor, limit = page_args
+        projects, next_cursor = keyset_paginate(
+            Project.query, Project.created_at, Project.id, cursor, limit
+        )
+        project_ids = [project.id for project in projects]
+        stats_map = Project.get_task_stats_map(project_ids)
+        totals = TimeRollup.get_project_totals(project_ids)
+        
         return jsonify({
             'success': True,
-            'data': [project.to_dict() for project in projects],
-            'count': len(projects)
+            'data': [
+                project.to_dict(task_stats=stats_map[project.id], total_time=totals[project.id])
+                for project in projects
+            ],
+            'count': len(projects),
+            'limit': limit,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
         })
     except Exception as e:
         return jsonify({
@@ -22,6 +58,7 @@ def get_projects():
         }), 500
 
 @projects_bp.route('/projects/<int:project_id>', methods=['GET'])
+@conditional_get(lambda project_id: [ChangeCounter.project_scope(project_id)])
 def get_project(project_id):
     """获取单个项目详情"""
     try:
@@ -44,6 +81,30 @@ def get_project(project_id):
             'message': str(e)
         }), 500
 
+@projects_bp.route('/projects/<int:project_id>/gantt', methods=['GET'])
+@conditional_get(lambda project_id: [ChangeCounter.project_scope(project_id)])
+def get_project_gantt(project_id):
+    """获取项目甘特图数据（列式）及关键路径、浮动时间"""
+    try:
+        project = Project.get_project_by_id(project_id)
+        if not project:
+            return jsonify({
+                'success': False,
+                'error': '项目未找到',
+                'message': f'ID为{project_id}的项目不存在'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'data': Project.get_gantt_data(project)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': '获取甘特图数据失败',
+            'message': str(e)
+        }), 500
+
 @projects_bp.route('/projects', methods=['POST'])
 def create_project():
     """创建新项目"""
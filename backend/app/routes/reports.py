@@ -0,0 +1,82 @@
+from flask import Blueprint, request, jsonify
+from datetime import date, datetime, timedelta
+from app.models.time_daily_rollup import TimeDailyRollup
+from app.utils.http_cache import conditional_get
+
+reports_bp = Blueprint('reports', __name__)
+
+DEFAULT_RANGE_DAYS = 30
+
+def _default_range_key():
+    """未提供end时日期范围随报表时区的当天日期变化，以当天日期区分缓存"""
+    if 'end' in request.args:
+        return ''
+    return datetime.now(TimeDailyRollup.report_timezone()).date().isoformat()
+
+@reports_bp.route('/reports/time', methods=['GET'])
+@conditional_get(['time_logs', 'tasks', 'projects'], vary=_default_range_key)
+def get_time_report():
+    """
+    耗时报表，从按日汇总表读取，不扫描时间日志
+
+    查询参数:
+        start、end: 日期范围（YYYY-MM-DD，含两端），默认截至今天的最近30天
+        group_by: project（默认）、assignee、priority或task
+        interval: day（默认）、week（按周一的日期汇总）或total
+        project_id: 只统计该项目
+        assignee: 只统计该负责人
+    """
+    try:
+        try:
+            today = datetime.now(TimeDailyRollup.report_timezone()).date()
+            end_date = date.fromisoformat(request.args['end']) if 'end' in request.args else today
+            start_date = date.fromisoformat(request.args['start']) if 'start' in request.args \
+                else end_date - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': '日期格式无效',
+                'message': 'start和end应为YYYY-MM-DD格式'
+            }), 400
+        if start_date > end_date:
+            return jsonify({
+                'success': False,
+                'error': '日期范围无效',
+                'message': 'start不能晚于end'
+            }), 400
+
+        group_by = request.args.get('group_by', 'project')
+        if group_by not in TimeDailyRollup.GROUP_BY:
+            return jsonify({
+                'success': False,
+                'error': '分组方式无效',
+                'message': f"group_by必须是{'、'.join(TimeDailyRollup.GROUP_BY)}之一"
+            }), 400
+        interval = request.args.get('interval', 'day')
+        if interval not in TimeDailyRollup.INTERVALS:
+            return jsonify({
+                'success': False,
+                'error': '统计周期无效',
+                'message': f"interval必须是{'、'.join(TimeDailyRollup.INTERVALS)}之一"
+            }), 400
+
+        rows = TimeDailyRollup.report(
+            start_date, end_date, group_by=group_by, interval=interval,
+            project_id=request.args.get('project_id', type=int),
+            assignee=request.args.get('assignee')
+        )
+        return jsonify({
+            'success': True,
+            'data': rows,
+            'start': start_date.isoformat(),
+            'end': end_date.isoformat(),
+            'group_by': group_by,
+            'interval': interval,
+            'total_minutes': sum(row['minutes'] for row in rows)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': '获取耗时报表失败',
+            'message': str(e)
+        }), 500
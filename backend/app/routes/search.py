@@ -0,0 +1,91 @@
+from flask import Blueprint, request, jsonify
+from app import db
+from app.utils.http_cache import conditional_get
+from app.utils.search import parse_terms, search_tasks, search_projects, search_documents, SEARCH_CANDIDATES
+
+search_bp = Blueprint('search', __name__)
+
+SEARCH_TYPES = ('all', 'tasks', 'projects', 'documents')
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+@search_bp.route('/search', methods=['GET'])
+@conditional_get(['projects', 'tasks', 'documents'])
+def search():
+    """
+    全文搜索项目、任务和文档内容，按相关度排序
+
+    查询参数:
+        q: 搜索词，多个词以空格分隔，全部命中才返回；英文按前缀匹配，中文按子串匹配
+        type: all（默认）、tasks、projects或documents
+        project_id: 只搜索该项目
+        task_id: 只搜索该任务的文档
+        status: 只搜索该状态的任务
+        limit: 每类结果的数量（默认20，最多100）
+        offset: 跳过的数量
+
+    没有project_id、task_id、status筛选时，每类只对最新的SEARCH_CANDIDATES（5000）条
+    命中按相关度排序，更早的命中不会返回；此时truncated中对应类型为true，
+    可加上筛选条件缩小范围后对全部命中排序
+    """
+    try:
+        terms = parse_terms(request.args.get('q', ''))
+        if not terms:
+            return jsonify({
+                'success': False,
+                'error': '搜索词无效',
+                'message': '请提供搜索词q'
+            }), 400
+
+        search_type = request.args.get('type', 'all')
+        if search_type not in SEARCH_TYPES:
+            return jsonify({
+                'success': False,
+                'error': '搜索类型无效',
+                'message': f"type必须是{'、'.join(SEARCH_TYPES)}之一"
+            }), 400
+
+        limit = request.args.get('limit', DEFAULT_LIMIT, type=int)
+        offset = request.args.get('offset', 0, type=int)
+        if limit < 1 or offset < 0:
+            return jsonify({
+                'success': False,
+                'error': '分页参数无效',
+                'message': 'limit必须大于0，offset不能为负数'
+            }), 400
+        limit = min(limit, MAX_LIMIT)
+        project_id = request.args.get('project_id', type=int)
+        task_id = request.args.get('task_id', type=int)
+        status = request.args.get('status')
+
+        data = {}
+        has_more = {}
+        truncated = {}
+        if search_type in ('all', 'tasks'):
+            data['tasks'], has_more['tasks'], truncated['tasks'] = search_tasks(
+                db.session, terms, project_id=project_id, status=status, limit=limit, offset=offset
+            )
+        if search_type in ('all', 'projects') and not status:
+            data['projects'], has_more['projects'], truncated['projects'] = search_projects(
+                db.session, terms, project_id=project_id, limit=limit, offset=offset
+            )
+        if search_type in ('all', 'documents') and not status:
+            data['documents'], has_more['documents'], truncated['documents'] = search_documents(
+                db.session, terms, task_id=task_id, project_id=project_id, limit=limit, offset=offset
+            )
+
+        return jsonify({
+            'success': True,
+            'data': data,
+            'limit': limit,
+            'offset': offset,
+            'has_more': has_more,
+            'truncated': truncated,
+            'candidates': SEARCH_CANDIDATES
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': '搜索失败',
+            'message': str(e)
+        }), 500
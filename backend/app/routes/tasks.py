@@ -1,33 +1,62 @@
 from flask import Blueprint, request, jsonify
-from app.models import Task, TimeLog
-from app.utils.validators import validate_task_data
+from app.models import Task, TimeLog, ChangeCounter
+from app.utils.validators import validate_task_data, validate_task_moves
+from app.utils.pagination import get_page_args, keyset_paginate
+from app.utils.http_cache import conditional_get
 
 tasks_bp = Blueprint('tasks', __name__)
 
+# 任务数据包含项目名称、时间日志和文档数量
+TASK_SCOPES = ['tasks', 'projects', 'time_logs', 'documents']
+
+def _task_list_scopes():
+    """按项目筛选时只依赖该项目的变更计数"""
+    project_id = request.args.get('project_id', type=int)
+    if project_id:
+        return [ChangeCounter.project_scope(project_id)]
+    return TASK_SCOPES
+
 @tasks_bp.route('/tasks', methods=['GET'])
+@conditional_get(_task_list_scopes)
 def get_tasks():
-    """获取任务列表"""
+    """获取任务列表，提供limit或cursor参数时按游标分页"""
     try:
         project_id = request.args.get('project_id', type=int)
         status = request.args.get('status')
         
-        if project_id:
-            if status:
-                tasks = Task.get_tasks_by_status(status, project_id)
-            else:
-                tasks = Task.get_tasks_by_project(project_id)
-        else:
-            if status:
-                tasks = Task.get_tasks_by_status(status)
-            else:
-                # 获取所有任务
-                from app import db
-                tasks = Task.query.order_by(Task.created_at.desc()).all()
+        try:
+            page_args = get_page_args()
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': '分页参数无效',
+                'message': str(e)
+            }), 400
+        
+        query = Task.query_tasks(project_id=project_id, status=status)
+        
+        if page_args is None:
+            tasks = Task.serialize_query(query)
+            return jsonify({
+                'success': True,
+                'data': tasks,
+                'count': len(tasks)
+            })
+        
+        cursor, limit = page_args
+        rows, next_cursor = keyset_paginate(
+            Task.with_related(query), Task.created_at, Task.id, cursor, limit,
+            key=lambda row: row[0]
+        )
+        tasks = Task.serialize_rows(rows)
         
         return jsonify({
             'success': True,
-            'data': [task.to_dict() for task in tasks],
-            'count': len(tasks)
+            'data': tasks,
+            'count': len(tasks),
+            'limit': limit,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
         })
     except Exception as e:
         return jsonify({
@@ -37,6 +66,7 @@ def get_tasks():
         }), 500
 
 @tasks_bp.route('/tasks/<int:task_id>', methods=['GET'])
+@conditional_get(TASK_SCOPES)
 def get_task(task_id):
     """获取单个任务详情"""
     try:
@@ -102,7 +132,14 @@ def create_task():
             task_data['end_time'] = datetime.fromisoformat(data['end_time'].replace('Z', '+00:00'))
         
         # 创建任务
-        task = Task.create_task(task_data)
+        try:
+            task = Task.create_task(task_data)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': '依赖关系无效',
+                'message': str(e)
+            }), 400
         
         return jsonify({
             'success': True,
@@ -172,7 +209,14 @@ def update_task(task_id):
             update_data['end_time'] = datetime.fromisoformat(data['end_time'].replace('Z', '+00:00'))
         
         # 更新任务
-        updated_task = Task.update_task(task_id, update_data)
+        try:
+            updated_task = Task.update_task(task_id, update_data)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': '依赖关系无效',
+                'message': str(e)
+            }), 400
         
         return jsonify({
             'success': True,
@@ -265,6 +309,96 @@ def update_task_status(task_id):
             'message': str(e)
         }), 500
 
+@tasks_bp.route('/tasks/<int:task_id>/dependencies', methods=['GET'])
+@conditional_get(['tasks'])
+def get_task_dependencies(task_id):
+    """获取任务的全部上游（direction=up）或下游（direction=down）依赖"""
+    try:
+        direction = request.args.get('direction', 'up')
+        if direction not in ('up', 'down'):
+            return jsonify({
+                'success': False,
+                'error': '参数无效',
+                'message': 'direction必须是up或down'
+            }), 400
+        
+        depth = request.args.get('depth', type=int)
+        if depth is not None and depth < 1:
+            return jsonify({
+                'success': False,
+                'error': '参数无效',
+                'message': 'depth必须是正整数'
+            }), 400
+        
+        task = Task.get_task_by_id(task_id)
+        if not task:
+            return jsonify({
+                'success': False,
+                'error': '任务未找到',
+                'message': f'ID为{task_id}的任务不存在'
+            }), 404
+        
+        rows = Task.get_dependency_chain(task_id, direction=direction, max_depth=depth)
+        
+        return jsonify({
+            'success': True,
+            'data': [dict(row._mapping) for row in rows],
+            'count': len(rows),
+            'task_id': task_id,
+            'direction': direction
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': '获取任务依赖失败',
+            'message': str(e)
+        }), 500
+
+@tasks_bp.route('/tasks/batch-move', methods=['POST'])
+def batch_move_tasks():
+    """批量移动看板任务（状态和列内位置）"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({
+                'success': False,
+                'error': '请求数据为空',
+                'message': '请提供要移动的任务'
+            }), 400
+        
+        moves = data.get('moves')
+        errors = validate_task_moves(moves)
+        if errors:
+            return jsonify({
+                'success': False,
+                'error': '数据验证失败',
+                'message': '; '.join(errors)
+            }), 400
+        
+        task_ids, missing = Task.move_tasks(moves)
+        if missing:
+            return jsonify({
+                'success': False,
+                'error': '任务未找到',
+                'message': f'ID为{", ".join(map(str, missing))}的任务不存在'
+            }), 404
+        
+        tasks = Task.serialize_query(Task.query.filter(Task.id.in_(task_ids)))
+        
+        return jsonify({
+            'success': True,
+            'data': tasks,
+            'count': len(tasks),
+            'message': '任务移动成功'
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': '批量移动任务失败',
+            'message': str(e)
+        }), 500
+
 @tasks_bp.route('/projects/<int:project_id>/tasks', methods=['POST'])
 def create_project_task(project_id):
     """为特定项目创建任务"""
@@ -311,7 +445,14 @@ def create_project_task(project_id):
             task_data['end_time'] = datetime.fromisoformat(data['end_time'].replace('Z', '+00:00'))
         
         # 创建任务
-        task = Task.create_task(task_data)
+        try:
+            task = Task.create_task(task_data)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': '依赖关系无效',
+                'message': str(e)
+            }), 400
         
         return jsonify({
             'success': True,
@@ -1,8 +1,14 @@
 from flask import Blueprint, request, jsonify
+from datetime import datetime
 from app.models import TimeLog, Task
+from app.utils.pagination import get_page_args, keyset_paginate
+from app.utils.validators import parse_utc_datetime
 
 timer_bp = Blueprint('timer', __name__)
 
+# 批量查询计时器状态时一次最多的任务数
+MAX_STATUS_TASK_IDS = 500
+
 @timer_bp.route('/tasks/<int:task_id>/timer', methods=['POST'])
 def control_timer(task_id):
     """控制任务计时器"""
@@ -74,7 +80,7 @@ def control_timer(task_id):
 
 @timer_bp.route('/tasks/<int:task_id>/time-logs', methods=['GET'])
 def get_task_time_logs(task_id):
-    """获取任务的时间日志"""
+    """获取任务的时间日志，提供limit或cursor参数时按游标分页"""
     try:
         # 检查任务是否存在
         task = Task.get_task_by_id(task_id)
@@ -85,13 +91,38 @@ def get_task_time_logs(task_id):
                 'message': f'ID为{task_id}的任务不存在'
             }), 404
         
-        time_logs = TimeLog.get_time_logs_by_task(task_id)
+        try:
+            page_args = get_page_args()
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': '分页参数无效',
+                'message': str(e)
+            }), 400
+        
+        if page_args is None:
+            time_logs = TimeLog.get_time_logs_by_task(task_id)
+            return jsonify({
+                'success': True,
+                'data': [log.to_dict() for log in time_logs],
+                'count': len(time_logs),
+                'total_time': TimeLog.get_total_time_by_task(task_id)
+            })
+        
+        cursor, limit = page_args
+        time_logs, next_cursor = keyset_paginate(
+            TimeLog.query.filter_by(task_id=task_id), TimeLog.start_time, TimeLog.id,
+            cursor, limit
+        )
         
         return jsonify({
             'success': True,
             'data': [log.to_dict() for log in time_logs],
             'count': len(time_logs),
-            'total_time': TimeLog.get_total_time_by_task(task_id)
+            'total_time': TimeLog.get_total_time_by_task(task_id),
+            'limit': limit,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
         })
     except Exception as e:
         return jsonify({
@@ -112,8 +143,17 @@ def update_time_log(log_id):
                 'message': '请提供要更新的数据'
             }), 400
         
-        # 查找时间日志
-        time_log = TimeLog.query.get(log_id)
+        # 准备更新数据
+        update_data = {}
+        if 'description' in data:
+            update_data['description'] = data['description'].strip() or None
+        if 'start_time' in data:
+            update_data['start_time'] = parse_utc_datetime(data['start_time'])
+        if 'end_time' in data:
+            update_data['end_time'] = parse_utc_datetime(data['end_time'])
+        
+        # 更新时间日志及耗时汇总
+        time_log = TimeLog.update_time_log(log_id, update_data)
         if not time_log:
             return jsonify({
                 'success': False,
@@ -121,21 +161,6 @@ def update_time_log(log_id):
                 'message': f'ID为{log_id}的时间日志不存在'
             }), 404
         
-        # 更新数据
-        if 'description' in data:
-            time_log.description = data['description'].strip() or None
-        
-        if 'start_time' in data:
-            from datetime import datetime
-            time_log.start_time = datetime.fromisoformat(data['start_time'].replace('Z', '+00:00'))
-        
-        if 'end_time' in data:
-            from datetime import datetime
-            time_log.end_time = datetime.fromisoformat(data['end_time'].replace('Z', '+00:00'))
-            time_log.update_duration()
-        
-        db.session.commit()
-        
         return jsonify({
             'success': True,
             'data': time_log.to_dict(),
@@ -143,7 +168,6 @@ def update_time_log(log_id):
         })
         
     except Exception as e:
-        db.session.rollback()
         return jsonify({
             'success': False,
             'error': '更新时间日志失败',
@@ -154,24 +178,19 @@ def update_time_log(log_id):
 def delete_time_log(log_id):
     """删除时间日志"""
     try:
-        time_log = TimeLog.query.get(log_id)
-        if not time_log:
+        if not TimeLog.delete_time_log(log_id):
             return jsonify({
                 'success': False,
                 'error': '时间日志未找到',
                 'message': f'ID为{log_id}的时间日志不存在'
             }), 404
         
-        db.session.delete(time_log)
-        db.session.commit()
-        
         return jsonify({
             'success': True,
             'message': '时间日志删除成功'
         })
         
     except Exception as e:
-        db.session.rollback()
         return jsonify({
             'success': False,
             'error': '删除时间日志失败',
@@ -208,4 +227,49 @@ def get_timer_status(task_id):
             'success': False,
             'error': '获取计时器状态失败',
             'message': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
+
+@timer_bp.route('/timers/running', methods=['GET'])
+def get_running_timers():
+    """
+    获取正在运行的计时器，一次查询返回任务、已运行时间和累计耗时
+
+    查询参数:
+        project_id: 只查询该项目的任务
+        task_ids: 以逗号分隔的任务ID（最多500个），提供时返回每个任务的计时器状态，
+            包括未在计时的任务，用于批量替代 /tasks/<id>/timer/status
+    """
+    try:
+        task_ids = None
+        if request.args.get('task_ids'):
+            try:
+                task_ids = [int(value) for value in request.args['task_ids'].split(',') if value.strip()]
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'error': '任务ID无效',
+                    'message': 'task_ids应为以逗号分隔的整数'
+                }), 400
+            if len(task_ids) > MAX_STATUS_TASK_IDS:
+                return jsonify({
+                    'success': False,
+                    'error': '任务ID过多',
+                    'message': f'一次最多查询{MAX_STATUS_TASK_IDS}个任务'
+                }), 400
+        
+        timers = TimeLog.get_running_timers(
+            project_id=request.args.get('project_id', type=int), task_ids=task_ids
+        )
+        return jsonify({
+            'success': True,
+            'data': timers,
+            'count': len(timers),
+            # 客户端据此在本地继续累加已运行时间
+            'server_time': datetime.utcnow().isoformat()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': '获取运行中的计时器失败',
+            'message': str(e)
+        }), 500
@@ -0,0 +1,129 @@
+"""
+变更推送
+
+change_events 表由写入数据的事务顺带写入（见 app/models/change_event.py），是跨进程
+共享的事件日志。每个进程只有一个轮询线程，按 CHANGE_FEED_POLL_INTERVAL 读取新事件
+并分发到本进程各订阅者的内存队列；本进程提交的事务会立即唤醒它。订阅者只等待
+自己的队列，不占用数据库连接，轮询线程每次查询后也立即归还连接。
+"""
+import queue
+import threading
+
+# 每个订阅者最多积压的事件数，超出时通知客户端重新加载
+SUBSCRIBER_QUEUE_SIZE = 1000
+# 每次轮询最多读取的事件数
+POLL_BATCH_SIZE = 1000
+
+class Subscription:
+    """一个客户端连接的订阅"""
+
+    def __init__(self, project_ids=None):
+        self.project_ids = set(project_ids) if project_ids else None
+        self.queue = queue.Queue(SUBSCRIBER_QUEUE_SIZE)
+        # 积压超出上限，已丢失事件
+        self.overflowed = False
+
+    def wants(self, event):
+        return self.project_ids is None or event['project_id'] in self.project_ids
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        """等待下一条事件，超时返回None"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+class ChangeFeed:
+    """进程内的变更事件分发器，有订阅者时才运行轮询线程"""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.poll_interval = 0.5
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._last_id = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from app.models.change_counter import ChangeCounter
+
+        self.app = app
+        self.poll_interval = app.config['CHANGE_FEED_POLL_INTERVAL']
+        ChangeCounter.on_commit(self._on_commit)
+        app.extensions['change_feed'] = self
+
+    def _on_commit(self, scopes):
+        self._wakeup.set()
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def subscribe(self, project_ids=None):
+        """
+        注册订阅，此后提交的事件都会进入其队列
+
+        Returns:
+            Subscription对象，断开时需调用unsubscribe
+        """
+        from app import db
+        from app.models.change_event import ChangeEvent
+
+        subscription = Subscription(project_ids)
+        with self._lock:
+            self._subscribers.add(subscription)
+            if self._thread is None:
+                # 在返回前确定起点，订阅者随后补发的历史事件与之衔接
+                with db.engine.connect() as conn:
+                    self._last_id = ChangeEvent.latest_id(conn)
+                self._thread = threading.Thread(target=self._run, name='change-feed', daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def poll_once(self):
+        """读取新事件并分发，返回分发的事件数"""
+        from app import db
+        from app.models.change_event import ChangeEvent
+
+        with db.engine.connect() as conn:
+            events = ChangeEvent.fetch_since(conn, self._last_id, limit=POLL_BATCH_SIZE)
+        if events:
+            self._last_id = events[-1]['id']
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for event in events:
+                for subscription in subscribers:
+                    if subscription.wants(event):
+                        subscription.put(event)
+        return len(events)
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                with self._lock:
+                    if not self._subscribers:
+                        # 最后一个订阅者断开后退出，下次订阅时重新启动
+                        self._thread = None
+                        return
+                # 先清除再读取，读取期间提交的事件会再次唤醒
+                self._wakeup.clear()
+                try:
+                    if self.poll_once() >= POLL_BATCH_SIZE:
+                        continue
+                except Exception:
+                    # 数据库暂时不可用时下一轮重试
+                    pass
+                self._wakeup.wait(self.poll_interval)
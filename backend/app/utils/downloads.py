@@ -0,0 +1,92 @@
+"""
+文档下载响应
+
+支持Range/If-Range断点续传（206）、浏览器内联预览，以及由前端代理发送
+文件内容的转发模式（DOCUMENT_SENDFILE_MODE）：
+
+    none:             由Python进程发送文件
+    x-sendfile:       返回X-Sendfile头（Apache mod_xsendfile、lighttpd等）
+    x-accel-redirect: 返回X-Accel-Redirect头（nginx），路径为
+                      DOCUMENT_ACCEL_PREFIX加上相对于上传目录的路径
+
+转发模式下Range请求由代理处理，这里只处理304条件请求。
+"""
+import mimetypes
+import os
+from urllib.parse import quote
+from flask import current_app, request
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+from werkzeug.utils import send_file as werkzeug_send_file
+
+SENDFILE_MODES = ('none', 'x-sendfile', 'x-accel-redirect')
+
+def _apply_cache_headers(response, immutable):
+    """内容按摘要寻址的文件可长期缓存，其他文件每次使用前重新验证"""
+    cache_control = response.cache_control
+    cache_control.public = None
+    if immutable:
+        max_age = current_app.config['DOCUMENT_CACHE_MAX_AGE']
+        cache_control.no_cache = None
+        cache_control.private = True
+        cache_control.max_age = max_age
+        cache_control.immutable = True
+    else:
+        cache_control.private = True
+        cache_control.no_cache = True
+        cache_control.max_age = None
+    response.expires = None
+    return response
+
+def send_stored_file(path, download_name, upload_folder, etag=None, inline=False):
+    """
+    发送已保存的文件
+
+    Args:
+        path: 文件绝对路径
+        download_name: 下载时的文件名
+        upload_folder: 上传目录，用于生成X-Accel-Redirect路径
+        etag: 强ETag（内容摘要），为None时根据修改时间和大小生成
+        inline: True时以inline方式返回，供浏览器直接预览
+
+    Returns:
+        Flask响应
+    """
+    mode = current_app.config['DOCUMENT_SENDFILE_MODE']
+    mimetype = mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+    offload = mode != 'none'
+
+    try:
+        response = werkzeug_send_file(
+            path,
+            request.environ,
+            mimetype=mimetype,
+            as_attachment=not inline,
+            download_name=download_name,
+            conditional=not offload,
+            etag=etag if etag else True,
+            use_x_sendfile=offload,
+            response_class=current_app.response_class,
+            max_age=None
+        )
+    except RequestedRangeNotSatisfiable as e:
+        # 416，附带 Content-Range: bytes */<文件大小>
+        return e.get_response()
+
+    if offload:
+        if mode == 'x-accel-redirect':
+            relative = os.path.relpath(path, upload_folder).replace(os.sep, '/')
+            response.headers.pop('X-Sendfile', None)
+            response.headers['X-Accel-Redirect'] = (
+                current_app.config['DOCUMENT_ACCEL_PREFIX'].rstrip('/') + '/' + quote(relative)
+            )
+        response = response.make_conditional(request.environ)
+        if response.status_code == 304:
+            response.headers.pop('X-Sendfile', None)
+            response.headers.pop('X-Accel-Redirect', None)
+    else:
+        response.accept_ranges = 'bytes'
+
+    if inline:
+        # 内联显示时禁止浏览器猜测内容类型
+        response.headers['X-Content-Type-Options'] = 'nosniff'
+    return _apply_cache_headers(response, immutable=etag is not None)
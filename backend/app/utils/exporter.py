@@ -0,0 +1,90 @@
+"""
+NDJSON数据导出
+
+直接查询表的列（不构造ORM对象），并以yield_per分批从游标读取，
+边读边输出，内存占用与表大小无关。
+"""
+import json
+from datetime import date, datetime
+from app import db
+
+DEFAULT_BATCH_SIZE = 1000
+
+# 导出类型 -> 每行的type字段
+EXPORT_TYPES = {
+    'projects': 'project',
+    'tasks': 'task',
+    'time_logs': 'time_log',
+    'documents': 'document'
+}
+
+def _build_statement(kind, project_id=None, since=None, until=None):
+    """构建导出查询，按主键顺序输出"""
+    from app.models import Project, Task, TimeLog, Document
+
+    if kind == 'projects':
+        table = Project.__table__
+        stmt = db.select(table)
+        if project_id:
+            stmt = stmt.where(table.c.id == project_id)
+        time_column = table.c.updated_at
+    elif kind == 'tasks':
+        table = Task.__table__
+        stmt = db.select(table)
+        if project_id:
+            stmt = stmt.where(table.c.project_id == project_id)
+        time_column = table.c.updated_at
+    elif kind == 'time_logs':
+        table = TimeLog.__table__
+        stmt = db.select(table)
+        if project_id:
+            stmt = stmt.join(Task.__table__, Task.__table__.c.id == table.c.task_id) \
+                .where(Task.__table__.c.project_id == project_id)
+        time_column = table.c.start_time
+    elif kind == 'documents':
+        table = Document.__table__
+        # 服务器上的文件路径不对外导出
+        columns = [column for column in table.c if column.key != 'file_path']
+        stmt = db.select(*columns)
+        if project_id:
+            stmt = stmt.join(Task.__table__, Task.__table__.c.id == table.c.task_id) \
+                .where(Task.__table__.c.project_id == project_id)
+        time_column = table.c.upload_date
+    else:
+        raise ValueError(f'不支持的导出类型: {kind}')
+
+    if since:
+        stmt = stmt.where(time_column >= since)
+    if until:
+        stmt = stmt.where(time_column < until)
+    return stmt.order_by(table.c.id)
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'无法序列化的类型: {type(value).__name__}')
+
+def iter_ndjson(kinds, project_id=None, since=None, until=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    按顺序导出多个类型的数据
+
+    Args:
+        kinds: 导出类型列表（projects、tasks、time_logs、documents）
+        project_id: 只导出该项目的数据
+        since/until: 时间范围 [since, until)，项目和任务按updated_at，
+            时间日志按start_time，文档按upload_date筛选
+        batch_size: 每批从数据库读取的行数
+
+    Yields:
+        每批数据拼接成的NDJSON文本
+    """
+    for kind in kinds:
+        record_type = EXPORT_TYPES[kind]
+        stmt = _build_statement(kind, project_id, since, until)
+        result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+        for partition in result.mappings().partitions():
+            yield ''.join(
+                json.dumps({'type': record_type, **row}, ensure_ascii=False, default=_json_default) + '\n'
+                for row in partition
+            )
+        result.close()
@@ -0,0 +1,83 @@
+from functools import wraps
+import time
+from datetime import timezone
+from urllib.parse import urlencode
+from flask import request, make_response, current_app
+from app.utils.response_cache import CacheEntry
+
+def _not_modified(etag, last_modified):
+    """根据If-None-Match / If-Modified-Since判断客户端缓存是否仍然有效"""
+    # 同时提供时以If-None-Match为准
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified:
+        last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+        return last_modified <= request.if_modified_since
+    return False
+
+def _set_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # 允许缓存但每次使用前需要重新验证
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def _cache_key():
+    """缓存键：路由路径加排序后的查询参数"""
+    args = sorted(request.args.items(multi=True))
+    return f'{request.path}?{urlencode(args)}' if args else request.path
+
+def conditional_get(scopes, ttl=None, vary=None):
+    """
+    为GET接口提供基于变更计数器的条件请求支持
+
+    内容未变化时直接返回304，不执行视图函数，也不加载或序列化数据；
+    客户端没有可用缓存时优先返回服务端响应缓存中ETag一致的响应体
+
+    Args:
+        scopes: 响应依赖的变更范围列表，或接收视图参数、返回范围列表的函数
+        ttl: 响应还随时间变化（如逾期统计）时的有效秒数，ETag每隔ttl秒更换一次
+        vary: 接收视图参数、返回附加键的函数，响应取决于请求参数以外的值
+            （如默认日期范围取决于当天日期）时用它区分，返回空字符串表示无附加键
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            from app.models import ChangeCounter
+
+            view_scopes = scopes(**kwargs) if callable(scopes) else scopes
+            # 与服务端缓存使用同一个键（查询参数排序），参数顺序不同的请求得到相同的ETag
+            key = validator_key = _cache_key()
+            extra_key = vary(**kwargs) if vary else ''
+            if extra_key:
+                validator_key = f'{key}|{extra_key}'
+            if ttl:
+                validator_key = f'{validator_key}|{int(time.time() // ttl)}'
+            etag, last_modified = ChangeCounter.get_validators(view_scopes, key=validator_key)
+            if ttl or extra_key:
+                # 数据未变时内容也可能已过期，不能按修改时间判断
+                last_modified = None
+
+            if _not_modified(etag, last_modified):
+                return _set_validators(make_response('', 304), etag, last_modified)
+
+            cache = current_app.extensions.get('response_cache')
+            entry = cache.get(key, etag) if cache is not None else None
+            if entry is not None:
+                response = make_response(entry.body, entry.status)
+                response.mimetype = entry.mimetype
+                response.headers['X-Cache'] = 'HIT'
+                return _set_validators(response, etag, last_modified)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                _set_validators(response, etag, last_modified)
+                if cache is not None:
+                    # 以变更范围作为标签，相关数据提交后即被淘汰
+                    cache.set(key, CacheEntry(etag, response.status_code, response.mimetype,
+                                              response.get_data()), view_scopes, ttl)
+                    response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,388 @@
+"""
+任务/项目批量导入
+
+从JSON Lines或CSV流中逐行解析，按块校验并用executemany方式批量插入。
+整个导入在一个专用数据库连接上进行，每块提交一次；任务之间的依赖
+（depends_on引用同一文件中其他行的ref）先记录在临时表中，全部插入后
+再用一条UPDATE统一解析。内存占用只与块大小有关，与文件大小无关。
+"""
+import csv
+import io
+import json
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import func, select, text
+from app import db
+from app.models.task import POSITION_GAP
+from app.utils.validators import validate_task_data, validate_project_data, parse_utc_datetime
+
+DEFAULT_CHUNK_SIZE = 1000
+# 每块行数上限，整块在提交前缓存在内存中
+MAX_CHUNK_SIZE = 10000
+
+def detect_format(fmt=None, content_type=None):
+    """确定导入格式，返回 'csv' 或 'jsonl'"""
+    if fmt:
+        fmt = fmt.lower()
+        if fmt in ('csv', 'jsonl', 'ndjson'):
+            return 'csv' if fmt == 'csv' else 'jsonl'
+        raise ValueError('导入格式必须是csv或jsonl')
+    if content_type and 'csv' in content_type:
+        return 'csv'
+    return 'jsonl'
+
+def iter_records(stream, fmt):
+    """
+    逐行解析二进制流
+
+    Yields:
+        (行号, 记录dict或None, 错误信息或None)
+    """
+    text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text_stream)
+        for record in reader:
+            # 空字符串视为未提供
+            yield reader.line_num, {
+                key: (value if value != '' else None)
+                for key, value in record.items() if key is not None
+            }, None
+        return
+
+    for line_no, line in enumerate(text_stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, None, f'JSON格式错误: {e.msg}'
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, '每行必须是一个JSON对象'
+            continue
+        yield line_no, record, None
+
+def _chunks(records, chunk_size):
+    chunk = []
+    for item in records:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _as_text(value):
+    if value is None:
+        return None
+    return str(value).strip() or None
+
+def _as_int(value):
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _prepare_task(record, default_project_id):
+    """校验并转换一行任务数据，返回 (插入数据, 依赖ref, 错误列表)"""
+    data = dict(record)
+    data['project_id'] = _as_int(data.get('project_id')) or default_project_id
+    for key in ('title', 'description', 'assignee', 'status', 'priority', 'start_time', 'end_time'):
+        data[key] = _as_text(data.get(key))
+
+    errors = validate_task_data(data)
+    if errors:
+        return None, None, errors
+
+    row = {
+        'project_id': data['project_id'],
+        'title': data['title'],
+        'description': data['description'],
+        'status': data['status'] or 'todo',
+        'assignee': data['assignee'],
+        'priority': data['priority'] or 'medium',
+        'start_time': parse_utc_datetime(data['start_time']) if data['start_time'] else None,
+        'end_time': parse_utc_datetime(data['end_time']) if data['end_time'] else None
+    }
+    return row, _as_text(record.get('depends_on')), []
+
+def _prepare_project(record):
+    """校验并转换一行项目数据，返回 (插入数据, 错误列表)"""
+    data = {key: _as_text(record.get(key)) for key in ('name', 'description', 'start_date', 'end_date')}
+    errors = validate_project_data(data)
+    if errors:
+        return None, errors
+    return {
+        'name': data['name'],
+        'description': data['description'],
+        'start_date': datetime.strptime(data['start_date'], '%Y-%m-%d').date(),
+        'end_date': datetime.strptime(data['end_date'], '%Y-%m-%d').date()
+    }, []
+
+def _create_ref_tables(conn):
+    conn.execute(text(
+        'CREATE TEMPORARY TABLE IF NOT EXISTS import_refs '
+        '(ref TEXT PRIMARY KEY, task_id INTEGER NOT NULL)'
+    ))
+    conn.execute(text(
+        'CREATE TEMPORARY TABLE IF NOT EXISTS import_pending '
+        '(task_id INTEGER PRIMARY KEY, depends_on_ref TEXT NOT NULL, line_no INTEGER)'
+    ))
+    conn.execute(text('DELETE FROM import_refs'))
+    conn.execute(text('DELETE FROM import_pending'))
+
+def _drop_ref_tables(conn):
+    conn.execute(text('DROP TABLE IF EXISTS import_refs'))
+    conn.execute(text('DROP TABLE IF EXISTS import_pending'))
+    conn.commit()
+
+def _find_cycles(conn):
+    """
+    找出本次导入中处于循环依赖上的任务
+
+    先从依赖链的起点（所依赖的任务没有依赖）沿ix_tasks_depends_on向下游遍历，
+    能到达的任务不在循环上，每个任务只访问一次；剩余的少数任务与
+    Task.would_create_cycle相同，沿depends_on向上游递归查找，能回到自身即
+    处于循环上，按（起点、任务）去重，遇到已有数据中的循环也能终止
+
+    Returns:
+        [(行号, 任务ID, 所依赖的任务ID), ...]，按行号排序
+    """
+    return conn.execute(text(
+        'WITH RECURSIVE reached(id) AS ('
+        '    SELECT t.id FROM tasks t'
+        '    JOIN import_pending p ON p.task_id = t.id'
+        '    JOIN tasks d ON d.id = t.depends_on'
+        '    WHERE d.depends_on IS NULL'
+        '    UNION'
+        '    SELECT t.id FROM reached r JOIN tasks t ON t.depends_on = r.id'
+        '), '
+        'walk(start, id) AS ('
+        '    SELECT t.id, t.depends_on FROM tasks t'
+        '    JOIN import_pending p ON p.task_id = t.id'
+        '    WHERE t.depends_on IS NOT NULL AND t.id NOT IN (SELECT id FROM reached)'
+        '    UNION'
+        '    SELECT w.start, t.depends_on FROM walk w'
+        '    JOIN tasks t ON t.id = w.id'
+        '    WHERE t.depends_on IS NOT NULL AND w.id != w.start'
+        ') '
+        'SELECT p.line_no, t.id, t.depends_on FROM tasks t '
+        'JOIN import_pending p ON p.task_id = t.id '
+        'WHERE t.id IN (SELECT start FROM walk WHERE id = start) '
+        'ORDER BY p.line_no'
+    )).all()
+
+def _resolve_dependencies(conn):
+    """
+    第二遍：根据ref解析依赖
+
+    形成循环依赖的任务不设置依赖，与创建、修改任务时的校验一致
+
+    Returns:
+        (已解析数量, 未解析的ref列表, 循环依赖的行[(行号, 任务ID, 所依赖的任务ID)])
+    """
+    from app.models import ChangeCounter
+
+    resolved = conn.execute(text(
+        'UPDATE tasks SET depends_on = ('
+        '    SELECT r.task_id FROM import_pending p'
+        '    JOIN import_refs r ON r.ref = p.depends_on_ref'
+        '    WHERE p.task_id = tasks.id'
+        ') '
+        'WHERE id IN ('
+        '    SELECT p.task_id FROM import_pending p'
+        '    JOIN import_refs r ON r.ref = p.depends_on_ref'
+        ')'
+    )).rowcount
+    unresolved = conn.execute(text(
+        'SELECT DISTINCT p.depends_on_ref FROM import_pending p '
+        'LEFT JOIN import_refs r ON r.ref = p.depends_on_ref '
+        'WHERE r.task_id IS NULL LIMIT 100'
+    )).scalars().all()
+    cycles = _find_cycles(conn) if resolved else []
+    if cycles:
+        conn.execute(
+            text('UPDATE tasks SET depends_on = NULL WHERE id = :task_id'),
+            [{'task_id': task_id} for _, task_id, _ in cycles]
+        )
+        resolved -= len(cycles)
+    if resolved or cycles:
+        ChangeCounter.bump(['tasks'], connection=conn)
+    conn.commit()
+    return resolved, unresolved, cycles
+
+def import_tasks(stream, fmt, project_id=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    流式导入任务
+
+    每行字段与创建任务接口一致，另外支持：
+        ref: 本行在导入文件中的标识
+        depends_on: 所依赖任务的ref
+
+    Args:
+        stream: 二进制输入流
+        fmt: 'csv' 或 'jsonl'
+        project_id: 行中未指定project_id时使用的项目
+        chunk_size: 每块行数
+
+    Yields:
+        进度事件dict：error（单行错误）、progress（每块完成）、done（全部完成）；
+        依赖形成循环的任务仍会导入但不设置依赖，在done之前逐行报告error
+    """
+    from app.models import Project, Task, ChangeCounter, ChangeEvent
+
+    tasks_table = Task.__table__
+    processed = imported = failed = 0
+    known_projects = set()
+    column_ends = {}
+
+    with db.engine.connect() as conn:
+        try:
+            _create_ref_tables(conn)
+
+            for chunk in _chunks(iter_records(stream, fmt), chunk_size):
+                prepared = []
+                for line_no, record, error in chunk:
+                    processed += 1
+                    if error:
+                        failed += 1
+                        yield {'event': 'error', 'line': line_no, 'errors': [error]}
+                        continue
+                    row, depends_on_ref, errors = _prepare_task(record, project_id)
+                    if errors:
+                        failed += 1
+                        yield {'event': 'error', 'line': line_no, 'errors': errors}
+                        continue
+                    prepared.append((line_no, row, _as_text(record.get('ref')), depends_on_ref))
+
+                # 一次查询校验本块涉及的项目
+                new_projects = {row['project_id'] for _, row, _, _ in prepared} - known_projects
+                if new_projects:
+                    known_projects.update(conn.execute(
+                        select(Project.__table__.c.id).where(Project.__table__.c.id.in_(new_projects))
+                    ).scalars())
+
+                rows, refs, pending = [], [], []
+                for line_no, row, ref, depends_on_ref in prepared:
+                    if row['project_id'] not in known_projects:
+                        failed += 1
+                        yield {'event': 'error', 'line': line_no,
+                               'errors': [f'ID为{row["project_id"]}的项目不存在']}
+                        continue
+
+                    # 追加到看板列末尾
+                    column = (row['project_id'], row['status'])
+                    if column not in column_ends:
+                        column_ends[column] = conn.execute(
+                            select(func.max(tasks_table.c.position)).where(
+                                tasks_table.c.project_id == row['project_id'],
+                                tasks_table.c.status == row['status']
+                            )
+                        ).scalar() or 0
+                    column_ends[column] += POSITION_GAP
+                    row['position'] = column_ends[column]
+
+                    rows.append(row)
+                    refs.append(ref)
+                    pending.append((depends_on_ref, line_no))
+
+                if rows:
+                    task_ids = conn.execute(
+                        tasks_table.insert().returning(tasks_table.c.id, sort_by_parameter_order=True),
+                        rows
+                    ).scalars().all()
+
+                    ref_rows = [
+                        {'ref': ref, 'task_id': task_id}
+                        for ref, task_id in zip(refs, task_ids) if ref is not None
+                    ]
+                    if ref_rows:
+                        conn.execute(
+                            text('INSERT OR REPLACE INTO import_refs (ref, task_id) VALUES (:ref, :task_id)'),
+                            ref_rows
+                        )
+                    pending_rows = [
+                        {'task_id': task_id, 'depends_on_ref': ref, 'line_no': line_no}
+                        for (ref, line_no), task_id in zip(pending, task_ids) if ref is not None
+                    ]
+                    if pending_rows:
+                        conn.execute(
+                            text('INSERT INTO import_pending (task_id, depends_on_ref, line_no) '
+                                 'VALUES (:task_id, :depends_on_ref, :line_no)'),
+                            pending_rows
+                        )
+                    imported += len(rows)
+                    ChangeCounter.bump(
+                        ['tasks'] + [ChangeCounter.project_scope(row['project_id']) for row in rows],
+                        connection=conn
+                    )
+                    # 每个项目一条汇总事件，客户端收到后重新加载任务列表
+                    counts = Counter(row['project_id'] for row in rows)
+                    ChangeEvent.record([
+                        ChangeEvent.make(ChangeEvent.TYPE_TASK, 'imported', project_id=project_id, count=count)
+                        for project_id, count in sorted(counts.items())
+                    ], connection=conn)
+
+                conn.commit()
+                yield {'event': 'progress', 'processed': processed, 'imported': imported, 'failed': failed}
+
+            resolved, unresolved, cycles = _resolve_dependencies(conn)
+        finally:
+            conn.rollback()
+            _drop_ref_tables(conn)
+
+    for line_no, task_id, depends_on in cycles:
+        yield {'event': 'error', 'line': line_no, 'task_id': task_id,
+               'errors': [f'任务{task_id}依赖任务{depends_on}会形成循环依赖，已导入但未设置依赖']}
+    yield {
+        'event': 'done',
+        'processed': processed,
+        'imported': imported,
+        'failed': failed,
+        'dependencies_resolved': resolved,
+        'dependency_cycles': len(cycles),
+        'unresolved_refs': unresolved
+    }
+
+def import_projects(stream, fmt, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    流式导入项目，每行字段与创建项目接口一致
+
+    Yields:
+        进度事件dict，同import_tasks
+    """
+    from app.models import Project, ChangeCounter, ChangeEvent
+
+    projects_table = Project.__table__
+    processed = imported = failed = 0
+
+    with db.engine.connect() as conn:
+        for chunk in _chunks(iter_records(stream, fmt), chunk_size):
+            rows = []
+            for line_no, record, error in chunk:
+                processed += 1
+                if error:
+                    failed += 1
+                    yield {'event': 'error', 'line': line_no, 'errors': [error]}
+                    continue
+                row, errors = _prepare_project(record)
+                if errors:
+                    failed += 1
+                    yield {'event': 'error', 'line': line_no, 'errors': errors}
+                    continue
+                rows.append(row)
+
+            if rows:
+                conn.execute(projects_table.insert(), rows)
+                ChangeCounter.bump(['projects'], connection=conn)
+                ChangeEvent.record(
+                    [ChangeEvent.make(ChangeEvent.TYPE_PROJECT, 'imported', count=len(rows))], connection=conn
+                )
+                imported += len(rows)
+            conn.commit()
+            yield {'event': 'progress', 'processed': processed, 'imported': imported, 'failed': failed}
+
+    yield {'event': 'done', 'processed': processed, 'imported': imported, 'failed': failed}
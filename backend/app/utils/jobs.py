@@ -0,0 +1,193 @@
+"""
+后台任务处理
+
+处理函数通过 job_handler 注册，JobWorker 以若干线程轮询 jobs 表领取执行。
+工作线程可以随应用进程启动（JOB_WORKER_MODE=embedded，首个请求时启动），
+也可以用 `flask worker` 单独运行（JOB_WORKER_MODE=external）。
+"""
+import os
+import shutil
+import socket
+import threading
+import traceback
+import uuid
+
+JOB_HANDLERS = {}
+
+def job_handler(kind):
+    """注册任务处理函数，函数接收payload dict"""
+    def decorator(func):
+        JOB_HANDLERS[kind] = func
+        return func
+    return decorator
+
+class JobWorker:
+    """后台任务工作线程池"""
+
+    def __init__(self, app, threads=2, poll_interval=1.0, stale_timeout=600):
+        self.app = app
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.stale_timeout = stale_timeout
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._threads = []
+
+    def wake(self):
+        self._wakeup.set()
+
+    def start(self):
+        from app.models.job import on_enqueue
+
+        on_enqueue(self.wake)
+        for index in range(self.threads):
+            thread = threading.Thread(
+                target=self._run, args=(f'{self.worker_id}/{index}',),
+                name=f'job-worker-{index}', daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def run_once(self, worker_id=None):
+        """领取并执行一个任务，没有到期任务时返回False"""
+        from app.models.job import Job
+
+        claimed = Job.claim(worker_id or self.worker_id)
+        if claimed is None:
+            return False
+        job_id, kind, payload, attempts, max_attempts = claimed
+        try:
+            handler = JOB_HANDLERS.get(kind)
+            if handler is None:
+                raise LookupError(f'未注册的任务类型: {kind}')
+            handler(payload)
+        except Exception:
+            from app import db
+            db.session.rollback()
+            Job.fail(job_id, attempts, max_attempts, traceback.format_exc(limit=5))
+        else:
+            Job.complete(job_id)
+        return True
+
+    def _run(self, worker_id):
+        from app import db
+        from app.models.job import Job
+
+        with self.app.app_context():
+            idle_rounds = 0
+            while not self._stop.is_set():
+                try:
+                    if self.run_once(worker_id):
+                        idle_rounds = 0
+                        continue
+                    # 空闲时顺带回收失联的任务
+                    idle_rounds += 1
+                    if idle_rounds % 60 == 1:
+                        Job.requeue_stale(self.stale_timeout)
+                except Exception:
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+def start_embedded_worker(app):
+    """在应用进程内启动工作线程（只启动一次）"""
+    worker = app.extensions.get('job_worker')
+    if worker is None:
+        worker = JobWorker(
+            app,
+            threads=app.config['JOB_WORKER_THREADS'],
+            poll_interval=app.config['JOB_POLL_INTERVAL']
+        )
+        app.extensions['job_worker'] = worker
+        worker.start()
+    return worker
+
+def _remove_path(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(path):
+        os.remove(path)
+
+@job_handler('delete_files')
+def delete_files(payload):
+    """删除文件或目录：{'paths': [...]}"""
+    for path in payload.get('paths', []):
+        _remove_path(path)
+
+@job_handler('collect_blobs')
+def collect_blobs(payload):
+    """
+    回收引用数为0的blob及其预览图、提取的文本：{'hashes': [...]}
+
+    每个blob先删除记录再删除文件并提交：DELETE取得写锁后，同一内容的并发
+    上传会等待本事务结束再登记引用，不会复用即将被删除的文件；
+    期间重新被引用的blob不会被删除
+    """
+    from app import db, preview_generator
+    from app.models.blob import Blob
+    from app.models.document_text import DocumentText
+
+    for sha256 in payload.get('hashes', []):
+        try:
+            path = db.session.execute(
+                db.delete(Blob).where(Blob.sha256 == sha256, Blob.ref_count <= 0).returning(Blob.path)
+            ).scalar()
+            if path:
+                db.session.execute(db.delete(DocumentText).where(DocumentText.sha256 == sha256))
+            if path and os.path.exists(path):
+                os.remove(path)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise e
+        if path:
+            preview_generator.remove(sha256)
+
+@job_handler('render_preview')
+def render_preview(payload):
+    """生成预览图：{'key', 'path', 'file_type'}"""
+    from app import preview_generator
+    from app.utils.previews import PreviewError
+
+    try:
+        preview_generator.render(payload['key'], payload['path'], payload['file_type'])
+    except PreviewError:
+        # 文件无法解析，重试也不会成功；请求预览时会返回具体错误
+        pass
+
+@job_handler('extract_text')
+def extract_text(payload):
+    """
+    提取文档文本并写入全文索引：{'sha256', 'path', 'file_type'}
+
+    已提取过的内容直接跳过；文件无法解析或超出资源限制时记录为failed，不重试
+    """
+    from flask import current_app
+    from app.models.document_text import DocumentText
+    from app.utils.text_extract import ExtractionError, run_extraction
+
+    sha256 = payload['sha256']
+    if DocumentText.is_extracted(sha256):
+        return
+    config = current_app.config
+    try:
+        content = run_extraction(
+            payload['path'], payload['file_type'],
+            max_chars=config['TEXT_EXTRACT_MAX_CHARS'],
+            cpu_seconds=config['TEXT_EXTRACT_CPU_SECONDS'],
+            memory_mb=config['TEXT_EXTRACT_MEMORY_MB']
+        )
+    except ExtractionError as e:
+        status = DocumentText.STATUS_UNSUPPORTED if e.unsupported else DocumentText.STATUS_FAILED
+        DocumentText.save(sha256, status, error=str(e))
+        return
+    DocumentText.save(sha256, DocumentText.STATUS_DONE, content=content)
@@ -0,0 +1,92 @@
+import base64
+import json
+from datetime import datetime
+from flask import request
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(sort_value, row_id):
+    """将排序键编码为不透明的游标字符串"""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """解析游标，返回 (排序值, ID)，游标无效时抛出ValueError"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise ValueError('无效的分页游标')
+
+def get_page_args():
+    """
+    从查询参数中读取分页参数
+
+    Returns:
+        未提供limit和cursor时返回None（不分页），否则返回 (cursor, limit)
+
+    Raises:
+        ValueError: 参数无效
+    """
+    cursor = request.args.get('cursor') or None
+    limit = request.args.get('limit')
+    if cursor is None and limit is None:
+        return None
+
+    if limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError('limit必须是整数')
+        if limit < 1:
+            raise ValueError('limit必须大于0')
+        limit = min(limit, MAX_PAGE_SIZE)
+
+    if cursor is not None:
+        decode_cursor(cursor)
+
+    return cursor, limit
+
+def keyset_paginate(query, sort_column, id_column, cursor=None, limit=DEFAULT_PAGE_SIZE, key=None):
+    """
+    基于 (排序列, ID) 的游标分页，按倒序返回一页数据
+
+    与OFFSET分页不同，游标条件直接定位到索引中的位置，
+    翻到再深的页也只需读取一页的数据
+
+    Args:
+        query: SQLAlchemy查询
+        sort_column: 排序列（如created_at）
+        id_column: 主键列，用于排序值相同时的稳定排序
+        cursor: 上一页返回的next_cursor
+        limit: 每页数量
+        key: 从结果行中取出模型对象的函数，默认为结果行本身
+
+    Returns:
+        (当前页结果列表, next_cursor)，没有更多数据时next_cursor为None
+    """
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor)
+        query = query.filter(tuple_(sort_column, id_column) < tuple_(sort_value, last_id))
+
+    rows = query.order_by(None) \
+        .order_by(sort_column.desc(), id_column.desc()) \
+        .limit(limit + 1) \
+        .all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = key(rows[-1]) if key else rows[-1]
+        next_cursor = encode_cursor(
+            getattr(last, sort_column.key),
+            getattr(last, id_column.key)
+        )
+    return rows, next_cursor
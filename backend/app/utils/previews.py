@@ -0,0 +1,169 @@
+"""
+文档预览图生成
+
+上传时添加render_preview后台任务（见 app/utils/jobs.py），png/jpg/gif生成
+缩略图，pdf渲染第一页。每个文档一次解码生成全部尺寸，以JPEG保存在预览目录中，按内容
+摘要（旧文档按文档ID）命名，相同内容只渲染一次。请求的预览尚未生成、
+已被清理或渲染失败时按需重新生成。
+
+PDF渲染依赖可选的pypdfium2，未安装时尝试poppler的pdftoppm命令，
+两者都不可用时PDF不提供预览。
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+import uuid
+
+from PIL import Image
+
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+PREVIEW_SIZES = {'small': 128, 'medium': 512, 'large': 1024}
+IMAGE_TYPES = {'png', 'jpg', 'jpeg', 'gif'}
+PDF_TYPES = {'pdf'}
+JPEG_QUALITY = 85
+PDF_RENDER_TIMEOUT = 60  # 秒
+
+class PreviewError(Exception):
+    """无法生成预览"""
+
+def pdf_supported():
+    return pypdfium2 is not None or shutil.which('pdftoppm') is not None
+
+def is_previewable(file_type):
+    """该类型的文件是否可以生成预览"""
+    file_type = (file_type or '').lower()
+    if file_type in IMAGE_TYPES:
+        return True
+    if file_type in PDF_TYPES:
+        return pdf_supported()
+    return False
+
+def preview_key(document):
+    """预览缓存键：内容摘要，未迁移到blob存储的旧文档使用文档ID"""
+    return document.blob_sha256 or f'document-{document.id}'
+
+def _load_image(source_path, file_type, largest):
+    if file_type in IMAGE_TYPES:
+        image = Image.open(source_path)
+        # JPEG可在解码时直接按比例缩小，减少大图的内存和耗时
+        image.draft('RGB', (largest, largest))
+        image.seek(0)  # GIF取第一帧
+        image.load()
+        return image
+
+    if pypdfium2 is not None:
+        pdf = pypdfium2.PdfDocument(source_path)
+        try:
+            page = pdf[0]
+            width, height = page.get_size()
+            return page.render(scale=largest / max(width, height, 1)).to_pil()
+        finally:
+            pdf.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        prefix = os.path.join(tmp, 'page')
+        subprocess.run(
+            ['pdftoppm', '-f', '1', '-l', '1', '-singlefile', '-png',
+             '-scale-to', str(largest), source_path, prefix],
+            check=True, capture_output=True, timeout=PDF_RENDER_TIMEOUT
+        )
+        image = Image.open(prefix + '.png')
+        image.load()
+        return image
+
+def render_previews(source_path, file_type, output_dir):
+    """
+    一次解码生成全部尺寸的预览图
+
+    Args:
+        source_path: 原文件路径
+        file_type: 文件扩展名
+        output_dir: 输出目录，生成 <尺寸名>.jpg
+    """
+    file_type = (file_type or '').lower()
+    if not is_previewable(file_type):
+        raise PreviewError(f'不支持预览{file_type}文件')
+
+    largest = max(PREVIEW_SIZES.values())
+    try:
+        image = _load_image(source_path, file_type, largest)
+    except (OSError, subprocess.SubprocessError, ValueError, Image.DecompressionBombError) as e:
+        raise PreviewError(f'无法读取文件: {e}')
+
+    # 透明背景合成到白色上
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    os.makedirs(output_dir, exist_ok=True)
+    # 从大到小依次缩放，每一步都基于上一步的结果
+    for name, size in sorted(PREVIEW_SIZES.items(), key=lambda item: -item[1]):
+        image.thumbnail((size, size), Image.LANCZOS)
+        tmp_path = os.path.join(output_dir, f'.{name}.{uuid.uuid4().hex}.jpg')
+        image.save(tmp_path, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+        os.replace(tmp_path, os.path.join(output_dir, f'{name}.jpg'))
+
+class PreviewGenerator:
+    """预览图生成器：上传时提交后台任务渲染，请求时缺失则当场生成"""
+
+    def __init__(self, app=None):
+        self.preview_root = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.preview_root = app.config['PREVIEW_FOLDER']
+        app.extensions['preview_generator'] = self
+
+    def preview_dir(self, key):
+        return os.path.join(self.preview_root, key)
+
+    def preview_path(self, key, size):
+        return os.path.join(self.preview_dir(key), f'{size}.jpg')
+
+    def exists(self, key):
+        # 最小尺寸最后写入，存在即表示全部尺寸已生成
+        return os.path.exists(self.preview_path(key, 'small'))
+
+    def render(self, key, source_path, file_type):
+        """生成预览图，已存在时跳过"""
+        if not self.exists(key):
+            render_previews(source_path, file_type, self.preview_dir(key))
+
+    def enqueue(self, key, source_path, file_type):
+        """
+        添加后台渲染任务，不提交事务
+
+        Returns:
+            Job对象；不支持的类型或预览已存在时返回None
+        """
+        from app.models.job import Job
+
+        if not is_previewable(file_type) or self.exists(key):
+            return None
+        return Job.enqueue('render_preview', {'key': key, 'path': source_path, 'file_type': file_type})
+
+    def get(self, key, size, source_path, file_type):
+        """
+        获取预览图路径，后台任务尚未完成时当场生成
+
+        Raises:
+            PreviewError: 不支持预览或渲染失败
+        """
+        path = self.preview_path(key, size)
+        if not os.path.exists(path):
+            render_previews(source_path, file_type, self.preview_dir(key))
+        return path
+
+    def remove(self, key):
+        """删除某内容的全部预览图"""
+        shutil.rmtree(self.preview_dir(key), ignore_errors=True)
@@ -0,0 +1,49 @@
+from app import db
+
+def explain_query_plan(query):
+    """
+    获取查询的SQLite执行计划
+
+    Args:
+        query: SQLAlchemy查询或select语句
+
+    Returns:
+        执行计划中每一步的描述列表
+    """
+    statement = getattr(query, 'statement', query)
+    # 展开IN列表等延迟渲染的参数
+    compiled = statement.compile(dialect=db.engine.dialect, compile_kwargs={'render_postcompile': True})
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    with db.engine.connect() as conn:
+        rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', params).fetchall()
+    return [row[-1] for row in rows]
+
+def find_plan_problems(plan):
+    """找出执行计划中的全表扫描和临时排序"""
+    problems = []
+    for step in plan:
+        if step.startswith('SCAN') and 'USING' not in step:
+            problems.append(step)
+        elif 'USE TEMP B-TREE' in step:
+            problems.append(step)
+    return problems
+
+def hot_queries():
+    """需要保证走索引的热点查询，返回 [(名称, 查询), ...]"""
+    from app.models import Project, Task, TimeLog, Document
+
+    return [
+        ('任务列表（全部）', Task.query_tasks().limit(50)),
+        ('任务列表（按项目）', Task.query_tasks(project_id=1).limit(50)),
+        ('任务列表（按状态）', Task.query_tasks(status='todo').limit(50)),
+        ('任务列表（按项目+状态）', Task.query_tasks(project_id=1, status='todo').limit(50)),
+        ('任务列表关联统计', Task.with_related(Task.query_tasks(project_id=1)).limit(50)),
+        ('正在运行的计时器', TimeLog.query.filter_by(task_id=1, end_time=None)),
+        ('全部运行中的计时器', TimeLog.query_running_timers()),
+        ('批量计时器状态', TimeLog.query_running_timers(task_ids=[1, 2, 3])),
+        ('任务时间日志', TimeLog.query.filter_by(task_id=1).order_by(TimeLog.start_time.desc())),
+        ('任务文档', Document.query.filter_by(task_id=1).order_by(Document.upload_date.desc())),
+        ('项目列表', Project.query.order_by(Project.created_at.desc()).limit(50)),
+        ('仪表盘任务统计', Task.summary_query()),
+        ('仪表盘任务统计（按项目）', Task.summary_query(project_id=1)),
+    ]
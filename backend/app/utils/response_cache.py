@@ -0,0 +1,365 @@
+"""
+服务端响应缓存
+
+缓存GET接口序列化后的响应体，按路由和查询参数区分，并以变更范围
+（见ChangeCounter）作为标签。包含变更的事务提交时按标签精确淘汰；
+读取时还会核对条目保存时的ETag与当前ETag是否一致，因此即使其他
+进程中的内存缓存没有收到淘汰通知，也不会返回过期数据。
+
+后端：
+    memory: 进程内LRU，支持TTL、条目数和总字节数上限
+    sqlite: 基于SQLite文件的共享缓存，同一主机上的多个工作进程共用
+    none:   不缓存
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+CacheEntry = namedtuple('CacheEntry', ['etag', 'status', 'mimetype', 'body'])
+
+# 标签'*'表示全部条目
+ALL_TAGS = '*'
+
+class NullCacheBackend:
+    """不缓存任何内容"""
+    name = 'none'
+
+    def __init__(self):
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return None
+
+    def set(self, key, entry, tags, ttl=None):
+        pass
+
+    def delete(self, key):
+        return False
+
+    def evict(self, key):
+        return False
+
+    def invalidate_tags(self, tags):
+        return 0
+
+    def clear(self):
+        return 0
+
+    def size(self):
+        return 0
+
+class MemoryCacheBackend:
+    """进程内LRU缓存"""
+    name = 'memory'
+
+    def __init__(self, max_entries=1000, max_bytes=64 * 1024 * 1024, default_ttl=300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (entry, expires_at, tags)
+        self._tags = {}  # tag -> set(key)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _remove(self, key):
+        entry, _, tags = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            entry, expires_at, _ = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry, tags, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        if len(entry.body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            expires_at = time.monotonic() + ttl if ttl else None
+            self._entries[key] = (entry, expires_at, frozenset(tags))
+            self._bytes += len(entry.body)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def evict(self, key):
+        """删除条目并计入淘汰数"""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            self.evictions += 1
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+
+    def invalidate_tags(self, tags):
+        if ALL_TAGS in tags:
+            return self.clear()
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys.update(self._tags.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            self.evictions += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._tags.clear()
+            self._bytes = 0
+            self.evictions += count
+            return count
+
+    def size(self):
+        return len(self._entries)
+
+class SQLiteCacheBackend:
+    """基于SQLite文件的共享缓存，每个线程使用独立连接"""
+    name = 'sqlite'
+
+    def __init__(self, path, max_entries=10000, default_ttl=300):
+        self.path = path
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.evictions = 0
+        # 各线程使用独立连接，计数器由锁保护
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._init_schema()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache_entries ('
+            'key TEXT PRIMARY KEY, etag TEXT, status INTEGER, mimetype TEXT, '
+            'body BLOB, expires_at REAL, stored_at REAL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_cache_entries_stored ON cache_entries (stored_at)')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache_tags ('
+            'tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key))'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_cache_tags_key ON cache_tags (key)')
+
+    def get(self, key):
+        row = self._connect().execute(
+            'SELECT etag, status, mimetype, body, expires_at FROM cache_entries WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[4] is not None and row[4] <= time.time():
+            self.evict(key)
+            return None
+        return CacheEntry(row[0], row[1], row[2], bytes(row[3]))
+
+    def set(self, key, entry, tags, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.time()
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO cache_entries '
+                '(key, etag, status, mimetype, body, expires_at, stored_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, entry.etag, entry.status, entry.mimetype, entry.body, now + ttl if ttl else None, now)
+            )
+            conn.execute('DELETE FROM cache_tags WHERE key = ?', (key,))
+            conn.executemany(
+                'INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)',
+                [(tag, key) for tag in tags]
+            )
+            overflow = conn.execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0] - self.max_entries
+            evicted = 0
+            if overflow > 0:
+                evicted = self._delete_keys(conn, [
+                    row[0] for row in conn.execute(
+                        'SELECT key FROM cache_entries ORDER BY stored_at LIMIT ?', (overflow,)
+                    )
+                ])
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self._count_evictions(evicted)
+
+    def _count_evictions(self, count):
+        if count:
+            with self._lock:
+                self.evictions += count
+
+    @staticmethod
+    def _delete_keys(conn, keys):
+        if not keys:
+            return 0
+        conn.executemany('DELETE FROM cache_tags WHERE key = ?', [(key,) for key in keys])
+        return conn.executemany('DELETE FROM cache_entries WHERE key = ?', [(key,) for key in keys]).rowcount
+
+    def delete(self, key):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            deleted = self._delete_keys(conn, [key])
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return deleted > 0
+
+    def evict(self, key):
+        """删除条目并计入淘汰数"""
+        if not self.delete(key):
+            return False
+        self._count_evictions(1)
+        return True
+
+    def invalidate_tags(self, tags):
+        if ALL_TAGS in tags:
+            return self.clear()
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            placeholders = ','.join('?' * len(tags))
+            keys = [row[0] for row in conn.execute(
+                f'SELECT DISTINCT key FROM cache_tags WHERE tag IN ({placeholders})', list(tags)
+            )]
+            count = self._delete_keys(conn, keys)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self._count_evictions(count)
+        return count
+
+    def clear(self):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            count = conn.execute('DELETE FROM cache_entries').rowcount
+            conn.execute('DELETE FROM cache_tags')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self._count_evictions(count)
+        return count
+
+    def size(self):
+        return self._connect().execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0]
+
+class ResponseCache:
+    """响应缓存扩展，按RESPONSE_CACHE_*配置选择后端"""
+
+    def __init__(self, app=None):
+        self.backend = NullCacheBackend()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from app.models import ChangeCounter
+
+        backend = app.config.get('RESPONSE_CACHE_BACKEND', 'memory')
+        ttl = app.config.get('RESPONSE_CACHE_TTL', 300)
+        if backend == 'memory':
+            self.backend = MemoryCacheBackend(
+                max_entries=app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 1000),
+                max_bytes=app.config.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024),
+                default_ttl=ttl
+            )
+        elif backend == 'sqlite':
+            self.backend = SQLiteCacheBackend(
+                app.config.get('RESPONSE_CACHE_PATH') or os.path.join(app.instance_path, 'response_cache.db'),
+                max_entries=app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 1000),
+                default_ttl=ttl
+            )
+        elif backend in ('none', 'null', ''):
+            self.backend = NullCacheBackend()
+        else:
+            raise ValueError(f'未知的响应缓存后端: {backend}')
+
+        ChangeCounter.on_commit(self.invalidate)
+        app.extensions['response_cache'] = self
+
+    def get(self, key, etag):
+        """读取与当前ETag一致的缓存条目，不一致时淘汰该条目"""
+        entry = self.backend.get(key)
+        if entry is not None and entry.etag != etag:
+            self.backend.evict(key)
+            with self.backend._lock:
+                self.stale += 1
+                self.misses += 1
+            return None
+        # 批量接口会在多个线程中并行读取，计数器在后端锁内更新
+        with self.backend._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def set(self, key, entry, tags, ttl=None):
+        self.backend.set(key, entry, tags, ttl)
+
+    def invalidate(self, tags):
+        """按变更范围淘汰缓存，返回淘汰的条目数"""
+        return self.backend.invalidate_tags(set(tags))
+
+    def clear(self):
+        return self.backend.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.backend.name,
+            'entries': self.backend.size(),
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'evictions': self.backend.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
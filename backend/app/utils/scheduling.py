@@ -0,0 +1,118 @@
+"""
+关键路径计算
+
+基于任务依赖（Task.depends_on）的关键路径法（CPM）。一次Kahn拓扑排序
+得到正向顺序，沿该顺序正推最早开始/完成时间，再逆序反推最晚开始/完成
+时间，总复杂度O(V+E)。时间均为秒级Unix时间戳。
+"""
+from collections import deque
+
+DEFAULT_DURATION = 24 * 60 * 60  # 未设置起止时间的任务按一天计算
+
+def compute_schedule(ids, starts, ends, depends_on, default_start):
+    """
+    计算每个任务的最早/最晚开始时间、浮动时间和关键路径
+
+    依赖指向本组之外的任务时忽略该依赖；存在循环依赖的任务不参与推算，
+    按计划时间返回并列入cycle。
+
+    Args:
+        ids: 任务ID列表
+        starts: 计划开始时间戳列表，None表示未设置
+        ends: 计划结束时间戳列表，None表示未设置
+        depends_on: 所依赖任务ID列表，None表示无依赖
+        default_start: 未设置开始时间的无依赖任务的开始时间戳
+
+    Returns:
+        dict，各列与ids一一对应：
+            earliest_start, earliest_finish, latest_start, latest_finish, slack, critical
+        另含 critical_path（从起点到项目完成的任务ID链）、finish（项目最早完成时间）
+        以及 cycle（存在循环依赖的任务ID）
+    """
+    n = len(ids)
+    index = {task_id: i for i, task_id in enumerate(ids)}
+    durations = [0] * n
+    planned = [0] * n
+    for i in range(n):
+        start, end = starts[i], ends[i]
+        if start is not None and end is not None and end >= start:
+            durations[i] = end - start
+        else:
+            durations[i] = DEFAULT_DURATION
+        if start is not None:
+            planned[i] = start
+        elif end is not None:
+            planned[i] = end - durations[i]
+        else:
+            planned[i] = default_start
+
+    # 依赖边：前驱 -> 后继
+    predecessor = [-1] * n
+    successors = [[] for _ in range(n)]
+    indegree = [0] * n
+    for i in range(n):
+        dep = depends_on[i]
+        j = index.get(dep) if dep is not None else None
+        if j is not None and j != i:
+            predecessor[i] = j
+            successors[j].append(i)
+            indegree[i] += 1
+
+    # Kahn拓扑排序
+    order = []
+    queue = deque(i for i in range(n) if indegree[i] == 0)
+    while queue:
+        i = queue.popleft()
+        order.append(i)
+        for k in successors[i]:
+            indegree[k] -= 1
+            if indegree[k] == 0:
+                queue.append(k)
+    in_cycle = [degree > 0 for degree in indegree]
+
+    # 正推：最早开始不早于计划开始，也不早于前驱的最早完成
+    es = list(planned)
+    ef = [planned[i] + durations[i] for i in range(n)]
+    for i in order:
+        j = predecessor[i]
+        if j >= 0 and ef[j] > es[i]:
+            es[i] = ef[j]
+        ef[i] = es[i] + durations[i]
+
+    finish = max((ef[i] for i in order), default=default_start)
+
+    # 反推：最晚完成不晚于后继的最晚开始，无后继时为项目完成时间
+    lf = [finish] * n
+    ls = [finish - durations[i] for i in range(n)]
+    for i in reversed(order):
+        for k in successors[i]:
+            if not in_cycle[k] and ls[k] < lf[i]:
+                lf[i] = ls[k]
+        ls[i] = lf[i] - durations[i]
+
+    slack = [0 if in_cycle[i] else ls[i] - es[i] for i in range(n)]
+    for i in range(n):
+        if in_cycle[i]:
+            lf[i], ls[i] = ef[i], es[i]
+    critical = [not in_cycle[i] and slack[i] <= 0 for i in range(n)]
+
+    # 从最晚完成的关键任务沿前驱回溯出关键路径
+    critical_path = []
+    last = max((i for i in order if critical[i]), key=lambda i: ef[i], default=None)
+    while last is not None:
+        critical_path.append(ids[last])
+        j = predecessor[last]
+        last = j if j >= 0 and critical[j] and ef[j] == es[last] else None
+    critical_path.reverse()
+
+    return {
+        'earliest_start': es,
+        'earliest_finish': ef,
+        'latest_start': ls,
+        'latest_finish': lf,
+        'slack': slack,
+        'critical': critical,
+        'critical_path': critical_path,
+        'finish': finish,
+        'cycle': [ids[i] for i in range(n) if in_cycle[i]]
+    }
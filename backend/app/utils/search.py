@@ -0,0 +1,421 @@
+"""
+项目、任务与文档内容的全文搜索（SQLite FTS5）
+
+projects_fts(name, description)、tasks_fts(title, description, assignee)
+和 document_texts_fts(content) 以 rowid 对应源表ID，由数据库触发器在插入、
+修改文本列和删除时同步，批量导入等绕过ORM的写入同样会被索引。
+
+unicode61分词器把连续的汉字视为一个词，只能按整段匹配。写入索引前由
+search_segment() 在每个中日韩字符两侧插入零宽空格，使其逐字成词，查询时
+连续汉字作为短语匹配，相当于子串搜索；英文和数字按词匹配并支持前缀。
+search_segment需要在每个数据库连接上注册（见 install），触发器依赖它，
+直接用sqlite3命令行修改projects/tasks表会报 no such function。
+"""
+import html
+import re
+
+from sqlalchemy import bindparam, event, text
+
+from app import db
+
+SEGMENT_FUNCTION = 'search_segment'
+# 中日韩统一表意文字、扩展A、兼容表意文字、假名、谚文音节
+_CJK_RANGES = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af'
+_CJK = re.compile(f'([{_CJK_RANGES}])')
+_CJK_CHAR = re.compile(f'[{_CJK_RANGES}]')
+_SEPARATOR = '\u200b'  # 零宽空格，unicode61视为分隔符
+_WORD = re.compile(r'\w')
+_TOKEN = re.compile(f'[{_CJK_RANGES}]|[^\\W{_CJK_RANGES}]+')
+
+# 描述摘要的长度及第一处命中之前保留的字符数
+SNIPPET_LENGTH = 80
+SNIPPET_CONTEXT = 20
+# 参与相关度排序的最大命中数，见 _ranked_ids
+SEARCH_CANDIDATES = 5000
+
+# 索引名: (源表, 索引列, 各列的bm25权重)，标题命中比描述更相关
+INDEXES = {
+    'projects_fts': ('projects', ('name', 'description'), (10.0, 2.0)),
+    'tasks_fts': ('tasks', ('title', 'description', 'assignee'), (10.0, 2.0, 5.0)),
+    'document_texts_fts': ('document_texts', ('content',), (1.0,)),
+}
+
+def segment(value):
+    """写入索引前的分词预处理：中日韩字符逐字分隔"""
+    if value is None:
+        return None
+    return _CJK.sub(f'{_SEPARATOR}\\1{_SEPARATOR}', value)
+
+def install(engine):
+    """为引擎的每个新连接注册search_segment函数"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _register_function(dbapi_connection, connection_record):
+        dbapi_connection.create_function(SEGMENT_FUNCTION, 1, segment, deterministic=True)
+
+def include_name(name, type_, parent_names):
+    """供迁移自动生成使用：忽略FTS虚拟表及其影子表"""
+    if type_ == 'table':
+        return not any(name == index or name.startswith(index + '_') for index in INDEXES)
+    return True
+
+def ddl_statements(index):
+    """建立FTS表和同步触发器的SQL"""
+    table, columns, _ = INDEXES[index]
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'{SEGMENT_FUNCTION}(new.{column})' for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5("
+        f"{column_list}, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {index}(rowid, {column_list}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_ad AFTER DELETE ON {table} BEGIN "
+        f"DELETE FROM {index} WHERE rowid = old.id; END",
+        f"CREATE TRIGGER IF NOT EXISTS {index}_au AFTER UPDATE OF {column_list} ON {table} BEGIN "
+        f"DELETE FROM {index} WHERE rowid = old.id; "
+        f"INSERT INTO {index}(rowid, {column_list}) VALUES (new.id, {new_values}); END",
+    ]
+
+def rebuild_index(connection, index):
+    """根据源表重新生成一个索引，返回索引的行数"""
+    table, columns, _ = INDEXES[index]
+    column_list = ', '.join(columns)
+    values = ', '.join(f'{SEGMENT_FUNCTION}({column})' for column in columns)
+    connection.execute(text(f'DELETE FROM {index}'))
+    connection.execute(text(
+        f'INSERT INTO {index}(rowid, {column_list}) SELECT id, {values} FROM {table}'
+    ))
+    connection.execute(text(f"INSERT INTO {index}({index}) VALUES ('optimize')"))
+    return connection.execute(text(f'SELECT count(*) FROM {index}')).scalar()
+
+def rebuild(connection):
+    """重新生成全部搜索索引，返回 {索引名: 行数}"""
+    return {index: rebuild_index(connection, index) for index in INDEXES}
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_indexes(target, connection, **kw):
+    """db.create_all() 时一并建立搜索索引；已有数据时生成索引内容"""
+    if connection.dialect.name != 'sqlite':
+        return
+    for index in INDEXES:
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': index}
+        ).first()
+        for statement in ddl_statements(index):
+            connection.execute(text(statement))
+        if not exists:
+            rebuild_index(connection, index)
+
+def parse_terms(q):
+    """按空白拆分搜索词，去掉不含文字的部分"""
+    return [term for term in (q or '').split() if _WORD.search(term)]
+
+def _tokens(term):
+    """与索引一致的分词：英文数字按连续字符成词，中日韩字符逐字成词"""
+    return _TOKEN.findall(term)
+
+def build_match_query(terms):
+    """
+    将搜索词转换为FTS5查询
+
+    全部词都命中才匹配；每个词作为短语加引号，避免输入中的运算符被解析。
+    以字母或数字结尾的词按前缀匹配。
+
+    Returns:
+        MATCH表达式，没有可搜索的内容时返回None
+    """
+    phrases = []
+    for term in terms:
+        tokens = _tokens(term)
+        if not tokens:
+            continue
+        phrase = '"' + ' '.join(tokens).replace('"', '""') + '"'
+        if not _CJK_CHAR.match(tokens[-1]):
+            phrase += '*'
+        phrases.append(phrase)
+    return ' '.join(phrases) or None
+
+def build_highlighter(terms):
+    """
+    生成标记命中位置的正则，匹配规则与build_match_query一致
+
+    命中行只有一页，在Python中标记比使用FTS5的highlight()/snippet()便宜：
+    后者需要在MATCH查询中执行，排序前会对所有命中行计算
+    """
+    patterns = []
+    for term in terms:
+        tokens = _tokens(term)
+        if not tokens:
+            continue
+        pattern = r'[\W_]*'.join(re.escape(token) for token in tokens)
+        if not _CJK_CHAR.match(tokens[0]):
+            pattern = rf'(?<![^\W{_CJK_RANGES}])' + pattern
+        if not _CJK_CHAR.match(tokens[-1]):
+            pattern += rf'[^\W{_CJK_RANGES}]*'
+        patterns.append(pattern)
+    if not patterns:
+        return None
+    # 长的词优先，避免被其前缀抢先匹配
+    patterns.sort(key=len, reverse=True)
+    return re.compile('|'.join(patterns), re.IGNORECASE)
+
+def highlight(value, highlighter, length=None):
+    """
+    转义HTML并用<mark>标记命中部分
+
+    Args:
+        value: 原文
+        highlighter: build_highlighter生成的正则
+        length: 提供时截取第一处命中附近约length个字符作为摘要
+
+    Returns:
+        HTML字符串，value为None时返回None
+    """
+    if value is None:
+        return None
+    prefix = suffix = ''
+    if length and len(value) > length:
+        match = highlighter.search(value) if highlighter else None
+        start = max(0, (match.start() if match else 0) - SNIPPET_CONTEXT)
+        end = min(len(value), start + length)
+        start = max(0, end - length)
+        prefix = '…' if start > 0 else ''
+        suffix = '…' if end < len(value) else ''
+        value = value[start:end]
+
+    parts = []
+    position = 0
+    for match in (highlighter.finditer(value) if highlighter else ()):
+        if match.end() == match.start():
+            continue
+        parts.append(html.escape(value[position:match.start()]))
+        parts.append('<mark>' + html.escape(match.group()) + '</mark>')
+        position = match.end()
+    parts.append(html.escape(value[position:]))
+    return prefix + ''.join(parts) + suffix
+
+def _bm25(index):
+    weights = ', '.join(str(weight) for weight in INDEXES[index][2])
+    return f'bm25({index}, {weights})'
+
+def _ranked_ids(session, index, match, joins, filters, params, limit, offset, id_column=None):
+    """
+    按相关度排序取出一页的ID
+
+    bm25需要逐行计算，出现在大部分记录中的词会让排序耗时随命中数线性增长。
+    没有筛选条件时只对最新的SEARCH_CANDIDATES条命中计算相关度（FTS5按rowid
+    倒序遍历命中不需要排序），命中数不超过该值时结果与完整排序相同；有筛选
+    条件时命中范围已经缩小，对全部命中排序
+
+    Args:
+        joins: 筛选条件需要关联的表
+        id_column: 返回的ID列，默认为索引的rowid
+
+    Returns:
+        ({id: 分数}, 是否截断)；ID按相关度排序，多取一条用于判断是否还有更多；
+        命中数超过SEARCH_CANDIDATES、只对其中最新的部分排序时截断为True
+    """
+    select = f"SELECT {id_column or index + '.rowid'} AS id, {_bm25(index)} AS score " \
+             f"FROM {index}{joins} WHERE {index} MATCH :match{filters}"
+    params = dict(params, match=match, candidates=SEARCH_CANDIDATES, limit=limit + 1, offset=offset)
+    if filters:
+        rows = session.execute(text(
+            f"{select} ORDER BY score, id LIMIT :limit OFFSET :offset"
+        ), params).all()
+        return dict(rows), False
+
+    rows = session.execute(text(
+        f"SELECT id, score FROM ({select} ORDER BY {index}.rowid DESC LIMIT :candidates) "
+        f"ORDER BY score, id LIMIT :limit OFFSET :offset"
+    ), params).all()
+    # 只遍历命中的rowid，不计算相关度
+    truncated = session.execute(text(
+        f"SELECT 1 FROM {index}{joins} WHERE {index} MATCH :match "
+        f"ORDER BY {index}.rowid DESC LIMIT 1 OFFSET :candidates"
+    ), params).first() is not None
+    return dict(rows), truncated
+
+def search_tasks(session, terms, project_id=None, status=None, limit=20, offset=0):
+    """
+    按相关度搜索任务
+
+    Args:
+        session: 数据库会话
+        terms: parse_terms拆分出的搜索词
+        project_id: 只搜索该项目的任务
+        status: 只搜索该状态的任务
+        limit: 返回数量
+        offset: 跳过的数量
+
+    Returns:
+        (结果dict列表, 是否还有更多, 是否只在最新的SEARCH_CANDIDATES条命中中排序)
+    """
+    match = build_match_query(terms)
+    if match is None:
+        return [], False, False
+    filters = ''
+    params = {}
+    if project_id is not None:
+        filters += ' AND tasks.project_id = :project_id'
+        params['project_id'] = project_id
+    if status:
+        filters += ' AND tasks.status = :status'
+        params['status'] = status
+    # 没有筛选条件时不必逐行关联源表
+    joins = ' JOIN tasks ON tasks.id = tasks_fts.rowid' if filters else ''
+    ranked, truncated = _ranked_ids(session, 'tasks_fts', match, joins, filters, params, limit, offset)
+    if not ranked:
+        return [], False, truncated
+
+    page_ids = list(ranked)[:limit]
+    rows = session.execute(text(
+        "SELECT t.id, t.project_id, p.name AS project_name, t.status, t.priority, "
+        "t.title, t.description, t.assignee "
+        "FROM tasks t JOIN projects p ON p.id = t.project_id "
+        "WHERE t.id IN :ids"
+    ).bindparams(bindparam('ids', expanding=True)), {'ids': page_ids}).mappings().all()
+    rows = {row['id']: row for row in rows}
+
+    highlighter = build_highlighter(terms)
+    results = []
+    for task_id in page_ids:
+        row = rows.get(task_id)
+        if row is None:
+            continue
+        results.append({
+            'type': 'task',
+            'id': row['id'],
+            'project_id': row['project_id'],
+            'project_name': row['project_name'],
+            'status': row['status'],
+            'priority': row['priority'],
+            'title': row['title'],
+            'assignee': row['assignee'],
+            'highlight': {
+                'title': highlight(row['title'], highlighter),
+                'description': highlight(row['description'], highlighter, SNIPPET_LENGTH),
+                'assignee': highlight(row['assignee'], highlighter)
+            },
+            'score': round(-ranked[task_id], 4)
+        })
+    return results, len(ranked) > limit, truncated
+
+def search_projects(session, terms, project_id=None, limit=20, offset=0):
+    """按相关度搜索项目，参数与返回值同search_tasks"""
+    match = build_match_query(terms)
+    if match is None:
+        return [], False, False
+    filters = ''
+    params = {}
+    if project_id is not None:
+        filters += ' AND projects.id = :project_id'
+        params['project_id'] = project_id
+    joins = ' JOIN projects ON projects.id = projects_fts.rowid' if filters else ''
+    ranked, truncated = _ranked_ids(session, 'projects_fts', match, joins, filters, params, limit, offset)
+    if not ranked:
+        return [], False, truncated
+
+    page_ids = list(ranked)[:limit]
+    rows = session.execute(text(
+        "SELECT id, name, description FROM projects WHERE id IN :ids"
+    ).bindparams(bindparam('ids', expanding=True)), {'ids': page_ids}).mappings().all()
+    rows = {row['id']: row for row in rows}
+
+    highlighter = build_highlighter(terms)
+    results = []
+    for project_id in page_ids:
+        row = rows.get(project_id)
+        if row is None:
+            continue
+        results.append({
+            'type': 'project',
+            'id': row['id'],
+            'name': row['name'],
+            'highlight': {
+                'name': highlight(row['name'], highlighter),
+                'description': highlight(row['description'], highlighter, SNIPPET_LENGTH)
+            },
+            'score': round(-ranked[project_id], 4)
+        })
+    return results, len(ranked) > limit, truncated
+
+def search_documents(session, terms, task_id=None, project_id=None, limit=20, offset=0):
+    """
+    按相关度搜索文档内容
+
+    文本按内容摘要保存，相同内容的多个文档各自返回
+
+    Args:
+        session: 数据库会话
+        terms: parse_terms拆分出的搜索词
+        task_id: 只搜索该任务的文档
+        project_id: 只搜索该项目的文档
+        limit: 返回数量
+        offset: 跳过的数量
+
+    Returns:
+        (结果dict列表, 是否还有更多, 是否只在最新的SEARCH_CANDIDATES条命中中排序)
+    """
+    match = build_match_query(terms)
+    if match is None:
+        return [], False, False
+    joins = (' JOIN document_texts ON document_texts.id = document_texts_fts.rowid'
+             ' JOIN documents ON documents.blob_sha256 = document_texts.sha256')
+    filters = ''
+    params = {}
+    if task_id is not None:
+        filters += ' AND documents.task_id = :task_id'
+        params['task_id'] = task_id
+    if project_id is not None:
+        joins += ' JOIN tasks ON tasks.id = documents.task_id'
+        filters += ' AND tasks.project_id = :project_id'
+        params['project_id'] = project_id
+    ranked, truncated = _ranked_ids(
+        session, 'document_texts_fts', match, joins, filters, params, limit, offset,
+        id_column='documents.id'
+    )
+    if not ranked:
+        return [], False, truncated
+
+    from app.models import Document, DocumentText, Task
+
+    page_ids = list(ranked)[:limit]
+    rows = session.execute(
+        db.select(
+            Document.id, Document.task_id, Document.original_filename, Document.file_type,
+            Document.file_size, Document.upload_date, Task.title.label('task_title'),
+            Task.project_id, DocumentText.content
+        )
+        .join(Task, Task.id == Document.task_id)
+        .join(DocumentText, DocumentText.sha256 == Document.blob_sha256)
+        .where(Document.id.in_(page_ids))
+    ).mappings().all()
+    rows = {row['id']: row for row in rows}
+
+    highlighter = build_highlighter(terms)
+    results = []
+    for document_id in page_ids:
+        row = rows.get(document_id)
+        if row is None:
+            continue
+        results.append({
+            'type': 'document',
+            'id': row['id'],
+            'original_filename': row['original_filename'],
+            'file_type': row['file_type'],
+            'file_size': row['file_size'],
+            'upload_date': row['upload_date'].isoformat() if row['upload_date'] else None,
+            'task': {
+                'id': row['task_id'],
+                'title': row['task_title'],
+                'project_id': row['project_id']
+            },
+            'highlight': {
+                'content': highlight(row['content'], highlighter, SNIPPET_LENGTH)
+            },
+            'score': round(-ranked[document_id], 4)
+        })
+    return results, len(ranked) > limit, truncated
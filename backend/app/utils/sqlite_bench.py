@@ -0,0 +1,136 @@
+"""
+SQLite配置档基准测试
+
+在临时数据库文件上为每个配置档建立独立引擎，多个读线程反复执行看板任务
+列表查询，同时多个写线程模拟计时器启动和看板拖动的短事务，统计读写吞吐量
+与"database is locked"错误次数。
+"""
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.exc import OperationalError
+from app import db
+from app.utils import sqlite_profile, search
+
+def _seed(engine, projects, tasks_per_project):
+    from app.models import Project, Task
+
+    db.metadata.create_all(engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(Project.__table__), [
+            {'name': f'项目{i}', 'start_date': now.date(), 'end_date': now.date(),
+             'created_at': now, 'updated_at': now}
+            for i in range(projects)
+        ])
+        conn.execute(insert(Task.__table__), [
+            {'project_id': p + 1, 'title': f'任务{p}-{i}', 'status': 'todo', 'priority': 'medium',
+             'position': (i + 1) * 1024.0, 'created_at': now, 'updated_at': now}
+            for p in range(projects) for i in range(tasks_per_project)
+        ])
+
+def _reader(engine, projects, stop, stats):
+    from app.models import Task
+
+    tasks = Task.__table__
+    reads = errors = 0
+    while not stop.is_set():
+        try:
+            with engine.connect() as conn:
+                conn.execute(
+                    select(tasks).where(tasks.c.project_id == random.randint(1, projects))
+                    .order_by(tasks.c.created_at.desc(), tasks.c.id.desc()).limit(50)
+                ).all()
+            reads += 1
+        except OperationalError:
+            errors += 1
+    stats.append(('read', reads, errors))
+
+def _writer(engine, projects, tasks_per_project, stop, stats):
+    from app.models import Task, TimeLog
+
+    task_count = projects * tasks_per_project
+    writes = errors = 0
+    while not stop.is_set():
+        task_id = random.randint(1, task_count)
+        try:
+            with engine.begin() as conn:
+                if random.random() < 0.5:
+                    # 计时器启动
+                    conn.execute(insert(TimeLog.__table__).values(
+                        task_id=task_id, start_time=datetime.utcnow(), created_at=datetime.utcnow()
+                    ))
+                else:
+                    # 看板拖动
+                    conn.execute(update(Task.__table__).where(Task.__table__.c.id == task_id).values(
+                        position=random.random() * 1024 * tasks_per_project, status='in_progress'
+                    ))
+            writes += 1
+        except OperationalError:
+            errors += 1
+    stats.append(('write', writes, errors))
+
+def run_benchmark(profile, readers=4, writers=2, seconds=5.0, projects=20, tasks_per_project=200):
+    """
+    对单个配置档运行基准测试
+
+    Args:
+        profile: 配置档名称
+        readers: 读线程数
+        writers: 写线程数
+        seconds: 持续时间（秒）
+        projects: 生成的项目数
+        tasks_per_project: 每个项目的任务数
+
+    Returns:
+        结果dict：reads_per_sec、writes_per_sec、read_errors、write_errors以及生效的PRAGMA
+    """
+    directory = tempfile.mkdtemp(prefix='sqlite-bench-')
+    uri = 'sqlite:///' + os.path.join(directory, 'bench.db')
+    options = sqlite_profile.engine_options(profile, uri)
+    # 保证每个线程都能拿到连接
+    options['pool_size'] = max(options.get('pool_size', 5), readers + writers)
+    engine = create_engine(uri, **options)
+    sqlite_profile.install(engine, profile)
+    search.install(engine)
+    try:
+        _seed(engine, projects, tasks_per_project)
+        with engine.connect() as conn:
+            settings = sqlite_profile.current_settings(conn)
+
+        stop = threading.Event()
+        stats = []
+        threads = [
+            threading.Thread(target=_reader, args=(engine, projects, stop, stats))
+            for _ in range(readers)
+        ] + [
+            threading.Thread(target=_writer, args=(engine, projects, tasks_per_project, stop, stats))
+            for _ in range(writers)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        engine.dispose()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    reads = sum(count for kind, count, _ in stats if kind == 'read')
+    writes = sum(count for kind, count, _ in stats if kind == 'write')
+    return {
+        'profile': profile,
+        'reads_per_sec': round(reads / elapsed, 1),
+        'writes_per_sec': round(writes / elapsed, 1),
+        'read_errors': sum(errors for kind, _, errors in stats if kind == 'read'),
+        'write_errors': sum(errors for kind, _, errors in stats if kind == 'write'),
+        'settings': settings
+    }
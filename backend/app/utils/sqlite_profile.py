@@ -0,0 +1,130 @@
+"""
+SQLite连接配置档
+
+连接建立时按配置档执行PRAGMA，并提供对应的连接池参数。通过环境变量
+SQLITE_PROFILE选择配置档，默认为production：
+
+    default:    SQLite默认设置（回滚日志、无忙等待），仅用于对比测试
+    production: WAL模式，synchronous=NORMAL，较大的页缓存和内存映射，
+                写锁冲突时最多等待5秒
+    durable:    与production相同，但synchronous=FULL，每次提交都落盘
+
+单项PRAGMA可用SQLITE_<名称大写>环境变量覆盖，例如SQLITE_BUSY_TIMEOUT=10000。
+"""
+import os
+from sqlalchemy import event
+
+PRAGMA_NAMES = ('journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store', 'busy_timeout')
+
+PROFILES = {
+    'default': {
+        'pragmas': {},
+        'engine_options': {}
+    },
+    'production': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'cache_size': -64000,  # 负数表示KiB，约64MB
+            'mmap_size': 256 * 1024 * 1024,
+            'temp_store': 'MEMORY',
+            'busy_timeout': 5000  # 毫秒
+        },
+        'engine_options': {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_timeout': 30,
+            'pool_pre_ping': True
+        }
+    },
+    'durable': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'FULL',
+            'cache_size': -64000,
+            'mmap_size': 256 * 1024 * 1024,
+            'temp_store': 'MEMORY',
+            'busy_timeout': 5000
+        },
+        'engine_options': {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_timeout': 30,
+            'pool_pre_ping': True
+        }
+    }
+}
+
+def get_profile(name):
+    """获取配置档，名称未知时抛出ValueError"""
+    if name not in PROFILES:
+        raise ValueError(f'未知的SQLite配置档: {name}，可选: {", ".join(PROFILES)}')
+    return PROFILES[name]
+
+def _is_memory_database(uri):
+    return uri in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in uri
+
+def resolve_pragmas(name, environ=None):
+    """合并配置档与环境变量覆盖，返回PRAGMA字典"""
+    environ = os.environ if environ is None else environ
+    pragmas = dict(get_profile(name)['pragmas'])
+    for pragma in PRAGMA_NAMES:
+        value = environ.get(f'SQLITE_{pragma.upper()}')
+        if value:
+            pragmas[pragma] = value
+    return pragmas
+
+def engine_options(name, uri):
+    """
+    生成SQLALCHEMY_ENGINE_OPTIONS
+
+    Args:
+        name: 配置档名称
+        uri: 数据库连接串，非SQLite或内存数据库时不设置连接池参数
+
+    Returns:
+        引擎参数字典
+    """
+    if not uri.startswith('sqlite') or _is_memory_database(uri):
+        return {}
+    options = dict(get_profile(name)['engine_options'])
+    pragmas = resolve_pragmas(name)
+    if 'busy_timeout' in pragmas:
+        # pysqlite自身的锁等待（秒），与busy_timeout保持一致
+        options['connect_args'] = {'timeout': int(pragmas['busy_timeout']) / 1000}
+    return options
+
+def apply_pragmas(dbapi_connection, pragmas):
+    """在DBAPI连接上执行PRAGMA"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in PRAGMA_NAMES:
+            if pragma in pragmas:
+                cursor.execute(f'PRAGMA {pragma}={pragmas[pragma]}')
+    finally:
+        cursor.close()
+
+def install(engine, name):
+    """
+    为引擎注册connect事件，每个新连接建立时执行配置档中的PRAGMA
+
+    Args:
+        engine: SQLAlchemy引擎
+        name: 配置档名称
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = resolve_pragmas(name)
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
+
+def current_settings(connection):
+    """读取连接当前生效的PRAGMA值"""
+    return {
+        pragma: connection.exec_driver_sql(f'PRAGMA {pragma}').scalar()
+        for pragma in PRAGMA_NAMES
+    }
@@ -0,0 +1,192 @@
+"""
+文档文本提取
+
+提取在独立的子进程中运行，由RLIMIT_CPU和RLIMIT_AS限制CPU时间和内存，
+另有墙钟超时；损坏或恶意构造的文件最多拖垮子进程，不影响工作线程。
+本文件可直接作为脚本执行（不导入app包，启动更快）：
+
+    python text_extract.py <文件路径> <文件类型> <最大字符数> [CPU秒数] [内存字节数]
+
+资源限制由子进程在读取文件前自行设置（0表示不限制），不在fork与exec之间
+执行代码，多线程的Web进程中启动也是安全的。
+
+提取出的UTF-8文本写到标准输出。
+
+DOCX直接解析压缩包中的word/document.xml；PDF依赖可选的pypdf，未安装时
+尝试poppler的pdftotext命令。旧版DOC和图片（需要OCR）不提取。
+"""
+import os
+import shutil
+import subprocess
+import sys
+import zipfile
+from xml.etree import ElementTree
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DOCX_TYPES = {'docx'}
+PDF_TYPES = {'pdf'}
+# document.xml解压后的大小上限，防止压缩炸弹
+DOCX_MAX_XML_SIZE = 200 * 1024 * 1024
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+# 子进程退出码
+EXIT_UNSUPPORTED = 3
+EXIT_INVALID = 4
+
+class ExtractionError(Exception):
+    """提取失败；unsupported为True表示该类型或环境不支持提取"""
+
+    def __init__(self, message, unsupported=False):
+        super().__init__(message)
+        self.unsupported = unsupported
+
+def _pdf_available():
+    if shutil.which('pdftotext'):
+        return True
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def is_extractable(file_type):
+    """该类型的文件是否可以提取文本"""
+    file_type = (file_type or '').lower()
+    if file_type in DOCX_TYPES:
+        return True
+    if file_type in PDF_TYPES:
+        return _pdf_available()
+    return False
+
+def _iter_docx(path):
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo('word/document.xml')
+        if info.file_size > DOCX_MAX_XML_SIZE:
+            raise ValueError('document.xml过大')
+        with archive.open(info) as xml:
+            # 流式解析，处理完的元素立即释放
+            for event, element in ElementTree.iterparse(xml, events=('end',)):
+                if element.tag == _W + 't' and element.text:
+                    yield element.text
+                elif element.tag == _W + 'tab':
+                    yield '\t'
+                elif element.tag in (_W + 'br', _W + 'p'):
+                    yield '\n'
+                if element.tag == _W + 'p':
+                    element.clear()
+
+def _iter_pdf(path):
+    try:
+        import pypdf
+    except ImportError:
+        pypdf = None
+    if pypdf is not None:
+        reader = pypdf.PdfReader(path)
+        for page in reader.pages:
+            yield (page.extract_text() or '') + '\n'
+        return
+    # 子进程继承资源限制
+    result = subprocess.run(
+        ['pdftotext', '-enc', 'UTF-8', '-q', path, '-'],
+        check=True, capture_output=True
+    )
+    yield result.stdout.decode('utf-8', errors='replace')
+
+def extract_text(path, file_type, max_chars):
+    """
+    在当前进程中提取文本（不限制资源，通常通过 run_extraction 调用）
+
+    Returns:
+        文本，超过max_chars时截断
+    """
+    file_type = (file_type or '').lower()
+    if file_type in DOCX_TYPES:
+        parts = _iter_docx(path)
+    elif file_type in PDF_TYPES:
+        parts = _iter_pdf(path)
+    else:
+        raise ExtractionError(f'不支持提取{file_type}文件', unsupported=True)
+
+    chunks = []
+    total = 0
+    for part in parts:
+        chunks.append(part)
+        total += len(part)
+        if total >= max_chars:
+            break
+    return ''.join(chunks)[:max_chars]
+
+def _limit_resources(cpu_seconds, memory_bytes):
+    """限制当前进程的CPU时间和地址空间，0表示不限制"""
+    if resource is None:
+        return
+    if cpu_seconds:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+    if memory_bytes:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+
+def run_extraction(path, file_type, max_chars, cpu_seconds=30, memory_mb=512):
+    """
+    在受限的子进程中提取文本
+
+    Args:
+        path: 文件路径
+        file_type: 文件扩展名
+        max_chars: 最多保留的字符数
+        cpu_seconds: 子进程CPU时间上限（秒），墙钟超时为其2倍
+        memory_mb: 子进程地址空间上限（MB）
+
+    Returns:
+        提取出的文本
+
+    Raises:
+        ExtractionError: 不支持、文件无效或超出资源限制
+    """
+    if not is_extractable(file_type):
+        raise ExtractionError(f'不支持提取{file_type}文件', unsupported=True)
+
+    # 不使用preexec_fn：在多线程进程中fork后执行Python代码可能死锁，改由子进程自行设置限制
+    try:
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), path, file_type, str(max_chars),
+             str(cpu_seconds), str(memory_mb * 1024 * 1024)],
+            capture_output=True, timeout=cpu_seconds * 2
+        )
+    except subprocess.TimeoutExpired:
+        raise ExtractionError(f'提取超时（{cpu_seconds * 2}秒）')
+
+    if result.returncode == 0:
+        return result.stdout.decode('utf-8', errors='replace')
+    message = result.stderr.decode('utf-8', errors='replace').strip().splitlines()
+    message = message[-1] if message else ''
+    if result.returncode == EXIT_UNSUPPORTED:
+        raise ExtractionError(message or '不支持提取该文件', unsupported=True)
+    if result.returncode < 0 or not message or 'MemoryError' in message:
+        # 被信号终止（SIGXCPU、SIGKILL）或内存不足
+        raise ExtractionError(f'超出资源限制（退出码{result.returncode}）{message}'.strip())
+    raise ExtractionError(message)
+
+def main(argv):
+    path, file_type, max_chars = argv[1], argv[2], int(argv[3])
+    cpu_seconds = int(argv[4]) if len(argv) > 4 else 0
+    memory_bytes = int(argv[5]) if len(argv) > 5 else 0
+    # 在打开文件之前设置限制
+    _limit_resources(cpu_seconds, memory_bytes)
+    try:
+        text = extract_text(path, file_type, max_chars)
+    except ExtractionError as e:
+        print(str(e), file=sys.stderr)
+        return EXIT_UNSUPPORTED if e.unsupported else EXIT_INVALID
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile, ElementTree.ParseError,
+            subprocess.CalledProcessError) as e:
+        print(f'无法读取文件: {e}', file=sys.stderr)
+        return EXIT_INVALID
+    sys.stdout.buffer.write(text.encode('utf-8'))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,193 @@
+"""
+可续传的分块上传
+
+上传会话保存在上传目录下的 .partial/<upload_id>/ 中：meta.json记录任务、
+文件名和总大小，data为已接收的内容。每个分块按偏移量直接从请求流写入
+data文件，已写入的字节数即为续传偏移量，连接中断后客户端查询偏移量继续
+上传即可。全部接收后才创建文档记录。
+"""
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from werkzeug.exceptions import ClientDisconnected
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+PARTIAL_DIR = '.partial'
+COPY_BUFFER_SIZE = 64 * 1024
+
+_UPLOAD_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+class UploadError(Exception):
+    """上传会话错误，status为对应的HTTP状态码"""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+def _session_dir(upload_folder, upload_id):
+    if not _UPLOAD_ID_RE.match(upload_id or ''):
+        raise UploadError('上传ID无效', 404)
+    return os.path.join(upload_folder, PARTIAL_DIR, upload_id)
+
+def _read_meta(directory):
+    try:
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise UploadError('上传会话不存在或已过期', 404)
+
+def _status(meta, directory):
+    offset = os.path.getsize(os.path.join(directory, 'data'))
+    return {
+        'upload_id': meta['upload_id'],
+        'task_id': meta['task_id'],
+        'filename': meta['filename'],
+        'size': meta['size'],
+        'offset': offset,
+        'complete': offset == meta['size'],
+        'created_at': meta['created_at']
+    }
+
+@contextmanager
+def _locked(directory):
+    """同一会话的分块写入和完成操作互斥（跨进程）"""
+    with open(os.path.join(directory, 'data'), 'r+b') as data_file:
+        if fcntl is not None:
+            fcntl.flock(data_file, fcntl.LOCK_EX)
+        try:
+            yield data_file
+        finally:
+            if fcntl is not None:
+                fcntl.flock(data_file, fcntl.LOCK_UN)
+
+def create_upload(upload_folder, task_id, filename, size):
+    """
+    创建上传会话
+
+    Args:
+        upload_folder: 上传目录
+        task_id: 文档所属任务ID
+        filename: 原始文件名
+        size: 文件总字节数
+
+    Returns:
+        会话状态dict
+    """
+    upload_id = uuid.uuid4().hex
+    directory = os.path.join(upload_folder, PARTIAL_DIR, upload_id)
+    os.makedirs(directory)
+    meta = {
+        'upload_id': upload_id,
+        'task_id': task_id,
+        'filename': filename,
+        'size': size,
+        'created_at': datetime.utcnow().isoformat()
+    }
+    open(os.path.join(directory, 'data'), 'wb').close()
+    with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    return _status(meta, directory)
+
+def get_upload(upload_folder, upload_id):
+    """获取上传会话状态"""
+    directory = _session_dir(upload_folder, upload_id)
+    return _status(_read_meta(directory), directory)
+
+def write_chunk(upload_folder, upload_id, offset, stream):
+    """
+    将请求流从offset处写入会话文件
+
+    offset必须等于已接收的字节数，否则抛出409错误并返回当前偏移量；
+    流按固定大小的缓冲区逐块复制，内存占用与分块大小无关
+
+    Returns:
+        写入后的会话状态
+    """
+    directory = _session_dir(upload_folder, upload_id)
+    meta = _read_meta(directory)
+    with _locked(directory) as data_file:
+        data_file.seek(0, os.SEEK_END)
+        current = data_file.tell()
+        if offset != current:
+            raise UploadError(f'偏移量不匹配，当前已接收{current}字节', 409, offset=current)
+
+        remaining = meta['size'] - current
+        while True:
+            try:
+                block = stream.read(COPY_BUFFER_SIZE)
+            except ClientDisconnected:
+                # 已写入的部分保留，客户端重新连接后从当前偏移量续传
+                data_file.flush()
+                raise UploadError('连接中断', 400, offset=data_file.tell())
+            if not block:
+                break
+            if len(block) > remaining:
+                # 超出部分不写入，之前写入的内容保留，可从返回的偏移量续传
+                data_file.flush()
+                raise UploadError('上传内容超过声明的文件大小', 413, offset=data_file.tell())
+            data_file.write(block)
+            remaining -= len(block)
+        data_file.flush()
+        os.fsync(data_file.fileno())
+    return _status(meta, directory)
+
+def finalize_upload(upload_folder, upload_id, create_document):
+    """
+    完成上传：校验大小，将文件移入上传目录并创建文档记录
+
+    Args:
+        upload_folder: 上传目录
+        upload_id: 上传ID
+        create_document: 回调 (task_id, 原始文件名, 文件路径) -> Document
+
+    Returns:
+        create_document的返回值
+    """
+    directory = _session_dir(upload_folder, upload_id)
+    meta = _read_meta(directory)
+    with _locked(directory) as data_file:
+        data_file.seek(0, os.SEEK_END)
+        received = data_file.tell()
+    if received != meta['size']:
+        raise UploadError(
+            f'文件尚未上传完成（{received}/{meta["size"]}字节）', 409, offset=received
+        )
+    try:
+        # create_document先原子地移走data文件，重复的完成请求会在这里失败
+        document = create_document(meta['task_id'], meta['filename'], os.path.join(directory, 'data'))
+    except FileNotFoundError:
+        raise UploadError('上传会话不存在或已完成', 404)
+    shutil.rmtree(directory, ignore_errors=True)
+    return document
+
+def abort_upload(upload_folder, upload_id):
+    """取消上传并删除已接收的内容"""
+    directory = _session_dir(upload_folder, upload_id)
+    _read_meta(directory)
+    shutil.rmtree(directory, ignore_errors=True)
+
+def cleanup_stale_uploads(upload_folder, max_age_hours=24):
+    """删除超过max_age_hours未更新的上传会话，返回删除数量"""
+    root = os.path.join(upload_folder, PARTIAL_DIR)
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    for upload_id in os.listdir(root):
+        directory = os.path.join(root, upload_id)
+        data_path = os.path.join(directory, 'data')
+        modified = os.path.getmtime(data_path if os.path.exists(data_path) else directory)
+        if modified < cutoff:
+            shutil.rmtree(directory, ignore_errors=True)
+            removed += 1
+    return removed
@@ -0,0 +1,36 @@
+from sqlalchemy.dialects import sqlite, postgresql
+from app import db
+
+def upsert_increment(table, keys, increments, values=None, connection=None):
+    """
+    累加计数行，行不存在时插入
+
+    在当前会话（或指定连接）的事务中执行，由调用方负责提交。SQLite和PostgreSQL使用
+    INSERT ... ON CONFLICT DO UPDATE 单条语句完成，其他数据库先更新再插入。
+
+    Args:
+        table: 目标表（Table或模型类）
+        keys: 主键/唯一键列及其值
+        increments: 需要累加的列及增量
+        values: 每次写入时直接覆盖的列及其值
+        connection: 在指定连接上执行，默认使用当前会话
+    """
+    table = getattr(table, '__table__', table)
+    values = values or {}
+    executor = connection if connection is not None else db.session
+    dialect = (connection if connection is not None else db.session.get_bind()).dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = insert(table).values(**keys, **increments, **values)
+        set_ = {name: table.c[name] + stmt.excluded[name] for name in increments}
+        set_.update({name: stmt.excluded[name] for name in values})
+        executor.execute(stmt.on_conflict_do_update(index_elements=list(keys), set_=set_))
+        return
+
+    condition = [table.c[name] == value for name, value in keys.items()]
+    update_values = {name: table.c[name] + delta for name, delta in increments.items()}
+    update_values.update(values)
+    result = executor.execute(table.update().where(*condition).values(**update_values))
+    if result.rowcount == 0:
+        executor.execute(table.insert().values(**keys, **increments, **values))
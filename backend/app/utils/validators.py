@@ -1,5 +1,6 @@
 import os
-from datetime import datetime
+import math
+from datetime import datetime, timezone
 
 def allowed_file(filename, allowed_extensions=None):
     """检查文件类型是否允许"""
@@ -17,6 +18,13 @@ def validate_date_format(date_string, format='%Y-%m-%d'):
     except ValueError:
         return False
 
+def parse_utc_datetime(value):
+    """解析ISO格式时间，带时区的时间转换为不带时区的UTC时间"""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
 def validate_task_status(status):
     """验证任务状态"""
     valid_statuses = ['todo', 'in_progress', 'done']
@@ -53,6 +61,35 @@ def sanitize_filename(filename):
     filename = re.sub(r'\.+', '.', filename)
     return filename
 
+def validate_task_moves(moves, max_moves=500):
+    """验证看板批量移动数据"""
+    if not isinstance(moves, list) or len(moves) == 0:
+        return ['moves必须是非空数组']
+    if len(moves) > max_moves:
+        return [f'一次最多移动{max_moves}个任务']
+    
+    errors = []
+    seen = set()
+    for index, move in enumerate(moves):
+        if not isinstance(move, dict):
+            errors.append(f'第{index + 1}项格式错误')
+            continue
+        task_id = move.get('task_id')
+        if not isinstance(task_id, int) or isinstance(task_id, bool):
+            errors.append(f'第{index + 1}项的task_id必须是整数')
+        elif task_id in seen:
+            errors.append(f'任务{task_id}重复出现')
+        else:
+            seen.add(task_id)
+        if not validate_task_status(move.get('status')):
+            errors.append(f'第{index + 1}项的任务状态无效，必须是todo、in_progress或done')
+        position = move.get('position')
+        if position is not None and (
+            not isinstance(position, (int, float)) or isinstance(position, bool) or not math.isfinite(position)
+        ):
+            errors.append(f'第{index + 1}项的position必须是有限的数字')
+    return errors
+
 def validate_project_data(data):
     """验证项目数据"""
     errors = []
@@ -0,0 +1,55 @@
+"""full text search
+
+Revision ID: 9120f3f49148
+Revises: 6d577d8d0ecd
+Create Date: 2026-10-18 18:49:28.496589
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9120f3f49148'
+down_revision = '6d577d8d0ecd'
+branch_labels = None
+depends_on = None
+
+
+# FTS5索引与同步触发器；search_segment由应用在每个连接上注册（app/utils/search.py）
+INDEXES = {
+    'projects_fts': ('projects', ('name', 'description')),
+    'tasks_fts': ('tasks', ('title', 'description', 'assignee')),
+}
+
+
+def upgrade():
+    for index, (table, columns) in INDEXES.items():
+        column_list = ', '.join(columns)
+        new_values = ', '.join(f'search_segment(new.{column})' for column in columns)
+        values = ', '.join(f'search_segment({column})' for column in columns)
+        op.execute(
+            f"CREATE VIRTUAL TABLE {index} USING fts5("
+            f"{column_list}, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        op.execute(
+            f"CREATE TRIGGER {index}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {index}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {index}_ad AFTER DELETE ON {table} BEGIN "
+            f"DELETE FROM {index} WHERE rowid = old.id; END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {index}_au AFTER UPDATE OF {column_list} ON {table} BEGIN "
+            f"DELETE FROM {index} WHERE rowid = old.id; "
+            f"INSERT INTO {index}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+        )
+        op.execute(f"INSERT INTO {index}(rowid, {column_list}) SELECT id, {values} FROM {table}")
+
+
+def downgrade():
+    for index in INDEXES:
+        for suffix in ('ai', 'ad', 'au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {index}_{suffix}")
+        op.execute(f"DROP TABLE IF EXISTS {index}")
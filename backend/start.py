@@ -4,9 +4,11 @@
 """
 
 from app import create_app, db
-from app.models import Project, Task, Document, TimeLog
+from app.models import Project, Task, Document, TimeLog, TimeRollup, TimeDailyRollup
+from app.utils.importer import DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE
 import os
 import click
+from sqlalchemy import func
 
 app = create_app()
 
@@ -91,6 +93,171 @@ def forge():
     
     click.echo('测试数据生成完成')
 
+@app.cli.command('rebuild-time-rollups')
+def rebuild_time_rollups():
+    """根据时间日志重新计算任务、项目的耗时汇总及按日汇总"""
+    count = TimeRollup.rebuild()
+    daily_count = TimeDailyRollup.rebuild()
+    click.echo(f'耗时汇总重建完成，共{count}条，按日汇总{daily_count}条')
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index():
+    """根据项目和任务表重新生成全文搜索索引"""
+    from app.utils.search import rebuild
+
+    with db.engine.begin() as conn:
+        counts = rebuild(conn)
+    click.echo(
+        f'搜索索引重建完成：项目{counts["projects_fts"]}条，任务{counts["tasks_fts"]}条，'
+        f'文档{counts["document_texts_fts"]}条'
+    )
+
+@app.cli.command('import-data')
+@click.argument('kind', type=click.Choice(['projects', 'tasks']))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), help='文件格式，默认按扩展名判断')
+@click.option('--project-id', type=int, help='任务未指定project_id时导入到该项目')
+@click.option('--chunk-size', default=DEFAULT_CHUNK_SIZE, type=click.IntRange(min=1),
+              help=f'每批插入的行数，最多{MAX_CHUNK_SIZE}')
+def import_data(kind, path, fmt, project_id, chunk_size):
+    """从JSON Lines或CSV文件批量导入项目或任务"""
+    from app.utils.importer import detect_format, import_tasks, import_projects
+
+    fmt = detect_format(fmt or ('csv' if path.lower().endswith('.csv') else 'jsonl'))
+    chunk_size = min(chunk_size, MAX_CHUNK_SIZE)
+    with open(path, 'rb') as stream:
+        if kind == 'tasks':
+            events = import_tasks(stream, fmt, project_id=project_id, chunk_size=chunk_size)
+        else:
+            events = import_projects(stream, fmt, chunk_size=chunk_size)
+
+        for event in events:
+            if event['event'] == 'error':
+                click.echo(f'第{event["line"]}行: {"; ".join(event["errors"])}', err=True)
+            elif event['event'] == 'progress':
+                click.echo(f'已处理{event["processed"]}行，导入{event["imported"]}，失败{event["failed"]}')
+            else:
+                click.echo(f'导入完成：共{event["processed"]}行，导入{event["imported"]}，失败{event["failed"]}')
+                if event.get('unresolved_refs'):
+                    click.echo(f'未能解析的依赖: {", ".join(event["unresolved_refs"])}', err=True)
+
+@app.cli.command('cleanup-uploads')
+@click.option('--max-age', default=24, help='清理超过该小时数未更新的上传')
+def cleanup_uploads(max_age):
+    """清理过期的未完成分块上传"""
+    from app.routes.documents import UPLOAD_FOLDER
+    from app.utils.uploads import cleanup_stale_uploads
+
+    count = cleanup_stale_uploads(UPLOAD_FOLDER, max_age_hours=max_age)
+    click.echo(f'已清理{count}个未完成的上传')
+
+@app.cli.command('dedupe-uploads')
+@click.option('--workers', default=4, help='并行计算哈希的线程数')
+@click.option('--batch-size', default=500, help='每批提交的文档数')
+def dedupe_uploads(workers, batch_size):
+    """将已上传的文档迁移到按内容寻址的存储并去除重复文件"""
+    from app.routes.documents import UPLOAD_FOLDER
+
+    stats = Document.migrate_to_blobs(UPLOAD_FOLDER, workers=workers, batch_size=batch_size)
+    click.echo(
+        f'迁移{stats["migrated"]}个文档，新增{stats["blobs"]}个blob，'
+        f'去重共节省{stats["bytes_saved"]}字节，缺失文件{stats["missing"]}个'
+    )
+
+@app.cli.command('extract-document-texts')
+@click.option('--retry-failed', is_flag=True, help='重新提取之前失败或不支持的内容')
+def extract_document_texts(retry_failed):
+    """为尚未提取文本的文档添加提取任务（已提取的内容按摘要跳过）"""
+    from app.models import DocumentText, Job
+
+    if retry_failed:
+        db.session.execute(
+            db.delete(DocumentText).where(DocumentText.status != DocumentText.STATUS_DONE)
+        )
+    rows = db.session.execute(
+        db.select(Document.blob_sha256, func.min(Document.file_path), func.min(Document.file_type))
+        .where(Document.blob_sha256.isnot(None))
+        .where(~db.exists().where(DocumentText.sha256 == Document.blob_sha256))
+        .group_by(Document.blob_sha256)
+    ).all()
+    count = 0
+    for sha256, path, file_type in rows:
+        if DocumentText.enqueue_extraction(sha256, path, file_type):
+            count += 1
+    db.session.commit()
+    click.echo(f'已添加{count}个提取任务，由后台工作线程或`flask worker`执行')
+
+@app.cli.command('check-query-plans')
+def check_query_plans():
+    """检查热点查询的执行计划，出现全表扫描时返回非零状态"""
+    from app.utils.query_plans import hot_queries, explain_query_plan, find_plan_problems
+
+    failed = False
+    for name, query in hot_queries():
+        plan = explain_query_plan(query)
+        problems = find_plan_problems(plan)
+        click.echo(f'{"✗" if problems else "✓"} {name}')
+        for step in plan:
+            click.echo(f'    {step}')
+        failed = failed or bool(problems)
+
+    if failed:
+        raise click.ClickException('存在未使用索引的查询')
+    click.echo('所有热点查询均使用索引')
+
+@app.cli.command('bench-sqlite')
+@click.option('--profile', 'profiles', multiple=True, help='要测试的配置档，可重复指定，默认全部')
+@click.option('--readers', default=4, help='读线程数')
+@click.option('--writers', default=2, help='写线程数')
+@click.option('--seconds', default=5.0, help='每个配置档的持续时间（秒）')
+def bench_sqlite(profiles, readers, writers, seconds):
+    """并发写入下各SQLite配置档的读吞吐量基准测试"""
+    from app.utils.sqlite_profile import PROFILES
+    from app.utils.sqlite_bench import run_benchmark
+
+    for profile in profiles or PROFILES:
+        result = run_benchmark(profile, readers=readers, writers=writers, seconds=seconds)
+        settings = ', '.join(f'{name}={value}' for name, value in result['settings'].items())
+        click.echo(
+            f'{profile:<12} 读 {result["reads_per_sec"]:>9}/s  写 {result["writes_per_sec"]:>8}/s  '
+            f'锁错误 读{result["read_errors"]} 写{result["write_errors"]}'
+        )
+        click.echo(f'    {settings}')
+
+@app.cli.command('worker')
+@click.option('--threads', default=None, type=int, help='工作线程数，默认使用JOB_WORKER_THREADS')
+def worker(threads):
+    """运行后台任务工作进程（配合JOB_WORKER_MODE=external），Ctrl-C退出"""
+    import time
+    from app.models import Job
+    from app.utils.jobs import JobWorker
+
+    job_worker = JobWorker(
+        app,
+        threads=threads or app.config['JOB_WORKER_THREADS'],
+        poll_interval=app.config['JOB_POLL_INTERVAL']
+    )
+    requeued, failed = Job.requeue_stale(job_worker.stale_timeout)
+    if requeued or failed:
+        click.echo(f'重新排队{requeued}个超时任务，{failed}个已无剩余执行次数，标记为失败')
+    job_worker.start()
+    click.echo(f'工作进程已启动：{job_worker.worker_id}，{job_worker.threads}个线程')
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        click.echo('正在停止，等待进行中的任务完成...')
+        job_worker.stop()
+
+@app.cli.command('purge-jobs')
+@click.option('--days', default=7, help='删除完成超过该天数的任务记录')
+def purge_jobs(days):
+    """清理已完成的后台任务记录"""
+    from app.models import Job
+
+    count = Job.purge_finished(older_than_days=days)
+    click.echo(f'已清理{count}条任务记录')
+
 @app.cli.command()
 @click.option('--host', default='0.0.0.0', help='监听主机')
 @click.option('--port', default=5000, help='监听端口')
@@ -0,0 +1,39 @@
+import os
+import sys
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    """按迁移脚本建库的临时应用，不启动后台任务线程，不缓存响应"""
+    from flask_migrate import upgrade
+    from app import create_app, db
+
+    db_path = tmp_path_factory.mktemp('db') / 'test.db'
+    environ = {
+        'DATABASE_URL': f'sqlite:///{db_path}',
+        'JOB_WORKER_MODE': 'external',
+        'RESPONSE_CACHE_BACKEND': 'none'
+    }
+    saved = {name: os.environ.get(name) for name in environ}
+    os.environ.update(environ)
+    try:
+        app = create_app()
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+    with app.app_context():
+        upgrade(directory=os.path.join(BACKEND_DIR, 'migrations'))
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+@pytest.fixture(scope='module')
+def client(app):
+    return app.test_client()
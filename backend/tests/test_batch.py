@@ -0,0 +1,37 @@
+"""批量请求接口"""
+
+def test_failed_write_does_not_break_later_items(client):
+    # 创建项目时日期以字符串写入Date列，flush失败后视图直接返回500
+    response = client.post('/api/batch', json={'requests': [
+        {'id': 'create', 'method': 'POST', 'path': '/api/projects',
+         'body': {'name': '批量', 'start_date': '2026-01-01', 'end_date': '2026-12-31'}},
+        {'id': 'list', 'path': '/api/projects'},
+        {'id': 'tasks', 'path': '/api/tasks'},
+    ]})
+    assert response.status_code == 200
+    statuses = {item['id']: item['status'] for item in response.get_json()['data']}
+    assert statuses['create'] >= 500
+    assert statuses['list'] == 200
+    assert statuses['tasks'] == 200
+
+def test_items_share_session_in_order(client, app):
+    from datetime import date
+    from app import db
+    from app.models import Project
+
+    project = Project(name='批量顺序', start_date=date(2026, 1, 1), end_date=date(2026, 12, 31))
+    db.session.add(project)
+    db.session.commit()
+    response = client.post('/api/batch', json={'requests': [
+        {'method': 'POST', 'path': '/api/tasks', 'body': {'project_id': project.id, 'title': '新任务'}},
+        {'path': f'/api/tasks?project_id={project.id}'},
+    ]})
+    created, listed = response.get_json()['data']
+    assert created['status'] == 201
+    assert [task['id'] for task in listed['body']['data']] == [created['body']['data']['id']]
+
+def test_size_limit_and_blocked_items(client, app):
+    limit = app.config['BATCH_MAX_REQUESTS']
+    assert client.post('/api/batch', json={'requests': [{'path': '/api/tasks'}] * (limit + 1)}).status_code == 400
+    item = client.post('/api/batch', json={'requests': [{'path': '/api/events/stream'}]}).get_json()['data'][0]
+    assert item['status'] == 400
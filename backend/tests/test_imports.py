@@ -0,0 +1,77 @@
+"""批量导入接口"""
+import json
+import pytest
+from app.routes import imports
+from app.utils.importer import DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE
+
+@pytest.mark.parametrize('value', ['0', '-5', 'abc'])
+def test_invalid_chunk_size_rejected(client, value):
+    response = client.post(
+        f'/api/import/projects?format=jsonl&chunk_size={value}', data=b'', content_type='application/x-ndjson'
+    )
+    assert response.status_code == 400
+    assert 'chunk_size' in response.get_json()['message']
+
+@pytest.mark.parametrize('value, expected', [
+    (None, DEFAULT_CHUNK_SIZE),
+    ('200', 200),
+    ('100000000', MAX_CHUNK_SIZE),
+])
+def test_chunk_size_clamped(client, monkeypatch, value, expected):
+    received = []
+
+    def fake_import(stream, fmt, chunk_size):
+        received.append(chunk_size)
+        return iter([])
+
+    monkeypatch.setattr(imports, 'import_projects', fake_import)
+    query = f'&chunk_size={value}' if value else ''
+    response = client.post(f'/api/import/projects?format=jsonl{query}', data=b'', content_type='application/x-ndjson')
+    response.get_data()
+    assert response.status_code == 200
+    assert received == [expected]
+
+def test_import_rows_in_chunks(client):
+    rows = b''.join(
+        b'{"name": "P%d", "start_date": "2026-01-01", "end_date": "2026-12-31"}\n' % i for i in range(5)
+    )
+    response = client.post('/api/import/projects?format=jsonl&chunk_size=2', data=rows,
+                           content_type='application/x-ndjson')
+    events = [line for line in response.get_data(as_text=True).splitlines() if line]
+    assert sum('"progress"' in line for line in events) == 3
+    assert '"imported": 5' in events[-1]
+
+def test_dependency_cycles_left_unset(client):
+    from datetime import date
+    from app import db
+    from app.models import Project, Task
+
+    project = Project(name='循环依赖', start_date=date(2026, 1, 1), end_date=date(2026, 12, 31))
+    db.session.add(project)
+    db.session.commit()
+    rows = [
+        {'ref': 'a', 'title': 'A', 'depends_on': 'b'},
+        {'ref': 'b', 'title': 'B', 'depends_on': 'a'},
+        {'ref': 'c', 'title': 'C', 'depends_on': 'c'},
+        {'ref': 'd', 'title': 'D', 'depends_on': 'a'},
+        {'ref': 'e', 'title': 'E'},
+    ]
+    response = client.post(
+        f'/api/projects/{project.id}/tasks/import?format=jsonl',
+        data=''.join(json.dumps(row) + '\n' for row in rows).encode('utf-8'),
+        content_type='application/x-ndjson'
+    )
+    events = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+    errors = [event for event in events if event['event'] == 'error']
+    done = events[-1]
+    assert [event['line'] for event in errors] == [1, 2, 3]
+    assert done['imported'] == 5
+    assert done['dependencies_resolved'] == 1
+    assert done['dependency_cycles'] == 3
+
+    db.session.expire_all()
+    tasks = {task.title: task for task in Task.query.filter_by(project_id=project.id)}
+    assert tasks['A'].depends_on is None and tasks['B'].depends_on is None and tasks['C'].depends_on is None
+    assert tasks['D'].depends_on == tasks['A'].id
+    gantt = client.get(f'/api/projects/{project.id}/gantt').get_json()
+    assert not gantt['data']['cycle']
@@ -0,0 +1,23 @@
+"""后台任务回收"""
+from datetime import datetime, timedelta
+from app import db
+from app.models import Job
+
+def test_requeue_stale_fails_jobs_without_attempts_left(app):
+    long_ago = datetime.utcnow() - timedelta(hours=1)
+    retry = Job.enqueue('noop', max_attempts=3)
+    exhausted = Job.enqueue('noop', max_attempts=3)
+    fresh = Job.enqueue('noop', max_attempts=3)
+    db.session.commit()
+    for job, attempts, locked_at in ((retry, 1, long_ago), (exhausted, 3, long_ago), (fresh, 1, datetime.utcnow())):
+        job.status, job.attempts, job.locked_by, job.locked_at = Job.STATUS_RUNNING, attempts, 'w1', locked_at
+    db.session.commit()
+
+    assert Job.requeue_stale(timeout=600) == (1, 1)
+
+    db.session.expire_all()
+    assert retry.status == Job.STATUS_QUEUED and retry.locked_by is None
+    assert exhausted.status == Job.STATUS_FAILED
+    assert 'worker lost' in exhausted.last_error and exhausted.finished_at is not None
+    assert fresh.status == Job.STATUS_RUNNING
+    assert Job.requeue_stale(timeout=600) == (0, 0)
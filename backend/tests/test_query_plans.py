@@ -0,0 +1,15 @@
+"""热点查询的执行计划检查，同 flask check-query-plans"""
+from app.models import Task
+from app.utils.query_plans import hot_queries, explain_query_plan, find_plan_problems
+
+def test_hot_queries_use_indexes(app):
+    problems = {}
+    for name, query in hot_queries():
+        plan = explain_query_plan(query)
+        if find_plan_problems(plan):
+            problems[name] = plan
+    assert problems == {}
+
+def test_table_scan_is_reported(app):
+    plan = explain_query_plan(Task.query.filter(Task.title == '未建索引的列').order_by(Task.title))
+    assert find_plan_problems(plan)
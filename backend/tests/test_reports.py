@@ -0,0 +1,33 @@
+"""耗时报表的缓存校验"""
+from datetime import datetime, timedelta
+from app.routes import reports
+
+def freeze_now(monkeypatch, moment):
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return moment.replace(tzinfo=tz) if tz else moment
+
+    monkeypatch.setattr(reports, 'datetime', FrozenDatetime)
+
+def test_default_range_revalidates_after_midnight(app, client, monkeypatch):
+    app.extensions['response_cache'].clear()
+    freeze_now(monkeypatch, datetime(2026, 3, 10, 23, 59))
+    first = client.get('/api/reports/time')
+    assert first.status_code == 200
+    assert first.get_json()['end'] == '2026-03-10'
+    etag = first.headers['ETag']
+    assert client.get('/api/reports/time', headers={'If-None-Match': etag}).status_code == 304
+
+    freeze_now(monkeypatch, datetime(2026, 3, 10, 23, 59) + timedelta(minutes=2))
+    second = client.get('/api/reports/time', headers={'If-None-Match': etag})
+    assert second.status_code == 200
+    assert second.get_json()['end'] == '2026-03-11'
+    assert second.headers['ETag'] != etag
+
+def test_explicit_range_not_affected_by_date(client, monkeypatch):
+    path = '/api/reports/time?start=2026-03-01&end=2026-03-07'
+    freeze_now(monkeypatch, datetime(2026, 3, 10, 12, 0))
+    etag = client.get(path).headers['ETag']
+    freeze_now(monkeypatch, datetime(2026, 3, 11, 12, 0))
+    assert client.get(path, headers={'If-None-Match': etag}).status_code == 304
@@ -0,0 +1,48 @@
+"""条件请求与服务端响应缓存"""
+import threading
+import pytest
+from app.utils.response_cache import MemoryCacheBackend
+
+@pytest.fixture
+def cache(app):
+    cache = app.extensions['response_cache']
+    saved = cache.backend
+    cache.backend = MemoryCacheBackend()
+    cache.hits = cache.misses = cache.stale = 0
+    yield cache
+    cache.backend = saved
+
+def test_query_arg_order_shares_etag_and_cache_entry(client, cache):
+    first = client.get('/api/tasks?status=todo&limit=5')
+    second = client.get('/api/tasks?limit=5&status=todo')
+    assert first.status_code == second.status_code == 200
+    assert first.headers['ETag'] == second.headers['ETag']
+    assert first.headers['X-Cache'] == 'MISS'
+    assert second.headers['X-Cache'] == 'HIT'
+
+    revalidated = client.get('/api/tasks?limit=5&status=todo',
+                             headers={'If-None-Match': first.headers['ETag']})
+    assert revalidated.status_code == 304
+
+def test_stats_consistent_under_concurrent_reads(cache):
+    from app.utils.response_cache import CacheEntry
+    cache.set('/a', CacheEntry('"v1"', 200, 'application/json', b'{}'), {'tasks'})
+
+    def read():
+        for _ in range(500):
+            cache.get('/a', '"v1"')
+            cache.get('/missing', '"v1"')
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.hits == 4000
+    assert cache.misses == 4000
+
+    assert cache.get('/a', '"v2"') is None
+    stats = cache.stats()
+    assert stats['stale'] == 1
+    assert stats['evictions'] == 1
+    assert stats['entries'] == 0
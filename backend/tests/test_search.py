@@ -0,0 +1,39 @@
+"""全文搜索的候选数量上限"""
+from datetime import date
+import pytest
+from app import db
+from app.models import Project, Task
+from app.utils import search
+
+@pytest.fixture(scope='module')
+def project(app):
+    project = Project(name='搜索', start_date=date(2026, 1, 1), end_date=date(2026, 12, 31))
+    db.session.add(project)
+    db.session.commit()
+    # 最早创建的任务相关度最高
+    db.session.add(Task(project_id=project.id, title='alpha alpha alpha', description='alpha alpha alpha'))
+    for i in range(7):
+        db.session.add(Task(project_id=project.id, title=f'alpha {i}', description='filler text ' * 20))
+    db.session.commit()
+    return project.id
+
+def test_unfiltered_search_reports_truncation(client, project, monkeypatch):
+    monkeypatch.setattr(search, 'SEARCH_CANDIDATES', 5)
+    body = client.get('/api/search?q=alpha&type=tasks&limit=20').get_json()
+    titles = [task['title'] for task in body['data']['tasks']]
+    assert len(titles) == 5
+    assert 'alpha alpha alpha' not in titles
+    assert body['truncated'] == {'tasks': True}
+    assert body['has_more'] == {'tasks': False}
+
+def test_filtered_search_ranks_all_matches(client, project, monkeypatch):
+    monkeypatch.setattr(search, 'SEARCH_CANDIDATES', 5)
+    body = client.get(f'/api/search?q=alpha&type=tasks&limit=3&project_id={project}').get_json()
+    assert body['data']['tasks'][0]['title'] == 'alpha alpha alpha'
+    assert body['truncated'] == {'tasks': False}
+    assert body['has_more'] == {'tasks': True}
+
+def test_search_below_cap_not_truncated(client, project):
+    body = client.get('/api/search?q=alpha&type=tasks').get_json()
+    assert body['data']['tasks'][0]['title'] == 'alpha alpha alpha'
+    assert body['truncated'] == {'tasks': False}
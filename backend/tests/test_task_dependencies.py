@@ -0,0 +1,80 @@
+"""任务依赖关系：循环校验与上下游遍历"""
+from datetime import date
+import pytest
+from app import db
+from app.models import Project, Task
+
+@pytest.fixture
+def project(app):
+    project = Project(name='依赖', start_date=date(2026, 1, 1), end_date=date(2026, 12, 31))
+    db.session.add(project)
+    db.session.commit()
+    return project.id
+
+def make_chain(project, length):
+    """依次依赖前一个任务的任务链"""
+    tasks = []
+    for i in range(length):
+        tasks.append(Task.create_task({
+            'project_id': project, 'title': f'任务{i}',
+            'depends_on': tasks[-1].id if tasks else None
+        }))
+    return [task.id for task in tasks]
+
+def put_task(client, project, task_id, depends_on):
+    return client.put(f'/api/tasks/{task_id}', json={
+        'project_id': project, 'title': '修改', 'depends_on': depends_on
+    })
+
+def dependencies(client, task_id, **params):
+    response = client.get(f'/api/tasks/{task_id}/dependencies', query_string=params)
+    assert response.status_code == 200
+    return [(row['id'], row['depth']) for row in response.get_json()['data']]
+
+def test_create_with_missing_dependency_rejected(client, project):
+    response = client.post('/api/tasks', json={'project_id': project, 'title': '新任务', 'depends_on': 999999})
+    assert response.status_code == 400
+
+def test_create_with_existing_dependency(client, project):
+    first, = make_chain(project, 1)
+    response = client.post('/api/tasks', json={'project_id': project, 'title': '新任务', 'depends_on': first})
+    assert response.status_code == 201
+    assert response.get_json()['data']['depends_on'] == first
+
+def test_self_dependency_rejected(client, project):
+    task_id, = make_chain(project, 1)
+    response = put_task(client, project, task_id, task_id)
+    assert response.status_code == 400
+    assert db.session.get(Task, task_id).depends_on is None
+
+def test_indirect_cycle_rejected(client, project):
+    first, second, third = make_chain(project, 3)
+    response = put_task(client, project, first, third)
+    assert response.status_code == 400
+    assert '循环' in response.get_json()['message']
+    assert db.session.get(Task, first).depends_on is None
+
+    # 不形成循环的修改仍然允许
+    assert put_task(client, project, third, first).status_code == 200
+
+def test_dependency_chain_up_down_and_depth(client, project):
+    a, b, c, d = make_chain(project, 4)
+    assert dependencies(client, d) == [(c, 1), (b, 2), (a, 3)]
+    assert dependencies(client, d, depth=2) == [(c, 1), (b, 2)]
+    assert dependencies(client, a, direction='down') == [(b, 1), (c, 2), (d, 3)]
+    assert dependencies(client, a, direction='down', depth=1) == [(b, 1)]
+    assert dependencies(client, a) == []
+    assert client.get(f'/api/tasks/{a}/dependencies?direction=sideways').status_code == 400
+    assert client.get(f'/api/tasks/{a}/dependencies?depth=0').status_code == 400
+
+def test_dependency_chain_terminates_on_existing_cycle(client, project):
+    a, b, c, d = make_chain(project, 4)
+    # 历史数据中的循环：绕过校验直接写入 a→c→b→a，d依赖c
+    db.session.execute(db.update(Task).where(Task.id == a).values(depends_on=c))
+    db.session.commit()
+
+    assert dependencies(client, a) == [(c, 1), (b, 2)]
+    assert dependencies(client, d) == [(c, 1), (b, 2), (a, 3)]
+    assert dependencies(client, a, direction='down') == [(b, 1), (c, 2), (d, 3)]
+    # 已有循环上的任务不能再改为依赖循环中的其他任务
+    assert put_task(client, project, b, c).status_code == 400
@@ -0,0 +1,44 @@
+"""看板任务移动与列内排序"""
+import json
+from datetime import date
+import pytest
+from app import db
+from app.models import Project, Task
+
+@pytest.fixture
+def project(app):
+    project = Project(name='看板', start_date=date(2026, 1, 1), end_date=date(2026, 12, 31))
+    db.session.add(project)
+    db.session.commit()
+    return project.id
+
+@pytest.mark.parametrize('position', ['NaN', 'Infinity', '-Infinity'])
+def test_non_finite_position_rejected(client, project, position):
+    task = Task.create_task({'project_id': project, 'title': '任务'})
+    body = f'{{"moves": [{{"task_id": {task.id}, "status": "done", "position": {position}}}]}}'
+    response = client.post('/api/tasks/batch-move', data=body, content_type='application/json')
+    assert response.status_code == 400
+    assert 'position' in response.get_json()['message']
+
+def test_status_change_moves_card_to_end_of_column(client, project):
+    done = [Task.create_task({'project_id': project, 'title': f'完成{i}', 'status': 'done'}) for i in range(2)]
+    task = Task.create_task({'project_id': project, 'title': '待办'})
+    Task.update_task(task.id, {'status': 'done'})
+    assert task.position > max(other.position for other in done)
+
+    # 状态不变时保持原位置
+    position = task.position
+    Task.update_task(task.id, {'title': '改名'})
+    assert task.position == position
+
+def test_project_list_ordered_by_column_position(client, project):
+    first, second, third = (Task.create_task({'project_id': project, 'title': f'任务{i}'}) for i in range(3))
+    response = client.post('/api/tasks/batch-move', json={'moves': [
+        {'task_id': third.id, 'status': 'todo', 'position': first.position - 1},
+        {'task_id': second.id, 'status': 'done'},
+    ]})
+    assert response.status_code == 200
+    tasks = client.get(f'/api/tasks?project_id={project}').get_json()['data']
+    assert [(task['status'], task['id']) for task in tasks] == [
+        ('done', second.id), ('todo', third.id), ('todo', first.id)
+    ]
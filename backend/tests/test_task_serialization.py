@@ -0,0 +1,90 @@
+"""任务列表和项目详情的查询次数不随任务数量增长"""
+from datetime import date, datetime, timedelta
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from app import db
+from app.models import Project, Task, TimeLog, Document
+
+SMALL = 10
+LARGE = 10000
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+def add_tasks(project_id, count):
+    """批量插入任务，每个任务带两条时间日志和一个文档"""
+    start = db.session.query(db.func.count(Task.id)).scalar()
+    now = datetime.utcnow()
+    db.session.execute(Task.__table__.insert(), [
+        {
+            'project_id': project_id,
+            'title': f'任务{start + i}',
+            'status': ('todo', 'in_progress', 'done')[i % 3],
+            'priority': 'medium',
+            'position': float(i),
+            'created_at': now + timedelta(microseconds=i),
+            'updated_at': now
+        }
+        for i in range(count)
+    ])
+    task_ids = db.session.execute(
+        db.select(Task.id).order_by(Task.id.desc()).limit(count)
+    ).scalars().all()
+    db.session.execute(TimeLog.__table__.insert(), [
+        {'task_id': task_id, 'start_time': now, 'end_time': now + timedelta(minutes=30), 'duration': 30}
+        for task_id in task_ids for _ in range(2)
+    ])
+    db.session.execute(Document.__table__.insert(), [
+        {
+            'task_id': task_id,
+            'filename': f'{task_id}.pdf',
+            'original_filename': f'{task_id}.pdf',
+            'file_type': 'pdf',
+            'file_size': 1024,
+            'file_path': f'uploads/{task_id}.pdf'
+        }
+        for task_id in task_ids
+    ])
+    db.session.commit()
+
+@pytest.fixture(scope='module')
+def project(app):
+    project = Project(name='查询次数', start_date=date(2026, 1, 1), end_date=date(2026, 12, 31))
+    db.session.add(project)
+    db.session.commit()
+    return project.id
+
+def request_counts(client, project_id):
+    """返回各接口执行的SQL语句数"""
+    counts = {}
+    for path in ('/api/tasks', f'/api/tasks?project_id={project_id}', f'/api/projects/{project_id}'):
+        with count_queries() as statements:
+            response = client.get(path)
+        assert response.status_code == 200
+        counts[path] = len(statements)
+    return counts
+
+def test_query_count_constant_as_tasks_grow(client, project):
+    add_tasks(project, SMALL)
+    small = request_counts(client, project)
+
+    add_tasks(project, LARGE - SMALL)
+    large = request_counts(client, project)
+
+    assert large == small
+    response = client.get(f'/api/tasks?project_id={project}')
+    tasks = response.get_json()['data']
+    assert len(tasks) == LARGE
+    assert all(task['time_logs_count'] == 2 and task['documents_count'] == 1 for task in tasks)
+    assert client.get(f'/api/projects/{project}').get_json()['data']['task_count'] == LARGE
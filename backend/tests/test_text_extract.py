@@ -0,0 +1,39 @@
+"""受限子进程中的文本提取"""
+import zipfile
+import pytest
+from app.utils import text_extract
+from app.utils.text_extract import run_extraction, ExtractionError
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+def make_docx(path, paragraphs):
+    body = ''.join(f'<w:p><w:r><w:t>{text}</w:t></w:r></w:p>' for text in paragraphs)
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('word/document.xml', f'<w:document {W}><w:body>{body}</w:body></w:document>')
+    return str(path)
+
+def test_extracts_docx(tmp_path):
+    path = make_docx(tmp_path / 'a.docx', ['第一段', 'second paragraph'])
+    assert run_extraction(path, 'docx', 1000) == '第一段\nsecond paragraph\n'
+
+def test_limits_passed_as_arguments(tmp_path, monkeypatch):
+    calls = []
+    real_run = text_extract.subprocess.run
+
+    def spy(args, **kwargs):
+        calls.append((args, kwargs))
+        return real_run(args, **kwargs)
+
+    monkeypatch.setattr(text_extract.subprocess, 'run', spy)
+    path = make_docx(tmp_path / 'a.docx', ['text'])
+    run_extraction(path, 'docx', 1000, cpu_seconds=7, memory_mb=64)
+    args, kwargs = calls[0]
+    assert args[-2:] == ['7', str(64 * 1024 * 1024)]
+    assert 'preexec_fn' not in kwargs
+
+@pytest.mark.skipif(text_extract.resource is None, reason='需要resource模块')
+def test_memory_limit_enforced(tmp_path):
+    path = make_docx(tmp_path / 'big.docx', (f'word{i} ' * 20 for i in range(400000)))
+    with pytest.raises(ExtractionError) as info:
+        run_extraction(path, 'docx', 10 ** 9, memory_mb=100)
+    assert not info.value.unsupported